@@ -0,0 +1,19 @@
+# Sends a high volume of queries to a resolver, without a greenlet waiting for each response.
+# Only run this against a resolver you own!
+
+from locust import constant_throughput, task
+from locust.contrib.dns import DNSUser, PreparedQuery
+
+NAMES = ["example.com", "example.org", "example.net", "doesnot-exist-1234234.com"]
+# built (in wire format) once, and sent many times with a new id each time
+QUERIES = [PreparedQuery(name, rdtype) for name in NAMES for rdtype in ("A", "AAAA")]
+
+
+class MyDNSUser(DNSUser):
+    # each task run sends len(QUERIES) queries
+    wait_time = constant_throughput(100)
+
+    @task
+    def t(self):
+        # responses are logged as "<record type> <rcode>", e.g. "A NOERROR" or "AAAA NXDOMAIN"
+        self.get_engine("127.0.0.1", sockets=4, timeout=2.0).send_many(QUERIES)
@@ -1,7 +1,7 @@
 from locust import events, task
+from locust.contrib.grpc_user import GrpcUser
 
 import gevent
-import grpc_user
 import hello_pb2
 import hello_pb2_grpc
 from hello_server import start_server
@@ -13,7 +13,7 @@ def run_grpc_server(environment, **_kwargs):
     gevent.spawn(start_server)
 
 
-class HelloGrpcUser(grpc_user.GrpcUser):
+class HelloGrpcUser(GrpcUser):
     host = "localhost:50051"
     stub_class = hello_pb2_grpc.HelloServiceStub
 
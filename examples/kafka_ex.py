@@ -0,0 +1,35 @@
+# Measures the end-to-end latency through a Kafka broker (pip install kafka-python)
+#
+# The producer users send batches of messages, and the consumer user (all of whose consumers share a group)
+# consumes them again. Run more consumer users (up to the number of partitions) if they can't keep up.
+
+from locust import constant, constant_throughput, task
+from locust.contrib.kafka_user import KafkaUser
+
+import os
+
+TOPIC = "locust-test"
+
+
+class Producer(KafkaUser):
+    weight = 10
+    wait_time = constant_throughput(1)
+    # wait up to 5ms for more messages, and compress the resulting batches
+    linger_ms = 5
+    compression_type = "gzip"
+
+    @task
+    def produce(self):
+        # logged as KAFKA_PRODUCE, with the time until each message was acknowledged by the broker
+        self.client.produce_many(TOPIC, [os.urandom(100) for _ in range(10)])
+
+
+class Consumer(KafkaUser):
+    fixed_count = 1
+    wait_time = constant(0)
+    topics = [TOPIC]
+
+    @task
+    def consume(self):
+        # logged as KAFKA_CONSUME, with the time since each message was produced
+        self.client.consume(max_records=500, timeout=1.0)
@@ -2,12 +2,35 @@ from locust import task
 from locust.contrib.mongodb import MongoDBUser
 
 import os
+import random
+
+from pymongo import InsertOne, UpdateOne
 
 
 class MongoUser(MongoDBUser):
     conn_string = os.getenv("MONGODB_URI", "mongodb://localhost:27017/defaultdb")
     db_name = "test"  # change to your db name
+    batch_size = 100  # documents per round trip when reading results
 
     @task
     def db_query(self):
         self.client.execute_query("collection", {"field": "value"})  # update to match your collection, field, and value
+
+    @task
+    def db_aggregate(self):
+        self.client.execute_aggregate(
+            "collection",
+            [{"$match": {"field": "value"}}, {"$group": {"_id": "$field", "count": {"$sum": 1}}}],
+            name="count by field",
+        )
+
+    @task
+    def db_bulk_write(self):
+        self.client.execute_bulk_write(
+            "collection",
+            [
+                InsertOne({"field": "value", "n": random.randint(1, 100)}),
+                UpdateOne({"field": "value"}, {"$inc": {"n": 1}}),
+            ],
+            name="insert and update",
+        )
@@ -2,6 +2,9 @@
 
 # OpenAIUser tracks the number of output tokens in the response_length field,
 # because it is more useful than the actual payload size. This field is available to event handlers.
+# For streamed responses, the time to first token, the latency between tokens and the number of
+# tokens per second are also recorded. They are kept apart from the request stats, in
+# get_token_metrics(environment).stats, and their percentiles are logged when locust quits.
 
 from locust import run_single_user, task
 from locust.contrib.oai import OpenAIUser
@@ -17,6 +20,15 @@ class MyUser(OpenAIUser):
         )
         # print(response.output_text)
 
+        stream = self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "Write a haiku about load testing."}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for _chunk in stream:
+            pass
+
         with self.client.rename_request("mini"):  # here's how to rename requests
             self.client.responses.create(
                 model="gpt-4o-mini",
@@ -2,6 +2,7 @@ from locust import constant, task
 from locust.contrib.postgres import PostgresUser
 
 import os
+import random
 from logging import getLogger
 
 logger = getLogger("locust")
@@ -9,6 +10,8 @@ logger = getLogger("locust")
 
 class MyUser(PostgresUser):
     wait_time = constant(1)
+    # share 10 connections between all users (in each process), instead of one connection per user
+    pool_size = 10
 
     @task
     def run_select_query(self):
@@ -19,6 +22,20 @@ class MyUser(PostgresUser):
         else:
             logger.info("no rows returned")
 
+    @task
+    def run_parameterized_query(self):
+        # named queries get their own row in the stats, and parameters allow them to be prepared server side
+        self.client.execute_query(
+            "SELECT * FROM rnc_database WHERE id = %s", (random.randint(1, 50),), name="select database by id"
+        )
+
+    @task
+    def run_pipeline(self):
+        # send several queries without waiting for each result (logged as a single request)
+        self.client.execute_pipeline(
+            [("SELECT * FROM rnc_database WHERE id = %s", (i,)) for i in range(1, 6)], name="select 5 databases"
+        )
+
     # @task
     # def run_update_query(self):
     #     random_amount = random.randint(1, 12)
@@ -0,0 +1,37 @@
+# Load tests a server speaking a custom binary protocol over TCP, where each message is prefixed by its length
+# (a 4 byte unsigned int) and starts with a 4 byte request id that the server copies into its response.
+
+from locust import constant_throughput, task
+from locust.contrib.socket_user import LengthPrefixFraming, SocketUser
+
+import itertools
+import struct
+
+request_ids = itertools.count()
+
+
+def login_message(player: str) -> bytes:
+    return struct.pack("!IB", next(request_ids), 1) + player.encode()
+
+
+def move_message(x: int, y: int) -> bytes:
+    return struct.pack("!IBhh", next(request_ids), 2, x, y)
+
+
+class GameUser(SocketUser):
+    host = "tcp://127.0.0.1:9000"
+    wait_time = constant_throughput(10)
+    framing = LengthPrefixFraming("!I")
+    # match responses to requests using the request id, so that the server can respond in any order
+    correlation_id = staticmethod(lambda payload: payload[:4])
+    # all users in the process share 4 connections, with many requests in flight on each
+    pool_size = 4
+    timeout = 5.0
+
+    def on_start(self):
+        self.client.request(login_message(f"player{id(self)}"), name="login")
+
+    @task
+    def move(self):
+        # send 10 requests at once and wait for all the responses, each request is logged separately
+        self.client.request_many([move_message(x, 0) for x in range(10)], name="move")
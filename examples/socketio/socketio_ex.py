@@ -39,6 +39,15 @@ class MySIOHttpUser(SocketIOUser, HttpUser):
         Client.call(self.sio, "send_message", {"room": "room1", "message": "foo"})
         # Emit doesnt wait for confirmation
         self.sio.emit("send_message", {"room": "room1", "message": "bar"})
+        # To log the round trip time instead, either ask the server to acknowledge the message (ack=True or a callback)
+        # or name the event the server responds with and an id that the response will contain (in its "id" field).
+        # self.sio.emit("send_message", {"room": "room1", "message": "baz"}, ack=True)
+        # self.sio.emit(
+        #     "send_message",
+        #     {"room": "room1", "message": "qux", "id": message_id},
+        #     response_event="chat_message",
+        #     correlation_id=message_id,
+        # )
         self.event.wait()  # wait for on_chat_message to set this event
         self.sio.call("leave_room", {"room": "room1"})
         # We've used multiple inheritance to combine this with HttpUser, so we can also make normal HTTP requests
@@ -649,6 +649,14 @@ def setup_parser_arguments(parser):
         help="Port for the master to listen on. Defaults to 5557.",
         env_var="LOCUST_MASTER_BIND_PORT",
     )
+    master_group.add_argument(
+        "--master-ipc-path",
+        type=str,
+        metavar="<path>",
+        default=None,
+        help="Unix domain socket path used (in addition to TCP) for master/worker communication on the same machine. Set automatically when using --processes.",
+        env_var="LOCUST_MASTER_IPC_PATH",
+    )
     master_group.add_argument(
         "--expect-workers",
         type=positive_integer,
@@ -697,6 +705,13 @@ Typically ONLY these options (and --locustfile) need to be specified on workers,
         help="Number of times to fork the locust process, to enable using system. Combine with --worker flag or let it automatically set --worker and --master flags for an all-in-one-solution. Not available on Windows. Experimental.",
         env_var="LOCUST_PROCESSES",
     )
+    worker_group.add_argument(
+        "--shared-memory-stats",
+        action="store_true",
+        default=False,
+        help="When combined with --processes (and not --worker), let the worker processes count their requests in shared memory instead of reporting them to the master over the network. Experimental.",
+        env_var="LOCUST_SHARED_MEMORY_STATS",
+    )
     worker_group.add_argument(
         "--slave",
         action=raise_argument_type_error("The --slave parameter has been renamed --worker"),
@@ -764,6 +779,13 @@ Typically ONLY these options (and --locustfile) need to be specified on workers,
         help="Store each stats entry in CSV format to _stats_history.csv file. You must also specify the '--csv' argument to enable this.",
         env_var="LOCUST_CSV_FULL_HISTORY",
     )
+    stats_group.add_argument(
+        "--csv-summary-at-end",
+        action="store_true",
+        default=False,
+        help="Only write _stats.csv, _failures.csv and _exceptions.csv when the test ends, instead of continuously updating them (_stats_history.csv is still written continuously). Reduces CPU usage when there are many endpoints. You must also specify the '--csv' argument to enable this.",
+        env_var="LOCUST_CSV_SUMMARY_AT_END",
+    )
     stats_group.add_argument(
         "--print-stats",
         action="store_true",
@@ -801,6 +823,13 @@ Typically ONLY these options (and --locustfile) need to be specified on workers,
         dest="json_file",
         help="Prints the final stats in JSON format to file path specified.",
     )
+    stats_group.add_argument(
+        "--journal",
+        metavar="<filename>",
+        dest="journal_file",
+        help="Continuously record the stats to a binary journal file, which the HTML report, JSON and CSV files can be rebuilt from with 'locust-report <filename>' (even if the master crashed).",
+        env_var="LOCUST_JOURNAL",
+    )
 
     log_group = parser.add_argument_group("Logging options")
     log_group.add_argument(
@@ -884,6 +913,19 @@ Typically ONLY these options (and --locustfile) need to be specified on workers,
         help="Instrument the Locust test run with OpenTelemetry.",
         env_var="LOCUST_ENABLE_OPENTELEMETRY",
     )
+    other_group.add_argument(
+        "--otel-aggregated-metrics",
+        action="store_true",
+        help="Instead of recording every request with OpenTelemetry, export Locust's own (aggregated) request counters and response time histograms when the metrics are collected. Much cheaper at high request rates.",
+        env_var="LOCUST_OTEL_AGGREGATED_METRICS",
+    )
+    other_group.add_argument(
+        "--otel-trace-sample-rate",
+        type=float,
+        metavar="<ratio>",
+        help="Ratio (0.0 - 1.0) of request traces to sample (head-based). 0 disables request instrumentation. Defaults to the OTEL_TRACES_SAMPLER setting (sample everything).",
+        env_var="LOCUST_OTEL_TRACE_SAMPLE_RATE",
+    )
 
     user_classes_group = parser.add_argument_group("User classes")
     user_classes_group.add_argument(
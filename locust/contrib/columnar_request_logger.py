@@ -0,0 +1,280 @@
+"""
+Per-request columnar (Apache Arrow/Parquet) logger for Locust.
+
+Like :mod:`locust.contrib.csv_request_logger`, but meant for very large numbers of
+samples. Samples are buffered in typed arrays inside the ``request`` event (no string
+formatting in the hot loop) and every ``batch_size`` samples the buffers are handed to a
+background thread, which writes them as a compressed Arrow IPC or Parquet record batch.
+
+Requires ``pyarrow`` (``pip install locust[arrow]``).
+
+Usage::
+
+    from locust import HttpUser, task, events
+    from locust.contrib.columnar_request_logger import ColumnarRequestLogger
+
+    logger = ColumnarRequestLogger("results/samples")
+
+    @events.init.add_listener
+    def on_locust_init(environment, **kwargs):
+        logger.register(environment)
+
+Each process that makes requests writes its own file per test run (every ``test_start`` begins a new run),
+named ``<node>_<run>.<arrow|parquet>``, where ``node`` is ``worker<index>`` on workers
+and ``local`` otherwise. When running with ``--processes``, all workers on the machine
+write to the same directory, and :func:`read_samples` collects the files of a run into
+a single table::
+
+    from locust.contrib.columnar_request_logger import read_samples
+
+    table = read_samples("results/samples", run=1)
+    df = table.to_pandas()
+
+Columns
+-------
+Same as :mod:`locust.contrib.csv_request_logger`: ``timestamp``, ``request_type``, ``name``,
+``response_time_ms``, ``response_length``, ``status_code`` and ``exception`` (null if the
+request succeeded).
+"""
+
+from locust.contrib.csv_request_logger import _status_code
+from locust.runners import WorkerRunner
+
+import array
+import glob
+import logging
+import math
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+from gevent.event import AsyncResult
+from gevent.threadpool import ThreadPool
+
+if TYPE_CHECKING:
+    from locust.env import Environment
+
+logger = logging.getLogger(__name__)
+
+#: Schema of the written files.
+SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.float64()),
+        ("request_type", pa.string()),
+        ("name", pa.string()),
+        ("response_time_ms", pa.float64()),
+        ("response_length", pa.int64()),
+        ("status_code", pa.int32()),
+        ("exception", pa.string()),
+    ]
+)
+
+FORMATS = ("arrow", "parquet")
+
+
+def _to_arrow(values: array.array, type: pa.DataType) -> pa.Array:
+    # zero copy, the buffer is never modified after being handed to the writer thread
+    return pa.Array.from_buffers(type, len(values), [None, pa.py_buffer(values)])
+
+
+def read_samples(directory: str, run: int = 1) -> pa.Table:
+    """Read the files written by all processes for a test run and concatenate them into one table."""
+    tables = []
+    for path in sorted(glob.glob(os.path.join(directory, f"*_{run:03d}.*"))):
+        if path.endswith(".parquet"):
+            tables.append(pyarrow.parquet.read_table(path))
+        elif path.endswith(".arrow"):
+            with pa.memory_map(path) as source:
+                tables.append(pyarrow.ipc.open_file(source).read_all())
+    return pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+
+class ColumnarRequestLogger:
+    """Listens to Locust's ``request`` event and writes the samples to Arrow IPC or Parquet files.
+
+    Parameters
+    ----------
+    directory:
+        Directory to write the files to. Created if it doesn't exist.
+    format:
+        ``"arrow"`` (Arrow IPC file, zstd compressed) or ``"parquet"``. Defaults to ``"arrow"``.
+    batch_size:
+        Number of samples to buffer before handing them to the writer thread.
+        Defaults to ``65536``.
+    """
+
+    def __init__(self, directory: str, *, format: str = "arrow", batch_size: int = 65536) -> None:
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format {format!r}, must be one of {FORMATS}")
+        self.directory = directory
+        self.format = format
+        self.batch_size = max(1, batch_size)
+
+        self.environment: Environment | None = None
+        self.run = 0
+        self._pool = ThreadPool(1)  # a single thread, so batches are written in order
+        self._writer: Any = None  # only touched from the writer thread
+        self._pending: list[AsyncResult] = []  # batches handed to the writer thread, in order
+        self._recording = False
+        self._reset_buffers()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def register(self, environment: "Environment") -> None:
+        """Attach this logger to *environment*'s event hooks.
+
+        Must be called once, typically inside an ``@events.init`` listener.
+        """
+        self.environment = environment
+        os.makedirs(self.directory, exist_ok=True)
+        environment.events.request.add_listener(self._on_request)
+        environment.events.test_start.add_listener(self._on_test_start)
+        environment.events.test_stop.add_listener(self._on_test_stop)
+        environment.events.quitting.add_listener(self._on_quitting)
+
+    @property
+    def path(self) -> str:
+        """Path of the file for the current run"""
+        runner = self.environment.runner if self.environment else None
+        node = f"worker{runner.worker_index}" if isinstance(runner, WorkerRunner) else "local"
+        return os.path.join(self.directory, f"{node}_{self.run:03d}.{self.format}")
+
+    def close(self) -> None:
+        """Write any buffered samples and close the file for the current run.
+
+        Safe to call multiple times.
+        """
+        if self._recording:
+            self._recording = False
+            self._flush()
+            self._check_pending(wait=True)
+            self._pool.spawn(self._close_writer).get()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _reset_buffers(self) -> None:
+        self._timestamps = array.array("d")
+        self._response_times = array.array("d")
+        self._response_lengths = array.array("q")
+        self._status_codes = array.array("i")
+        self._request_types = array.array("i")
+        self._names = array.array("i")
+        self._exceptions = array.array("i")
+        # strings (request types, names, exceptions) are stored as indexes in this list, which becomes the
+        # dictionary of the batch. 0 means null
+        self._strings: list[str | None] = [None]
+        self._string_indexes: dict[str, int] = {}
+
+    def _string_index(self, value: str) -> int:
+        index = self._string_indexes.get(value)
+        if index is None:
+            index = self._string_indexes[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def _on_test_start(self, **kwargs: Any) -> None:
+        self.close()
+        self.run += 1
+        self._recording = True
+        logger.debug("ColumnarRequestLogger: writing samples to %s", self.path)
+
+    def _on_test_stop(self, **kwargs: Any) -> None:
+        self.close()
+
+    def _on_quitting(self, **kwargs: Any) -> None:
+        self.close()
+        self._pool.kill()
+
+    def _on_request(
+        self,
+        *,
+        request_type: str,
+        name: str,
+        response_time: float | None,
+        response_length: int,
+        exception: Any = None,
+        response: Any = None,
+        start_time: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Event handler — called by Locust for every completed request."""
+        if not self._recording:
+            return
+        self._timestamps.append(start_time if start_time is not None else time.time())
+        self._response_times.append(response_time if response_time is not None else math.nan)
+        self._response_lengths.append(response_length or 0)
+        self._status_codes.append(_status_code(response, exception))
+        self._request_types.append(self._string_index(request_type))
+        self._names.append(self._string_index(name))
+        self._exceptions.append(0 if exception is None else self._string_index(str(exception)))
+        if len(self._timestamps) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._timestamps:
+            return
+        columns = (
+            self._timestamps,
+            self._request_types,
+            self._names,
+            self._response_times,
+            self._response_lengths,
+            self._status_codes,
+            self._exceptions,
+        )
+        self._pending.append(self._pool.spawn(self._write_batch, self.path, columns, self._strings))
+        self._reset_buffers()
+        self._check_pending(wait=False)
+
+    def _check_pending(self, wait: bool) -> None:
+        """Log the errors of the batches that have been written (of all batches, waiting for them, if wait is True)"""
+        while self._pending and (wait or self._pending[0].ready()):
+            result = self._pending.pop(0)
+            try:
+                result.get()
+            except Exception:
+                logger.exception("ColumnarRequestLogger: failed to write samples to %s", self.path)
+
+    def _open_writer(self, path: str) -> None:
+        if self.format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(path, SCHEMA, compression="zstd")
+        else:
+            options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+            self._writer = pyarrow.ipc.new_file(path, SCHEMA, options=options)
+
+    def _write_batch(self, path: str, columns: tuple[array.array, ...], strings_list: list[str | None]) -> None:
+        if self._writer is None:
+            # opened on the first batch, so that processes that don't make any requests (like the master) don't
+            # leave empty files behind
+            self._open_writer(path)
+        timestamps, request_types, names, response_times, response_lengths, status_codes, exceptions = columns
+        strings = pa.array(strings_list, pa.string())
+
+        def decode(indexes: array.array) -> pa.Array:
+            return pa.DictionaryArray.from_arrays(_to_arrow(indexes, pa.int32()), strings).dictionary_decode()
+
+        batch = pa.RecordBatch.from_arrays(
+            [
+                _to_arrow(timestamps, pa.float64()),
+                decode(request_types),
+                decode(names),
+                _to_arrow(response_times, pa.float64()),
+                _to_arrow(response_lengths, pa.int64()),
+                _to_arrow(status_codes, pa.int32()),
+                decode(exceptions),
+            ],
+            schema=SCHEMA,
+        )
+        self._writer.write_batch(batch)
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -1,12 +1,20 @@
 from locust import User
 from locust.exception import LocustError
 
+import itertools
 import time
-from collections.abc import Callable
+import weakref
+from collections.abc import Callable, Iterable
 
+import dns.message
 import dns.query
-from dns.exception import DNSException
+import dns.rcode
+import dns.rdatatype
+import gevent
+from dns.exception import DNSException, Timeout
 from dns.message import Message
+from gevent import socket
+from gevent.lock import BoundedSemaphore
 
 
 class DNSClient:
@@ -42,6 +50,133 @@ class DNSClient:
         return wrapper  # for some reason, pyright still wont infer the return type to be Message
 
 
+class PreparedQuery:
+    """A query in wire format, built once and sent many times (with a new id each time)"""
+
+    __slots__ = ("name", "wire")
+
+    def __init__(self, qname: str, rdtype: dns.rdatatype.RdataType | str = dns.rdatatype.A, name: str | None = None):
+        """
+        :param qname: The domain name to query
+        :param rdtype: The record type to query
+        :param name: The request name to log responses under (followed by the rcode), defaults to the record type
+        """
+        rdtype = dns.rdatatype.RdataType.make(rdtype)
+        self.name = name or dns.rdatatype.to_text(rdtype)
+        self.wire = dns.message.make_query(qname, rdtype).to_wire()[2:]  # everything but the id
+
+
+class DNSLoadEngine:
+    """
+    Sends pre-built queries to a single nameserver over a few shared UDP sockets, without waiting for the
+    responses. A receiver greenlet per socket matches the responses to the queries by their id, reading only the
+    header (not parsing the whole message), and logs them as requests named after the query and the rcode of the
+    response (e.g. "A NOERROR", "A NXDOMAIN"). Queries without a response within timeout are logged as failed.
+
+    The number of queries in flight is limited by max_in_flight (sending blocks when it is reached), which also
+    keeps the number of ids in use per socket below the 65536 available.
+    """
+
+    def __init__(
+        self,
+        request_event,
+        nameserver: str,
+        port: int = 53,
+        sockets: int = 4,
+        timeout: float = 2.0,
+        max_in_flight: int = 10000,
+        failure_rcodes: Iterable[int] = (dns.rcode.FORMERR, dns.rcode.SERVFAIL, dns.rcode.NOTIMP, dns.rcode.REFUSED),
+    ):
+        if max_in_flight > sockets * 60000:
+            raise ValueError("max_in_flight can't be more than 60000 per socket (dns ids are 16 bits)")
+        self.request_event = request_event
+        self.address = (nameserver, port)
+        self.timeout = timeout
+        self.failure_rcodes = frozenset(failure_rcodes)
+        family = socket.AF_INET6 if ":" in nameserver else socket.AF_INET
+        self._sockets = [socket.socket(family, socket.SOCK_DGRAM) for _ in range(sockets)]
+        # per socket: id -> (query, start_time, start_perf_counter), in the order they were sent
+        self._pending: list[dict[int, tuple[PreparedQuery, float, float]]] = [{} for _ in self._sockets]
+        self._next_ids = [itertools.count(i * 7919) for i in range(sockets)]
+        self._round_robin = itertools.cycle(range(sockets))
+        self._in_flight = BoundedSemaphore(max_in_flight)
+        self._greenlets = [gevent.spawn(self._receive, i) for i in range(sockets)]
+        self._greenlets.append(gevent.spawn(self._expire))
+
+    def send(self, query: PreparedQuery) -> None:
+        """Send a query, only blocking if max_in_flight queries are already waiting for a response"""
+        self._in_flight.acquire()
+        i = next(self._round_robin)
+        pending = self._pending[i]
+        query_id = next(self._next_ids[i]) & 0xFFFF
+        while query_id in pending:
+            query_id = next(self._next_ids[i]) & 0xFFFF
+        pending[query_id] = (query, time.time(), time.perf_counter())
+        try:
+            self._sockets[i].sendto(query_id.to_bytes(2, "big") + query.wire, self.address)
+        except OSError as e:
+            del pending[query_id]
+            self._in_flight.release()
+            self._fire(query.name + " ERROR", time.time(), 0, 0, e)
+
+    def send_many(self, queries: Iterable[PreparedQuery]) -> None:
+        for query in queries:
+            self.send(query)
+
+    def _fire(self, name: str, start_time: float, response_time: float, response_length: int, exception=None):
+        self.request_event.fire(
+            request_type="DNS",
+            name=name,
+            start_time=start_time,
+            response_time=response_time,
+            response_length=response_length,
+            context={},
+            exception=exception,
+        )
+
+    def _receive(self, i: int) -> None:
+        sock, pending = self._sockets[i], self._pending[i]
+        while True:
+            data = sock.recv(65535)
+            now = time.perf_counter()
+            if len(data) < 12:
+                continue
+            sent = pending.pop(int.from_bytes(data[:2], "big"), None)
+            if sent is None:  # late (already timed out) or unexpected response
+                continue
+            self._in_flight.release()
+            query, start_time, start_perf_counter = sent
+            rcode = data[3] & 0x0F
+            rcode_text = dns.rcode.to_text(rcode)  # type: ignore[arg-type]
+            exception = DNSException(rcode_text) if rcode in self.failure_rcodes else None
+            self._fire(
+                f"{query.name} {rcode_text}", start_time, (now - start_perf_counter) * 1000, len(data), exception
+            )
+
+    def _expire(self) -> None:
+        while True:
+            gevent.sleep(min(self.timeout / 4, 0.5))
+            deadline = time.perf_counter() - self.timeout
+            for pending in self._pending:
+                expired = []
+                # ids are added in the order the queries were sent, so only the first ones can have expired
+                for query_id, (query, start_time, start_perf_counter) in pending.items():
+                    if start_perf_counter > deadline:
+                        break
+                    expired.append(query_id)
+                for query_id in expired:
+                    query, start_time, start_perf_counter = pending.pop(query_id)
+                    self._in_flight.release()
+                    self._fire(
+                        f"{query.name} TIMEOUT", start_time, self.timeout * 1000, 0, Timeout(timeout=self.timeout)
+                    )
+
+    def close(self) -> None:
+        gevent.killall(self._greenlets)
+        for sock in self._sockets:
+            sock.close()
+
+
 class DNSUser(User):
     """
     DNSUser provides a locust client class for dnspython's :py:mod:`dns.query` methods.
@@ -60,3 +195,37 @@ class DNSUser(User):
             self.client.udp(message, "1.1.1.1")
             self.client.https(message, "1.1.1.1")
         """
+
+    def get_engine(self, nameserver: str, **kwargs) -> DNSLoadEngine:
+        """
+        A DNSLoadEngine for the nameserver, shared by all DNSUsers in the process. Use it to send a high volume of
+        queries without waiting for each response::
+
+            queries = [PreparedQuery(name) for name in names]
+
+            @task
+            def t(self):
+                self.get_engine("10.0.0.53").send_many(queries)
+        """
+        # iterables (like failure_rcodes) are made hashable, so that engines with different settings aren't shared
+        key = (
+            nameserver,
+            tuple(sorted((k, tuple(v) if isinstance(v, Iterable) else v) for k, v in kwargs.items())),
+        )
+        if key not in _engines:
+            if self.environment.events.test_stop not in _test_stop_hooks:
+                self.environment.events.test_stop.add_listener(_close_engines)
+                _test_stop_hooks.add(self.environment.events.test_stop)
+            _engines[key] = DNSLoadEngine(self.environment.events.request, nameserver, **kwargs)
+        return _engines[key]
+
+
+_engines: dict[tuple, DNSLoadEngine] = {}
+_test_stop_hooks: weakref.WeakSet = weakref.WeakSet()  # the hooks _close_engines has been added to
+
+
+def _close_engines(**kwargs) -> None:
+    # queries still in flight are not logged, the users that sent them have already stopped
+    for engine in _engines.values():
+        engine.close()
+    _engines.clear()
@@ -0,0 +1,216 @@
+import grpc.experimental.gevent as grpc_gevent
+
+# patch grpc so that it uses gevent instead of asyncio
+grpc_gevent.init_gevent()
+
+from locust import User
+from locust.exception import LocustError
+
+import itertools
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import grpc
+
+REQUEST_TYPE = "grpc"
+# request type of the individual messages of streaming responses, so that their rate is the number of messages per second
+MESSAGE_REQUEST_TYPE = "grpc_message"
+
+
+def _message_size(message: Any) -> int:
+    if isinstance(message, bytes):
+        return len(message)
+    return message.ByteSize() if hasattr(message, "ByteSize") else 0
+
+
+class _StreamingCall:
+    """
+    Wraps the call object of an RPC with a streaming response. Each message is logged (as MESSAGE_REQUEST_TYPE)
+    with the time since the previous message (or since the start of the call for the first one) as response time,
+    and the whole call is logged when the stream ends, fails or is cancelled.
+    """
+
+    def __init__(self, call, interceptor: "LocustInterceptor", name: str, start_time: float, start_perf_counter: float):
+        self._call = call
+        self._interceptor = interceptor
+        self._name = name
+        self._start_time = start_time
+        self._start_perf_counter = start_perf_counter
+        self._last_perf_counter = start_perf_counter
+        self._messages = 0
+        self._response_length = 0
+        self._done = False
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        try:
+            message = next(self._call)
+        except StopIteration:
+            self._finish(None)
+            raise
+        except grpc.RpcError as e:
+            self._finish(e)
+            raise
+        now = time.perf_counter()
+        size = _message_size(message)
+        self._messages += 1
+        self._response_length += size
+        self._interceptor.fire(MESSAGE_REQUEST_TYPE, self._name, (now - self._last_perf_counter) * 1000, size)
+        self._last_perf_counter = now
+        return message
+
+    def cancel(self) -> bool:
+        cancelled = self._call.cancel()
+        # the stream didn't complete, so it is logged as failed (like grpc does, with the CANCELLED status code)
+        self._finish(grpc.FutureCancelledError("Call cancelled by the client"))
+        return cancelled
+
+    def _finish(self, exception: Exception | None) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._interceptor.fire(
+            REQUEST_TYPE,
+            self._name,
+            (time.perf_counter() - self._start_perf_counter) * 1000,
+            self._response_length,
+            exception,
+            start_time=self._start_time,
+            context={"messages": self._messages},
+        )
+
+    def __getattr__(self, name: str):
+        return getattr(self._call, name)
+
+
+class LocustInterceptor(
+    grpc.UnaryUnaryClientInterceptor,
+    grpc.UnaryStreamClientInterceptor,
+    grpc.StreamUnaryClientInterceptor,
+    grpc.StreamStreamClientInterceptor,
+):
+    """
+    Logs RPCs as requests. Calls with a single response are logged with their latency, calls with streaming
+    responses are logged per message and as a whole (see _StreamingCall).
+    """
+
+    def __init__(self, environment):
+        self.environment = environment
+
+    def fire(
+        self,
+        request_type: str,
+        name: str,
+        response_time: float,
+        response_length: int,
+        exception: Exception | None = None,
+        start_time: float | None = None,
+        context: dict | None = None,
+        response: Any = None,
+    ) -> None:
+        self.environment.events.request.fire(
+            request_type=request_type,
+            name=name,
+            start_time=start_time,
+            response_time=response_time,
+            response_length=response_length,
+            response=response,
+            exception=exception,
+            context=context or {},
+        )
+
+    def _intercept_unary_response(self, continuation, client_call_details, request_or_iterator):
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        call = continuation(client_call_details, request_or_iterator)
+        response = exception = None
+        try:
+            response = call.result()
+        except grpc.RpcError as e:
+            exception = e
+        self.fire(
+            REQUEST_TYPE,
+            client_call_details.method,
+            (time.perf_counter() - start_perf_counter) * 1000,
+            _message_size(response) if response is not None else 0,
+            exception,
+            start_time=start_time,
+            response=response,
+        )
+        return call
+
+    def _intercept_stream_response(self, continuation, client_call_details, request_or_iterator):
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        call = continuation(client_call_details, request_or_iterator)
+        return _StreamingCall(call, self, client_call_details.method, start_time, start_perf_counter)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return self._intercept_unary_response(continuation, client_call_details, request)
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        return self._intercept_unary_response(continuation, client_call_details, request_iterator)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        return self._intercept_stream_response(continuation, client_call_details, request)
+
+    def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
+        return self._intercept_stream_response(continuation, client_call_details, request_iterator)
+
+
+_channels: dict[tuple, list[grpc.Channel]] = {}
+_channel_counters: dict[tuple, Iterator[int]] = {}
+
+
+def get_channel(
+    target: str,
+    credentials: grpc.ChannelCredentials | None = None,
+    options: list[tuple[str, Any]] | None = None,
+    count: int = 1,
+) -> grpc.Channel:
+    """
+    One of count channels to target shared by all users in this process (handed out round robin). Each channel is
+    an HTTP/2 connection that multiplexes the calls of many users, so there is no need for a channel per user.
+    """
+    options = options or []
+    key = (target, credentials, tuple(options), count)
+    if key not in _channels:
+        # each channel gets its own subchannel (connection), instead of grpc reusing one for channels with the same args
+        _channels[key] = [
+            grpc.secure_channel(target, credentials, [*options, ("grpc.channel_id", i)])
+            if credentials
+            else grpc.insecure_channel(target, [*options, ("grpc.channel_id", i)])
+            for i in range(count)
+        ]
+        _channel_counters[key] = itertools.cycle(range(count))
+    return _channels[key][next(_channel_counters[key])]
+
+
+class GrpcUser(User):
+    """
+    Makes gRPC calls using a stub (self.stub) generated from your .proto file, logging them as requests.
+    See example in :gh:`examples/grpc/locustfile.py`.
+    """
+
+    abstract = True
+    stub_class: Any = None
+    """The stub class generated by grpcio-tools for your service, e.g. hello_pb2_grpc.HelloServiceStub"""
+    credentials: grpc.ChannelCredentials | None = None
+    """Channel credentials (e.g. grpc.ssl_channel_credentials()) for a secure channel, the default is insecure"""
+    channel_options: list[tuple[str, Any]] = []
+    """Channel options, e.g. [("grpc.max_receive_message_length", 16 * 1024 * 1024)]"""
+    channel_count: int = 1
+    """Number of channels (HTTP/2 connections) shared by all users of the same host/credentials/options"""
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        for attr_value, attr_name in ((self.host, "host"), (self.stub_class, "stub_class")):
+            if attr_value is None:
+                raise LocustError(f"You must specify the {attr_name}.")
+
+        channel = get_channel(self.host, self.credentials, self.channel_options, self.channel_count)
+        self._channel = grpc.intercept_channel(channel, LocustInterceptor(environment))
+        self.stub = self.stub_class(self._channel)
@@ -0,0 +1,86 @@
+from locust import User
+from locust.contrib.messaging import MessagingClient
+
+import weakref
+from typing import Any
+
+from kafka import KafkaConsumer, KafkaProducer  # dont forget to install kafka-python
+
+
+class KafkaClient(MessagingClient):
+    produce_request_type = "KAFKA_PRODUCE"
+    consume_request_type = "KAFKA_CONSUME"
+
+
+_producers: dict[tuple, KafkaProducer] = {}
+
+
+def get_producer(bootstrap_servers: str, **config: Any) -> KafkaProducer:
+    """
+    The KafkaProducer shared by all users in this process with the same configuration. KafkaProducer is thread safe,
+    and sharing it means that messages from many users are batched together, like in a real application.
+    """
+    key = (bootstrap_servers, tuple(sorted(config.items())))
+    if key not in _producers:
+        _producers[key] = KafkaProducer(bootstrap_servers=bootstrap_servers, **config)
+    return _producers[key]
+
+
+_test_stop_hooks: weakref.WeakSet = weakref.WeakSet()  # the hooks _flush_producers has been added to
+
+
+def _flush_producers(**kwargs) -> None:
+    # send the messages still buffered by the shared producers, so that they are logged as part of this run
+    for producer in _producers.values():
+        producer.flush()
+
+
+class KafkaUser(User):
+    """
+    Produces messages and consumes them again (see KafkaClient), logging the time until the broker acknowledged each
+    produced message (KAFKA_PRODUCE) and the end-to-end latency of each consumed message (KAFKA_CONSUME).
+    See example in :gh:`examples/kafka_ex.py`.
+    """
+
+    abstract = True
+    host = "localhost:9092"
+    """The bootstrap servers (comma separated)"""
+    topics: list[str] = []
+    """Topics to consume, if any. Each user gets its own consumer"""
+    group_id: str | None = "locust"
+    """Consumer group, the partitions of the topics are divided between the users in the same group"""
+    acks: int | str = 1
+    """Number of acknowledgements the producer waits for (0, 1 or "all")"""
+    batch_size: int = 16384
+    """Maximum size in bytes of a batch of messages (per partition) sent in one request"""
+    linger_ms: int = 0
+    """Time to wait for more messages before sending a batch that isn't full"""
+    compression_type: str | None = None
+    """Compression of the batches ("gzip", "snappy", "lz4" or "zstd")"""
+    producer_config: dict[str, Any] = {}
+    """Additional KafkaProducer arguments"""
+    consumer_config: dict[str, Any] = {}
+    """Additional KafkaConsumer arguments"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.environment.events.test_stop not in _test_stop_hooks:
+            self.environment.events.test_stop.add_listener(_flush_producers)
+            _test_stop_hooks.add(self.environment.events.test_stop)
+        producer = get_producer(
+            self.host,
+            acks=self.acks,
+            batch_size=self.batch_size,
+            linger_ms=self.linger_ms,
+            compression_type=self.compression_type,
+            **self.producer_config,
+        )
+        consumer = None
+        if self.topics:
+            consumer = KafkaConsumer(
+                *self.topics, bootstrap_servers=self.host, group_id=self.group_id, **self.consumer_config
+            )
+        self.client = KafkaClient(self.environment.events.request, producer, consumer)
+
+    def on_stop(self):
+        self.client.close()
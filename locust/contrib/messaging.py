@@ -0,0 +1,136 @@
+"""
+Broker independent parts of producer/consumer users (see KafkaUser).
+
+Produced messages carry the (wall clock) time they were sent in a header, so that consuming them in the same test
+gives the end-to-end latency through the broker. If messages are consumed by another machine than the one that
+produced them, the latency can only be as accurate as the synchronization of their clocks.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+SENT_AT_HEADER = "locust_sent_at"
+
+
+def get_sent_at(headers: Iterable[tuple[str, bytes]] | None) -> float | None:
+    """The time (in seconds since the epoch) a message was produced, or None if it wasn't produced by Locust"""
+    for key, value in headers or ():
+        if key == SENT_AT_HEADER:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class MessagingClient:
+    """
+    Produces and consumes messages using a producer and a consumer with kafka-python's interface (send() returning
+    a future with add_callback/add_errback, and poll() returning records per partition).
+
+    Each produced message is logged (as produce_request_type, named after the topic) when the broker acknowledges
+    it, with the time from sending it as response time. Each consumed message that was produced by Locust is logged
+    (as consume_request_type) with the time since it was produced as response time.
+    """
+
+    produce_request_type = "PRODUCE"
+    consume_request_type = "CONSUME"
+
+    def __init__(self, request_event, producer=None, consumer=None):
+        self.request_event = request_event
+        self.producer = producer
+        self.consumer = consumer
+
+    def _fire(self, request_type: str, name: str, start_time: float, response_time: float, length: int, exception=None):
+        self.request_event.fire(
+            request_type=request_type,
+            name=name,
+            start_time=start_time,
+            response_time=response_time,
+            response_length=length,
+            exception=exception,
+            context={},
+        )
+
+    def produce(
+        self,
+        topic: str,
+        value: bytes,
+        key: bytes | None = None,
+        headers: Sequence[tuple[str, bytes]] = (),
+        name: str | None = None,
+    ) -> Any:
+        """
+        Send a message, returning its future (or None if it couldn't be sent). The message is only logged when
+        it is acknowledged, so it may be sent as part of a batch (see the producer's batch size and linger time).
+        """
+        name = name or topic
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        length = len(value)
+
+        def on_done(exception=None):
+            response_time = (time.perf_counter() - start_perf_counter) * 1000
+            self._fire(self.produce_request_type, name, start_time, response_time, length, exception)
+
+        try:
+            future = self.producer.send(
+                topic, value=value, key=key, headers=[*headers, (SENT_AT_HEADER, repr(start_time).encode())]
+            )
+        except Exception as e:
+            on_done(e)
+            return None
+        future.add_callback(lambda _metadata: on_done())
+        future.add_errback(on_done)
+        return future
+
+    def produce_many(
+        self, topic: str, values: Iterable[bytes], key: bytes | None = None, name: str | None = None
+    ) -> list[Any]:
+        """Send a batch of messages without waiting for any acknowledgements, returning their futures"""
+        return [self.produce(topic, value, key=key, name=name) for value in values]
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Send any messages that are waiting to be batched and wait for their acknowledgements"""
+        self.producer.flush(timeout=timeout)
+
+    def consume(self, max_records: int = 500, timeout: float = 1.0, name: str | None = None) -> list[Any]:
+        """
+        Poll for (at most max_records) messages, waiting at most timeout seconds, and return them. Messages that
+        weren't produced by Locust are returned but not logged.
+        """
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        try:
+            batches = self.consumer.poll(timeout_ms=int(timeout * 1000), max_records=max_records)
+        except Exception as e:
+            self._fire(
+                self.consume_request_type,
+                name or "poll",
+                start_time,
+                (time.perf_counter() - start_perf_counter) * 1000,
+                0,
+                e,
+            )
+            return []
+        now = time.time()
+        records = [record for batch in batches.values() for record in batch]
+        for record in records:
+            sent_at = get_sent_at(record.headers)
+            if sent_at is None:
+                continue
+            self._fire(
+                self.consume_request_type,
+                name or record.topic,
+                sent_at,
+                max(now - sent_at, 0) * 1000,
+                len(record.value or b""),
+            )
+        return records
+
+    def close(self) -> None:
+        if self.consumer is not None:
+            self.consumer.close()
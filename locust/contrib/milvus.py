@@ -6,6 +6,7 @@ import grpc.experimental.gevent as grpc_gevent
 grpc_gevent.init_gevent()
 
 from locust import User, events
+from locust.contrib.vector import batch_recall, fire_recall_event
 
 import time
 from abc import ABC, abstractmethod
@@ -163,6 +164,56 @@ class MilvusV2Client(BaseClient):
                 "exception": e,
             }
 
+    def search_batch(
+        self,
+        vectors,
+        anns_field,
+        limit,
+        filter="",
+        search_params=None,
+        output_fields=None,
+        ground_truth=None,
+    ):
+        """Search for multiple query vectors (e.g. a VectorDataset batch) in a single request.
+
+        If ground_truth is given (one row of ids per query vector), the recall of each query is
+        returned as an array in "recall".
+        """
+        if output_fields is None:
+            output_fields = ["id"]
+
+        start = time.perf_counter()
+        try:
+            result = self.client.search(
+                collection_name=self.collection_name,
+                data=vectors.tolist() if hasattr(vectors, "tolist") else vectors,
+                anns_field=anns_field,
+                filter=filter,
+                limit=limit,
+                search_params=search_params,
+                output_fields=output_fields,
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "response_time": (time.perf_counter() - start) * 1000,
+                "exception": e,
+            }
+        total_time = (time.perf_counter() - start) * 1000
+        empty = len(result) == 0 or all(len(r) == 0 for r in result)
+
+        search_result = {
+            "success": not empty,
+            "response_time": total_time,
+            "empty": empty,
+            "result": result,
+        }
+        # outside of the try block, a problem with the ground truth is not a failed search
+        if ground_truth is not None and not empty:
+            search_result["recall"] = self.get_batch_recall(result, ground_truth, limit)
+
+        return search_result
+
     def hybrid_search(self, reqs, ranker, limit, output_fields=None):
         if output_fields is None:
             output_fields = ["id"]
@@ -226,6 +277,12 @@ class MilvusV2Client(BaseClient):
         except Exception:
             return 0.0
 
+    @staticmethod
+    def get_batch_recall(search_results, ground_truth, limit=None):
+        """Calculate the recall of each query of a multi-vector search (as an array), see get_recall."""
+        retrieved_ids = [[hit["id"] for hit in hits] for hits in search_results]
+        return batch_recall(retrieved_ids, ground_truth, limit)
+
     def query(self, filter, output_fields=None):
         if output_fields is None:
             output_fields = ["id"]
@@ -321,7 +378,7 @@ class MilvusUser(User):
             self.client.create_collection(schema=schema, index_params=index_params, **kwargs)
 
     @staticmethod
-    def _fire_event(request_type: str, name: str, result: dict[str, Any]):
+    def _fire_event(request_type: str, name: str, result: dict[str, Any], context: dict | None = None):
         """Emit a Locust request event from a Milvus client result dict."""
         response_time = int(result.get("response_time", 0))
         events.request.fire(
@@ -330,18 +387,16 @@ class MilvusUser(User):
             response_time=response_time,
             response_length=0,
             exception=result.get("exception"),
+            context=context or {},
         )
 
     @staticmethod
     def _fire_recall_event(request_type: str, name: str, result: dict[str, Any]):
         """Emit a Locust request event for recall metric using recall value instead of response time."""
-        recall_value = result.get("recall", 0.0)
-        # Use recall value as response_time for metric display (scaled by 100 for better visualization) percentage
-        response_time_as_recall = int(recall_value * 100)
-        events.request.fire(
-            request_type=f"{request_type}",
-            name=name,
-            response_time=response_time_as_recall,
+        fire_recall_event(
+            request_type,
+            name,
+            result.get("recall", 0.0),
             response_length=result.get("retrieved_count", 0),
             exception=result.get("exception"),
         )
@@ -386,6 +441,38 @@ class MilvusUser(User):
 
         return result
 
+    def search_batch(
+        self,
+        vectors,
+        anns_field,
+        limit,
+        filter="",
+        search_params=None,
+        output_fields=None,
+        ground_truth=None,
+    ):
+        """Search for a batch of query vectors in a single request.
+
+        The request is logged as a single "search_batch" event, with the number of query vectors as
+        batch_size in its context, and one "recall" event is fired per query vector if ground_truth is
+        given. See locust.contrib.vector.VectorDataset for a way to load the vectors and ground truth.
+        """
+        result = self.client.search_batch(
+            vectors,
+            anns_field,
+            limit,
+            filter=filter,
+            search_params=search_params,
+            output_fields=output_fields,
+            ground_truth=ground_truth,
+        )
+        self._fire_event(self.client_type, "search_batch", result, context={"batch_size": len(vectors)})
+
+        for recall_value in result.get("recall", []):
+            fire_recall_event(self.client_type, "recall", recall_value)
+
+        return result
+
     def hybrid_search(self, reqs, ranker, limit, output_fields=None):
         result = self.client.hybrid_search(reqs, ranker, limit, output_fields)
         self._fire_event(self.client_type, "hybrid_search", result)
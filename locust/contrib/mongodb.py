@@ -1,41 +1,163 @@
 from locust import User, events
 
 import time
+import weakref
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
 
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from pymongo import MongoClient
 from pymongo.errors import PyMongoError
 
+REQUEST_TYPE = "MONGODB"
+
+# Read results as RawBSONDocuments, which are only decoded when accessed, and whose size is known without encoding them
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
 
 class MongoDBClient(MongoClient):
-    def __init__(self, conn_string, db_name):
-        super().__init__(conn_string)
-        self.db = self.client[db_name]
+    def __init__(self, conn_string, db_name, batch_size: int = 0, **kwargs):
+        """
+        :param batch_size: Number of documents per batch when reading query results, 0 means the server default
+        """
+        super().__init__(conn_string, **kwargs)
+        self.db = self[db_name]
+        self.batch_size = batch_size
+
+    def _fire(self, name: str, start_perf_counter: float, response_length: int, documents: int, exception=None):
+        events.request.fire(
+            request_type=REQUEST_TYPE,
+            name=name,
+            response_time=(time.perf_counter() - start_perf_counter) * 1000,
+            response_length=response_length,
+            exception=exception,
+            context={"documents": documents},
+        )
 
-    def execute_query(self, collection_name, query):
-        start_time = time.time()
+    def _drain(self, name: str, start_perf_counter: float, cursor) -> list[RawBSONDocument]:
+        documents = list(cursor)
+        self._fire(name, start_perf_counter, sum(len(document.raw) for document in documents), len(documents))
+        return documents
+
+    def execute_query(
+        self,
+        collection_name: str,
+        query: Mapping[str, Any],
+        name: str = "QUERY",
+        batch_size: int | None = None,
+        **kwargs,
+    ) -> list[RawBSONDocument] | None:
+        """
+        Find the documents matching the query and read all of them, so that the response time covers the whole
+        round trip (not just creating the cursor). The response length is the size of the documents in bytes.
+
+        Returns the documents (or None if the query failed). Additional arguments are passed on to find().
+        """
+        collection = self.db.get_collection(collection_name, codec_options=RAW_CODEC_OPTIONS)
+        start_perf_counter = time.perf_counter()
         try:
-            collection = self.db[collection_name]
-            collection.find(query)
+            cursor = collection.find(query, batch_size=self.batch_size if batch_size is None else batch_size, **kwargs)
+            return self._drain(name, start_perf_counter, cursor)
+        except PyMongoError as e:
+            self._fire(name, start_perf_counter, 0, 0, e)
+            return None
 
-            response_time = int((time.time() - start_time) * 1000)
-            events.request.fire(request_type="MONGODB", name="QUERY", response_time=response_time, response_length=0)
+    def execute_aggregate(
+        self,
+        collection_name: str,
+        pipeline: Sequence[Mapping[str, Any]],
+        name: str = "AGGREGATE",
+        batch_size: int | None = None,
+        **kwargs,
+    ) -> list[RawBSONDocument] | None:
+        """Run an aggregation pipeline and read all of its results (see execute_query)"""
+        collection = self.db.get_collection(collection_name, codec_options=RAW_CODEC_OPTIONS)
+        batch_size = self.batch_size if batch_size is None else batch_size
+        if batch_size:
+            kwargs["batchSize"] = batch_size
+        start_perf_counter = time.perf_counter()
+        try:
+            return self._drain(name, start_perf_counter, collection.aggregate(pipeline, **kwargs))
         except PyMongoError as e:
-            response_time = int((time.time() - start_time) * 1000)
-            events.request.fire(
-                request_type="MONGODB",
-                name="QUERY",
-                response_time=response_time,
-                response_length=0,
-                exception=e,
-            )
+            self._fire(name, start_perf_counter, 0, 0, e)
+            return None
+
+    def execute_insert_many(
+        self, collection_name: str, documents: Iterable[Mapping[str, Any]], name: str = "INSERT_MANY", **kwargs
+    ):
+        """Insert documents in as few round trips as possible, returning the InsertManyResult (or None if it failed)"""
+        start_perf_counter = time.perf_counter()
+        try:
+            result = self.db[collection_name].insert_many(documents, **kwargs)
+        except PyMongoError as e:
+            self._fire(name, start_perf_counter, 0, 0, e)
+            return None
+        self._fire(name, start_perf_counter, 0, len(result.inserted_ids))
+        return result
+
+    def execute_bulk_write(self, collection_name: str, requests: Sequence, name: str = "BULK_WRITE", **kwargs):
+        """
+        Execute a batch of write operations (InsertOne, UpdateOne, DeleteMany etc), returning the BulkWriteResult
+        (or None if it failed)
+        """
+        start_perf_counter = time.perf_counter()
+        try:
+            result = self.db[collection_name].bulk_write(requests, **kwargs)
+        except PyMongoError as e:
+            self._fire(name, start_perf_counter, 0, 0, e)
+            return None
+        documents = result.inserted_count + result.modified_count + result.deleted_count + result.upserted_count
+        self._fire(name, start_perf_counter, 0, documents)
+        return result
+
+
+_clients: dict[tuple[str, str, int], MongoDBClient] = {}
+
+
+def get_client(conn_string: str, db_name: str, batch_size: int = 0) -> MongoDBClient:
+    """
+    The MongoDBClient shared by all users in this process with the same connection string, database and batch size.
+    MongoClient is thread safe and has its own connection pool (see maxPoolSize), so there is no need for more.
+    """
+    key = (conn_string, db_name, batch_size)
+    if key not in _clients:
+        _clients[key] = MongoDBClient(conn_string, db_name, batch_size=batch_size)
+    return _clients[key]
+
+
+_test_stop_hooks: weakref.WeakSet = weakref.WeakSet()  # the hooks _close_clients has been added to
+
+
+def _close_clients(**kwargs) -> None:
+    # the users sharing the clients have already stopped, the next run starts with new connections
+    for client in _clients.values():
+        client.close()
+    _clients.clear()
 
 
 class MongoDBUser(User):
     abstract = True
+    conn_string: str
+    db_name: str
+    batch_size: int = 0
+    """Number of documents per batch when reading query results, 0 means the server default"""
+    shared_client: bool = True
+    """
+    Share a single client (and its connection pool) between all users in the process. If False, each user gets its
+    own client, which is closed when the user stops
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.client = MongoDBClient(conn_string=self.conn_string, db_name=self.db_name)
+        if self.shared_client:
+            if self.environment.events.test_stop not in _test_stop_hooks:
+                self.environment.events.test_stop.add_listener(_close_clients)
+                _test_stop_hooks.add(self.environment.events.test_stop)
+            self.client = get_client(self.conn_string, self.db_name, batch_size=self.batch_size)
+        else:
+            self.client = MongoDBClient(conn_string=self.conn_string, db_name=self.db_name, batch_size=self.batch_size)
 
     def on_stop(self):
-        self.client.close()
+        if not self.shared_client:
+            self.client.close()
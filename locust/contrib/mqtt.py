@@ -3,13 +3,16 @@ from __future__ import annotations
 from locust import User
 from locust.env import Environment
 
+import logging
 import random
 import selectors
 import time
 import typing
 from contextlib import suppress
 
+import gevent
 import paho.mqtt.client as mqtt
+from gevent.event import Event
 from paho.mqtt.enums import MQTTErrorCode
 
 if typing.TYPE_CHECKING:
@@ -27,6 +30,14 @@ if typing.TYPE_CHECKING:
 SUBACK_FAILURE = 0x80
 REQUEST_TYPE = "MQTT"
 
+# How often MqttEventLoop calls loop_misc() (which handles keepalive pings and timeouts) of its clients
+MISC_INTERVAL = 1.0
+# Delay between attempts to reconnect a lost connection in MqttEventLoop, doubled on each failure
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 120.0
+
+logger = logging.getLogger(__name__)
+
 
 def _generate_random_id(
     length: int,
@@ -125,6 +136,8 @@ class MqttClient(mqtt.Client):
         self._subscribe_requests: dict[int, tuple[int, str, float]] = {}
 
         self._use_loop_selectors = use_loop_selectors
+        self._selector: selectors.BaseSelector | None = None
+        self._selector_sockets: tuple | None = None
 
     def _generate_event_name(self, event_type: str, qos: int, topic: str):
         return _generate_mqtt_event_name(event_type, qos, topic)
@@ -344,8 +357,6 @@ class MqttClient(mqtt.Client):
         if timeout < 0.0:
             raise ValueError("Invalid timeout.")
 
-        sel = selectors.DefaultSelector()
-
         eventmask = selectors.EVENT_READ
 
         with suppress(IndexError):
@@ -363,33 +374,31 @@ class MqttClient(mqtt.Client):
             timeout = 0.0
 
         try:
-            if self._sockpairR is None:
-                sel.register(self._sock, eventmask)  # type: ignore
-            else:
-                sel.register(self._sock, eventmask)  # type: ignore
-                sel.register(self._sockpairR, selectors.EVENT_READ)
-
+            sel = self._get_selector(eventmask)
             events = sel.select(timeout)
 
-        except TypeError:
+        except (TypeError, KeyError):
             # Socket isn't correct type, in likelihood connection is lost
+            self._close_selector()
             return mqtt.MQTT_ERR_CONN_LOST
         except ValueError:
             # Can occur if we just reconnected but rlist/wlist contain a -1 for
             # some reason.
+            self._close_selector()
             return mqtt.MQTT_ERR_CONN_LOST
         except Exception:
             # Note that KeyboardInterrupt, etc. can still terminate since they
             # are not derived from Exception
+            self._close_selector()
             return mqtt.MQTT_ERR_UNKNOWN
 
         socklist: list[list] = [[], []]
 
-        for key, _event in events:
-            if key.events & selectors.EVENT_READ:
+        for key, event in events:
+            if event & selectors.EVENT_READ:
                 socklist[0].append(key.fileobj)
 
-            if key.events & selectors.EVENT_WRITE:
+            if event & selectors.EVENT_WRITE:
                 socklist[1].append(key.fileobj)
 
         if self._sock in socklist[0] or pending_bytes > 0:
@@ -412,10 +421,38 @@ class MqttClient(mqtt.Client):
             if rc or self._sock is None:
                 return rc
 
-        sel.close()
-
         return self.loop_misc()
 
+    def _get_selector(self, eventmask: int) -> selectors.BaseSelector:
+        """The selector used by _loop_selectors, which is kept between calls (instead of creating one per loop).
+
+        The sockets are only (re)registered when they change (e.g. on reconnect) and the event mask of the
+        MQTT socket is only modified when it changes.
+        """
+        sockets = (self._sock, self._sockpairR)
+        if self._selector is None or self._selector_sockets != sockets:
+            self._close_selector()
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._sock, eventmask)  # type: ignore
+            if self._sockpairR is not None:
+                self._selector.register(self._sockpairR, selectors.EVENT_READ)
+            self._selector_sockets = sockets
+        elif self._selector.get_key(self._sock).events != eventmask:  # type: ignore
+            self._selector.modify(self._sock, eventmask)  # type: ignore
+        return self._selector
+
+    def _close_selector(self) -> None:
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+            self._selector_sockets = None
+
+    def loop_stop(self) -> MQTTErrorCode:
+        rc = super().loop_stop()
+        # the network loop is done, so the selector it kept between iterations is no longer needed
+        self._close_selector()
+        return rc
+
     def publish(
         self,
         topic: str,
@@ -513,6 +550,145 @@ class MqttClient(mqtt.Client):
         return result, mid
 
 
+class MqttEventLoop:
+    """Serves the network traffic of many MqttClients from a single greenlet.
+
+    Instead of one network thread per client (what loop_start() does), the sockets of all clients are registered
+    with the gevent hub once (using paho's external event loop callbacks), and read from/written to when they are
+    ready. loop_misc() (keepalive pings, timeouts) is called on every client each MISC_INTERVAL seconds, and lost
+    connections are reconnected with an increasing delay, like loop_start() does.
+
+    MqttUser uses a single shared instance per process (see get_event_loop) if use_shared_loop is set.
+    """
+
+    def __init__(self, misc_interval: float = MISC_INTERVAL):
+        self.misc_interval = misc_interval
+        self._clients: set[MqttClient] = set()
+        # client -> (read watcher, write watcher) of its current socket
+        self._watchers: dict[MqttClient, tuple[typing.Any, typing.Any]] = {}
+        self._ready_read: set[MqttClient] = set()
+        self._ready_write: set[MqttClient] = set()
+        self._reconnect_delays: dict[MqttClient, float] = {}
+        self._wakeup = Event()
+        self._greenlet: gevent.Greenlet | None = None
+
+    def add(self, client: MqttClient) -> None:
+        """Connect the client (to the host and port given to connect_async) and serve it from this loop"""
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        self._clients.add(client)
+        if self._greenlet is None or self._greenlet.dead:
+            self._greenlet = gevent.spawn(self._run)
+        gevent.spawn(self._connect, client)
+
+    def remove(self, client: MqttClient) -> None:
+        """Stop serving the client (without disconnecting it). The greenlet stops when there are no clients left."""
+        self._clients.discard(client)
+        self._stop_watchers(client)
+        self._reconnect_delays.pop(client, None)
+        if not self._clients and self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _connect(self, client: MqttClient) -> None:
+        if client not in self._clients:
+            return
+        try:
+            client.reconnect()
+        except OSError as e:
+            delay = self._reconnect_delays.get(client, RECONNECT_MIN_DELAY)
+            self._reconnect_delays[client] = min(delay * 2, RECONNECT_MAX_DELAY)
+            logger.debug(f"MQTT client {client.client_id} failed to connect ({e}), retrying in {delay}s")
+            gevent.spawn_later(delay, self._connect, client)
+        else:
+            self._reconnect_delays.pop(client, None)
+
+    def _connection_lost(self, client: MqttClient) -> None:
+        self._stop_watchers(client)
+        if client in self._clients:
+            delay = self._reconnect_delays.get(client, RECONNECT_MIN_DELAY)
+            gevent.spawn_later(delay, self._connect, client)
+
+    # The socket callbacks (and the watcher callbacks, which are run by the gevent hub, where switching is not
+    # allowed) only keep track of what needs to be done, the actual reading and writing is done in _run
+
+    def _on_socket_open(self, client: MqttClient, userdata: typing.Any, sock: typing.Any) -> None:
+        self._stop_watchers(client)
+        loop = gevent.get_hub().loop
+        read_watcher = loop.io(sock.fileno(), 1)
+        write_watcher = loop.io(sock.fileno(), 2)
+        read_watcher.start(self._on_ready, client, False)
+        self._watchers[client] = (read_watcher, write_watcher)
+
+    def _on_socket_close(self, client: MqttClient, userdata: typing.Any, sock: typing.Any) -> None:
+        self._stop_watchers(client)
+
+    def _on_socket_register_write(self, client: MqttClient, userdata: typing.Any, sock: typing.Any) -> None:
+        if client in self._watchers:
+            self._watchers[client][1].start(self._on_ready, client, True)
+
+    def _on_socket_unregister_write(self, client: MqttClient, userdata: typing.Any, sock: typing.Any) -> None:
+        if client in self._watchers:
+            self._watchers[client][1].stop()
+
+    def _on_ready(self, client: MqttClient, write: bool) -> None:
+        (self._ready_write if write else self._ready_read).add(client)
+        self._wakeup.set()
+
+    def _stop_watchers(self, client: MqttClient) -> None:
+        self._ready_read.discard(client)
+        self._ready_write.discard(client)
+        if watchers := self._watchers.pop(client, None):
+            for watcher in watchers:
+                watcher.stop()
+                watcher.close()
+
+    def _run(self) -> None:
+        next_misc = time.monotonic() + self.misc_interval
+        while True:
+            self._wakeup.wait(timeout=max(next_misc - time.monotonic(), 0))
+            self._wakeup.clear()
+
+            ready_read, self._ready_read = self._ready_read, set()
+            for client in ready_read:
+                rc = client.loop_read()
+                sock = client.socket()
+                if rc:
+                    self._connection_lost(client)
+                elif sock is not None and hasattr(sock, "pending") and sock.pending() > 0:
+                    # decrypted data that is already buffered in the SSL socket won't make the fd readable
+                    self._on_ready(client, False)
+
+            ready_write, self._ready_write = self._ready_write, set()
+            for client in ready_write:
+                if not client.want_write():
+                    self._on_socket_unregister_write(client, None, None)
+                elif client.loop_write():
+                    self._connection_lost(client)
+
+            if time.monotonic() >= next_misc:
+                next_misc = time.monotonic() + self.misc_interval
+                for client in list(self._clients):
+                    if client.socket() is not None and client.loop_misc():
+                        self._connection_lost(client)
+
+            # let other greenlets run even if there is always something to read or write
+            gevent.sleep(0)
+
+
+_event_loop: MqttEventLoop | None = None
+
+
+def get_event_loop() -> MqttEventLoop:
+    """The MqttEventLoop shared by all MqttUsers (with use_shared_loop) in this process"""
+    global _event_loop
+    if _event_loop is None:
+        _event_loop = MqttEventLoop()
+    return _event_loop
+
+
 class MqttUser(User):
     abstract = True
 
@@ -527,6 +703,11 @@ class MqttUser(User):
     password = None
     protocol = mqtt.MQTTv311
     use_loop_selectors: bool = False
+    use_shared_loop: bool = False
+    """
+    Serve the connections of all MqttUsers in the process from a single greenlet (see MqttEventLoop), instead of
+    starting a network loop per user with loop_start(). Use this to simulate a large number of devices.
+    """
 
     def __init__(self, environment: Environment):
         super().__init__(environment)
@@ -554,4 +735,16 @@ class MqttUser(User):
             host=self.host,  # type: ignore
             port=self.port,
         )
-        self.client.loop_start()
+        if self.use_shared_loop:
+            get_event_loop().add(self.client)
+        else:
+            self.client.loop_start()
+
+    def on_stop(self):
+        self.client.disconnect()
+        if self.use_shared_loop:
+            # write the DISCONNECT packet (which closes the socket once it is sent) before the loop lets go of the client
+            self.client.loop_write()
+            get_event_loop().remove(self.client)
+        else:
+            self.client.loop_stop()
@@ -1,11 +1,25 @@
 # Note: this User is experimental and may change without notice.
 # The filename is oai.py so it doesnt clash with the openai package.
+from locust.env import Environment
+from locust.runners import WorkerRunner
+from locust.stats import (
+    PERCENTILES_TO_REPORT,
+    STATS_NAME_WIDTH,
+    STATS_TYPE_WIDTH,
+    RequestStats,
+    StatsEntry,
+    get_readable_percentiles,
+)
 from locust.user import User
 
+import json
+import logging
 import os
 import time
-from collections.abc import Generator
+import weakref
+from collections.abc import Callable, Generator, Iterator
 from contextlib import contextmanager
+from typing import Any
 
 import httpx
 from openai import OpenAI  # dont forget to install openai
@@ -13,17 +27,196 @@ from openai import OpenAI  # dont forget to install openai
 if not "OPENAI_API_KEY" in os.environ:
     raise Exception("You need to set OPENAI_API_KEY env var to use OpenAIUser")
 
+logger = logging.getLogger(__name__)
+console_logger = logging.getLogger("locust.stats_logger")
+
+# Token metrics (the request type of their entries in TokenMetrics.stats)
+TIME_TO_FIRST_TOKEN = "TTFT"  # ms from sending the request to receiving the first token of a streamed response
+INTER_TOKEN_LATENCY = "ITL"  # ms between consecutive tokens of a streamed response, one value per token
+TOKENS_PER_SECOND = "TOKENS/S"  # output tokens per second after the first token of a streamed response
+OUTPUT_TOKENS = "OUTPUT_TOKENS"  # output tokens per response
+
+
+class TokenMetrics:
+    """
+    The token metrics (see TIME_TO_FIRST_TOKEN etc) of an Environment. They are kept in their own RequestStats table,
+    with the metric as request type, so that they get percentiles without being counted as requests. Values are
+    logged in the unit of their metric (not necessarily ms) and are rounded like response times.
+
+    They are reset with the request stats when a test starts, workers send them to the master in their reports, and
+    the table is logged when locust quits.
+    """
+
+    def __init__(self, environment: Environment) -> None:
+        self.environment = environment
+        self.stats = RequestStats(use_response_times_cache=False)
+        environment.events.report_to_master.add_listener(self._on_report_to_master)
+        environment.events.worker_report.add_listener(self._on_worker_report)
+        environment.events.test_start.add_listener(self._reset)
+        environment.events.reset_stats.add_listener(self._reset)
+        environment.events.quitting.add_listener(self._on_quitting)
+
+    def log(self, metric: str, name: str, value: int | float) -> None:
+        self.stats.entries[(name, metric)].log(value, 0)
+
+    def _reset(self, **_kwargs) -> None:
+        self.stats.reset_all()
+
+    def _on_report_to_master(self, client_id: str, data: dict[str, Any]) -> None:
+        data["token_metrics"] = self.stats.serialize_stats()
+
+    def _on_worker_report(self, client_id: str, data: dict[str, Any]) -> None:
+        for entry_data in data.get("token_metrics", ()):
+            entry = StatsEntry.unserialize(entry_data, self.stats)
+            self.stats.entries[(entry.name, entry.method)].extend(entry)
+
+    def _on_quitting(self, environment: Environment, **_kwargs) -> None:
+        if self.stats.entries and not isinstance(environment.runner, WorkerRunner):
+            for line in self.get_summary():
+                console_logger.info(line)
+            console_logger.info("")
+
+    def get_summary(self) -> list[str]:
+        summary = ["Token metrics percentiles (approximated)"]
+        headers = ("Type", "Name") + tuple(get_readable_percentiles(PERCENTILES_TO_REPORT)) + ("# values",)
+        summary.append(
+            (
+                f"%-{str(STATS_TYPE_WIDTH)}s %-{str(STATS_NAME_WIDTH)}s %8s "
+                f"{' '.join(['%6s'] * len(PERCENTILES_TO_REPORT))}"
+            )
+            % headers
+        )
+        for key in sorted(self.stats.entries.keys()):
+            entry = self.stats.entries[key]
+            if entry.response_times:
+                summary.append(entry.percentile())
+        return summary
+
+
+_token_metrics: weakref.WeakKeyDictionary[Environment, TokenMetrics] = weakref.WeakKeyDictionary()
+
+
+def get_token_metrics(environment: Environment) -> TokenMetrics:
+    """The token metrics of an Environment, they are set up the first time this is called"""
+    if environment not in _token_metrics:
+        _token_metrics[environment] = TokenMetrics(environment)
+    return _token_metrics[environment]
+
+
+class TokenStreamParser:
+    """
+    Parses server-sent events (of the chat completions, completions or responses API) as they arrive, recording
+    when each token (content delta) arrived and the number of output tokens (if the usage is included). Only an
+    incomplete event is kept between chunks, the body is not buffered.
+    """
+
+    def __init__(self):
+        self.token_times: list[float] = []
+        self.output_tokens: int | None = None
+        self._buffer = b""
+
+    def feed(self, chunk: bytes, now: float) -> None:
+        events = (self._buffer + chunk).replace(b"\r\n", b"\n").split(b"\n\n")
+        self._buffer = events.pop()
+        for event in events:
+            self._parse_event(event, now)
+
+    def _parse_event(self, event: bytes, now: float) -> None:
+        for line in event.split(b"\n"):
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if not data or data == b"[DONE]":
+                continue
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(payload, dict):
+                continue
+            if self._has_token(payload):
+                self.token_times.append(now)
+            usage = payload.get("usage") or (payload.get("response") or {}).get("usage")
+            if usage:
+                self.output_tokens = usage.get("output_tokens", usage.get("completion_tokens", self.output_tokens))
+
+    @staticmethod
+    def _has_token(payload: dict) -> bool:
+        if payload.get("type", "").endswith(".delta"):  # responses API
+            return bool(payload.get("delta"))
+        for choice in payload.get("choices") or ():
+            delta = choice.get("delta") or {}
+            # chat completions (with or without reasoning) and legacy completions
+            if delta.get("content") or delta.get("reasoning_content") or choice.get("text"):
+                return True
+        return False
+
+
+class InstrumentedStream(httpx.SyncByteStream):
+    """
+    Passes the chunks of a response body on to a callback as they are read, and calls on_close once when done, with
+    the exception that reading the body failed with (if any) and whether the body was read to the end.
+    A stream that is abandoned without being closed is closed when it is garbage collected.
+    """
+
+    def __init__(
+        self,
+        stream: httpx.SyncByteStream,
+        on_chunk: Callable[[bytes], None],
+        on_close: Callable[[Exception | None, bool], None],
+    ) -> None:
+        self._stream = stream
+        self._on_chunk = on_chunk
+        self._on_close = on_close
+        self._closed = False
+        self._complete = False
+        self._exception: Exception | None = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            for chunk in self._stream:
+                self._on_chunk(chunk)
+                yield chunk
+        except Exception as e:
+            self._exception = e
+            raise
+        self._complete = True
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close(self._exception, self._complete)
+
+    def __del__(self) -> None:
+        if not getattr(self, "_closed", True):
+            try:
+                self.close()
+            except Exception:
+                logger.exception("Failed to close abandoned response stream")
+
 
 class OpenAIClient(OpenAI):
     def __init__(self, request_event, user, *args, **kwargs):
         self.request_name = None  # used to override url-based request names
-        self.user = user  # currently unused, but could be useful later
+        self.user = user
+        self.token_metrics = get_token_metrics(user.environment)
 
         def request_start(request):
             request.start_time = time.time()
             request.start_perf_counter = time.perf_counter()
 
         def request_end(response):
+            name = self.request_name or response.url.path
+            if (
+                response.is_success
+                and response.headers.get("content-type", "").startswith("text/event-stream")
+                and response.headers.get("content-encoding", "identity") == "identity"
+            ):
+                self._instrument_stream(response, name, request_event)
+                return
             exception = None
             response.read()
             response_time = (time.perf_counter() - response.request.start_perf_counter) * 1000
@@ -31,18 +224,25 @@ class OpenAIClient(OpenAI):
                 response.raise_for_status()
             except httpx.HTTPStatusError as e:
                 exception = e
+            try:
+                usage = response.json().get("usage") or {}
+            except ValueError:
+                usage = {}
+            output_tokens = usage.get("output_tokens", usage.get("completion_tokens", 0))
             request_event.fire(
                 request_type=response.request.method,
-                name=self.request_name or response.url.path,
+                name=name,
                 context={},
                 response=response,
                 exception=exception,
                 start_time=response.request.start_time,
                 response_time=response_time,
                 # Store the number of output tokens as response_length instead of the actual payload size because it is more useful
-                response_length=response.json().get("usage", {}).get("output_tokens", 0),
+                response_length=output_tokens,
                 url=response.url,
             )
+            if output_tokens and exception is None:
+                self.token_metrics.log(OUTPUT_TOKENS, name, output_tokens)
 
         super().__init__(
             *args,
@@ -50,6 +250,46 @@ class OpenAIClient(OpenAI):
             http_client=httpx.Client(event_hooks={"request": [request_start], "response": [request_end]}),
         )
 
+    def _instrument_stream(self, response: httpx.Response, name: str, request_event) -> None:
+        """
+        Record the token metrics of a streamed (server-sent events) response while it is being read by the SDK.
+        The request itself is logged when the stream is closed (or abandoned), with the time until then as response
+        time (and as a failure if reading the stream failed). The token metrics are only logged for streams that
+        were read to the end, those of partially read streams would be misleading.
+        """
+        parser = TokenStreamParser()
+        start_perf_counter = response.request.start_perf_counter
+        metrics = self.token_metrics
+
+        def on_chunk(chunk: bytes) -> None:
+            parser.feed(chunk, time.perf_counter())
+
+        def on_close(exception: Exception | None, complete: bool) -> None:
+            response_time = (time.perf_counter() - start_perf_counter) * 1000
+            token_times = parser.token_times
+            output_tokens = parser.output_tokens if parser.output_tokens is not None else len(token_times)
+            request_event.fire(
+                request_type=response.request.method,
+                name=name,
+                context={},
+                response=response,
+                exception=exception,
+                start_time=response.request.start_time,
+                response_time=response_time,
+                response_length=output_tokens,
+                url=response.url,
+            )
+            if exception is not None or not complete or not token_times:
+                return
+            metrics.log(TIME_TO_FIRST_TOKEN, name, (token_times[0] - start_perf_counter) * 1000)
+            for previous, current in zip(token_times, token_times[1:]):
+                metrics.log(INTER_TOKEN_LATENCY, name, (current - previous) * 1000)
+            if len(token_times) > 1 and token_times[-1] > token_times[0]:
+                metrics.log(TOKENS_PER_SECOND, name, (output_tokens - 1) / (token_times[-1] - token_times[0]))
+            metrics.log(OUTPUT_TOKENS, name, output_tokens)
+
+        response.stream = InstrumentedStream(response.stream, on_chunk, on_close)
+
     @contextmanager
     def rename_request(self, name: str) -> Generator[None]:
         """Group requests using the "with" keyword"""
@@ -1,45 +1,177 @@
 from locust import User, events
 
 import time
+import weakref
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
 
 import psycopg
+from gevent.lock import BoundedSemaphore
+from gevent.queue import LifoQueue
 
+# successful and failed queries are logged with different request types
+SUCCESS_REQUEST_TYPE = "postgres_success"
+FAILURE_REQUEST_TYPE = "postgres_failure"
 
-class PostgresClient:
-    def __init__(self, conn_string):
-        self.connection = psycopg.connect(conn_string)
 
-    def execute_query(self, query):
-        start_time = time.time()
+class PostgresPool:
+    """
+    A bounded pool of connections, that can be shared by many users (see PostgresUser.pool_size).
+
+    Connections are opened when needed (up to max_size) and idle connections are reused most-recently-used first,
+    so that a small number of connections (with their prepared statements) stay warm.
+    Pooled connections use autocommit, so that no transaction is left open when a connection is returned.
+    """
+
+    def __init__(self, conn_string: str, max_size: int, **connect_kwargs: Any):
+        self.conn_string = conn_string
+        self.max_size = max_size
+        self.connect_kwargs = {"autocommit": True, **connect_kwargs}
+        self._idle: LifoQueue = LifoQueue()
+        self._semaphore = BoundedSemaphore(max_size)
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[psycopg.Connection]:
+        """Borrow a connection, waiting (at most timeout seconds) if max_size connections are already in use"""
+        if not self._semaphore.acquire(timeout=timeout):
+            raise TimeoutError(f"No connection available in the pool within {timeout}s (max_size={self.max_size})")
+        conn = None
         try:
-            self.connection.execute(query)
-            response_time = int((time.time() - start_time) * 1000)
-            events.request.fire(
-                request_type="postgres_success",
-                name="execute_query",
-                response_time=response_time,
-                response_length=0,
-            )
-        except Exception as e:
-            response_time = int((time.time() - start_time) * 1000)
-            events.request.fire(
-                request_type="postgres_failure",
-                name="execute_query",
-                response_time=response_time,
-                response_length=0,
-                exception=e,
-            )
+            conn = self._idle.get_nowait() if not self._idle.empty() else self._connect()
+            yield conn
+        finally:
+            if conn is not None and not conn.closed:
+                if conn.info.transaction_status == psycopg.pq.TransactionStatus.IDLE:
+                    self._idle.put(conn)
+                else:
+                    # don't leave a failed (or explicitly started) transaction behind for the next user
+                    conn.close()
+            self._semaphore.release()
+
+    def _connect(self) -> psycopg.Connection:
+        return psycopg.connect(self.conn_string, **self.connect_kwargs)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+_pools: dict[tuple[str, int], PostgresPool] = {}
+
+
+def get_pool(conn_string: str, max_size: int) -> PostgresPool:
+    """The pool shared by all users in this process with the same connection string and pool size"""
+    key = (conn_string, max_size)
+    if key not in _pools:
+        _pools[key] = PostgresPool(conn_string, max_size)
+    return _pools[key]
+
+
+_test_stop_hooks: weakref.WeakSet = weakref.WeakSet()  # the hooks _close_pools has been added to
+
+
+def _close_pools(**kwargs) -> None:
+    # the users borrowing the connections have already stopped, the next run opens new ones
+    for pool in _pools.values():
+        pool.close()
+    _pools.clear()
+
+
+class PostgresClient:
+    def __init__(self, conn_string, pool: PostgresPool | None = None, prepare: bool | None = None):
+        """
+        :param conn_string: Connection string (only used if no pool is given)
+        :param pool: Pool to borrow a connection from for each query, instead of opening a connection per client
+        :param prepare: Default for execute_query's prepare argument. None means that psycopg decides (queries are
+                        prepared server side after being executed a few times on the same connection)
+        """
+        self.pool = pool
+        self.prepare = prepare
+        self.connection = psycopg.connect(conn_string) if pool is None else None
+
+    @contextmanager
+    def _connection(self) -> Iterator[psycopg.Connection]:
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            yield self.connection
+
+    def _fire(self, name: str, start_perf_counter: float, response_length: int, exception=None) -> None:
+        events.request.fire(
+            request_type=SUCCESS_REQUEST_TYPE if exception is None else FAILURE_REQUEST_TYPE,
+            name=name,
+            response_time=(time.perf_counter() - start_perf_counter) * 1000,
+            response_length=response_length,
+            exception=exception,
+        )
+
+    def execute_query(self, query, params=None, name: str = "execute_query", prepare: bool | None = None):
+        """
+        Execute a query and return its cursor (or None if the query failed).
+
+        The response time doesn't include waiting for a connection from the pool, and the response length is the
+        number of rows returned (or affected). Use params (instead of formatting them into the query) and a name
+        per query, so that the query can be prepared server side and so that each query gets its own stats.
+        """
+        with self._connection() as conn:
+            start_perf_counter = time.perf_counter()
+            try:
+                cursor = conn.execute(query, params, prepare=self.prepare if prepare is None else prepare)
+            except Exception as e:
+                self._fire(name, start_perf_counter, 0, e)
+                return None
+            self._fire(name, start_perf_counter, max(cursor.rowcount, 0))
+            return cursor
+
+    def execute_pipeline(
+        self, queries: Iterable[tuple[Any, Sequence | dict | None]], name: str = "pipeline", prepare: bool | None = None
+    ) -> list[psycopg.Cursor] | None:
+        """
+        Execute a batch of (query, params) in pipeline mode, sending all queries before waiting for any results,
+        and return their cursors (or None if any of them failed). The batch is logged as a single request, with the
+        total number of rows as response length.
+        """
+        with self._connection() as conn:
+            start_perf_counter = time.perf_counter()
+            try:
+                with conn.pipeline():
+                    cursors = [
+                        conn.execute(query, params, prepare=self.prepare if prepare is None else prepare)
+                        for query, params in queries
+                    ]
+            except Exception as e:
+                self._fire(name, start_perf_counter, 0, e)
+                return None
+            self._fire(name, start_perf_counter, sum(max(cursor.rowcount, 0) for cursor in cursors))
+            return cursors
 
     def close(self):
-        self.connection.close()
+        if self.connection is not None:
+            self.connection.close()
 
 
 class PostgresUser(User):
     abstract = True
+    conn_string: str
+    pool_size: int | None = None
+    """
+    Share a pool of (at most) this many connections between all users (in the same process) instead of opening
+    a connection per user, like an application server would
+    """
+    prepare: bool | None = None
+    """Set to True to always use server side prepared statements (see PostgresClient.execute_query)"""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.client = PostgresClient(conn_string=self.conn_string)
+        pool = None
+        if self.pool_size:
+            if self.environment.events.test_stop not in _test_stop_hooks:
+                self.environment.events.test_stop.add_listener(_close_pools)
+                _test_stop_hooks.add(self.environment.events.test_stop)
+            pool = get_pool(self.conn_string, self.pool_size)
+        self.client = PostgresClient(conn_string=self.conn_string, pool=pool, prepare=self.prepare)
 
     def on_stop(self):
         self.client.close()
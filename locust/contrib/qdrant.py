@@ -1,10 +1,11 @@
 from locust import User, events
+from locust.contrib.vector import batch_recall, fire_recall_event
 
 import time
 from typing import Any
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams
+from qdrant_client.models import QueryRequest, VectorParams
 
 
 class QdrantLocustClient:
@@ -83,6 +84,56 @@ class QdrantLocustClient:
                 "exception": e,
             }
 
+    def search_batch(
+        self,
+        vectors,
+        limit=10,
+        query_filter=None,
+        search_params=None,
+        with_payload=False,
+        ground_truth=None,
+    ):
+        """Search for multiple query vectors (e.g. a VectorDataset batch) in a single request.
+
+        If ground_truth is given (one row of ids per query vector), the recall of each query is
+        returned as an array in "recall".
+        """
+        requests = [
+            QueryRequest(
+                query=vector,
+                limit=limit,
+                filter=query_filter,
+                params=search_params,
+                with_payload=with_payload,
+            )
+            for vector in (vectors.tolist() if hasattr(vectors, "tolist") else vectors)
+        ]
+        start = time.perf_counter()
+        try:
+            result = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests,
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "response_time": (time.perf_counter() - start) * 1000,
+                "exception": e,
+            }
+        total_time = (time.perf_counter() - start) * 1000
+        empty = len(result) == 0 or all(len(r.points) == 0 for r in result)
+        search_result = {
+            "success": not empty,
+            "response_time": total_time,
+            "empty": empty,
+            "result": result,
+        }
+        # outside of the try block, a problem with the ground truth is not a failed search
+        if ground_truth is not None and not empty:
+            retrieved_ids = [[point.id for point in response.points] for response in result]
+            search_result["recall"] = batch_recall(retrieved_ids, ground_truth, limit)
+        return search_result
+
     def scroll(
         self,
         scroll_filter=None,
@@ -182,7 +233,7 @@ class QdrantUser(User):
             self.client.create_collection(vectors_config=self.vectors_config, **(self.collection_kwargs or {}))
 
     @staticmethod
-    def _fire_event(request_type: str, name: str, result: dict[str, Any]):
+    def _fire_event(request_type: str, name: str, result: dict[str, Any], context: dict | None = None):
         """Emit a Locust request event from a Qdrant client result dict."""
         response_time = int(result.get("response_time", 0))
         events.request.fire(
@@ -191,6 +242,7 @@ class QdrantUser(User):
             response_time=response_time,
             response_length=0,
             exception=result.get("exception"),
+            context=context or {},
         )
 
     def upsert(self, points):
@@ -216,6 +268,35 @@ class QdrantUser(User):
         self._fire_event(self.client_type, "search", result)
         return result
 
+    def search_batch(
+        self,
+        vectors,
+        limit=10,
+        query_filter=None,
+        search_params=None,
+        with_payload=False,
+        ground_truth=None,
+    ):
+        """Search for a batch of query vectors in a single request.
+
+        The request is logged as a single "search_batch" event, with the number of query vectors as
+        batch_size in its context, and one "recall" event is fired per query vector if ground_truth is
+        given (with the recall, in percent, as response time). See locust.contrib.vector.VectorDataset
+        for a way to load the vectors and ground truth.
+        """
+        result = self.client.search_batch(
+            vectors,
+            limit=limit,
+            query_filter=query_filter,
+            search_params=search_params,
+            with_payload=with_payload,
+            ground_truth=ground_truth,
+        )
+        self._fire_event(self.client_type, "search_batch", result, context={"batch_size": len(vectors)})
+        for recall_value in result.get("recall", []):
+            fire_recall_event(self.client_type, "recall", recall_value)
+        return result
+
     def scroll(
         self,
         scroll_filter=None,
@@ -0,0 +1,461 @@
+"""
+A User for custom (binary) protocols over raw TCP or UDP sockets.
+
+Messages are framed (see LengthPrefixFraming and DelimiterFraming) and read with recv_into into a reusable buffer,
+so a message is only copied once. Connections are shared by the users in a process (see SocketUser.pool_size), and
+many requests can be in flight on the same connection at once. Responses are matched to their requests either in
+order, or using a correlation id taken from the messages.
+"""
+
+from __future__ import annotations
+
+from locust import User
+from locust.exception import LocustError
+
+import itertools
+import socket
+import struct
+import time
+from collections import deque
+from collections.abc import Callable, Hashable, Sequence
+from urllib.parse import urlsplit
+
+import gevent
+from gevent.event import AsyncResult
+from gevent.lock import Semaphore
+
+# Size of the receive buffer of each connection (it grows if a message doesn't fit, up to the max frame size)
+BUFFER_SIZE = 64 * 1024
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class FramingError(Exception):
+    pass
+
+
+class Framing:
+    """Splits a stream of bytes into messages"""
+
+    max_frame_size = MAX_FRAME_SIZE
+
+    def encode(self, payload: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        """
+        Find the first complete frame in buffer[start:end], without copying anything.
+
+        Returns the offsets of the start and end of its payload and the end of the frame, or None if the frame isn't
+        complete yet.
+        """
+        raise NotImplementedError
+
+
+class LengthPrefixFraming(Framing):
+    """Messages are prefixed by their length, e.g. a 4 byte big endian unsigned int (the struct format "!I")"""
+
+    def __init__(self, header_format: str = "!I", length_includes_header: bool = False, max_frame_size=MAX_FRAME_SIZE):
+        self.header = struct.Struct(header_format)
+        self.length_includes_header = length_includes_header
+        self.max_frame_size = max_frame_size
+
+    def encode(self, payload: bytes) -> bytes:
+        length = len(payload) + (self.header.size if self.length_includes_header else 0)
+        return self.header.pack(length) + payload
+
+    def decode(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        if end - start < self.header.size:
+            return None
+        (length,) = self.header.unpack_from(buffer, start)
+        if self.length_includes_header:
+            length -= self.header.size
+        if length < 0 or length > self.max_frame_size:
+            raise FramingError(f"Invalid frame length {length}")
+        payload_start = start + self.header.size
+        frame_end = payload_start + length
+        if frame_end > end:
+            return None
+        return payload_start, frame_end, frame_end
+
+
+class DelimiterFraming(Framing):
+    """Messages are terminated by a delimiter, e.g. a newline"""
+
+    def __init__(self, delimiter: bytes = b"\n", max_frame_size=MAX_FRAME_SIZE):
+        self.delimiter = delimiter
+        self.max_frame_size = max_frame_size
+
+    def encode(self, payload: bytes) -> bytes:
+        return payload + self.delimiter
+
+    def decode(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        index = buffer.find(self.delimiter, start, end)
+        if index == -1:
+            if end - start > self.max_frame_size:
+                raise FramingError(f"No delimiter found in {end - start} bytes")
+            return None
+        return start, index, index + len(self.delimiter)
+
+
+class FrameReader:
+    """Reads frames from a stream socket using recv_into, into a buffer that is reused for all messages"""
+
+    def __init__(self, sock: socket.socket, framing: Framing, buffer_size: int = BUFFER_SIZE):
+        self.sock = sock
+        self.framing = framing
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    def read_frame(self) -> bytes:
+        while True:
+            frame = self.framing.decode(self._buffer, self._start, self._end)
+            if frame is not None:
+                payload_start, payload_end, frame_end = frame
+                payload = bytes(self._view[payload_start:payload_end])
+                self._start = frame_end
+                if self._start == self._end:
+                    self._start = self._end = 0
+                return payload
+            if self._end == len(self._buffer):
+                self._make_room()
+            received = self.sock.recv_into(self._view[self._end :])
+            if not received:
+                raise ConnectionError("Connection closed by peer")
+            self._end += received
+
+    def _make_room(self) -> None:
+        length = self._end - self._start
+        if self._start:
+            # move the incomplete frame to the start of the buffer
+            self._buffer[:length] = self._view[self._start : self._end]
+        else:
+            # a single frame doesn't fit, so the buffer has to grow
+            self._view.release()
+            self._buffer = self._buffer + bytearray(len(self._buffer))
+            self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = length
+
+
+def _connect_udp(address: tuple[str, int]) -> socket.socket:
+    """Like socket.create_connection, but for UDP: tries the addresses that host resolves to (IPv4 or IPv6)"""
+    error: OSError | None = None
+    for family, type, proto, _, sockaddr in socket.getaddrinfo(*address, 0, socket.SOCK_DGRAM):
+        sock = socket.socket(family, type, proto)
+        try:
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+    raise error or OSError(f"No addresses found for {address[0]}")
+
+
+class _Pending:
+    __slots__ = ("result", "sent_at", "key")
+
+    def __init__(self):
+        self.result: AsyncResult = AsyncResult()
+        self.sent_at = 0.0
+        self.key: Hashable | None = None
+
+
+class SocketConnection:
+    """
+    A TCP or UDP connection that many greenlets can send requests on at the same time (pipelining). Responses are
+    read by a separate greenlet, which timestamps them as soon as they have been received.
+
+    If correlation_id is given, it is called with each response (and each request unless a key is passed to
+    send_request) to get the id that matches them. Otherwise responses must arrive in the order of the requests.
+    Messages that don't match a request are passed to on_unsolicited.
+    """
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        framing: Framing | None = None,
+        udp: bool = False,
+        connect_timeout: float | None = 10.0,
+        buffer_size: int = BUFFER_SIZE,
+        correlation_id: Callable[[bytes], Hashable] | None = None,
+        on_unsolicited: Callable[[bytes], None] | None = None,
+    ):
+        self.address = address
+        self.framing = framing or LengthPrefixFraming()
+        self.udp = udp
+        self.correlation_id = correlation_id
+        self.on_unsolicited = on_unsolicited
+        self.closed = False
+        if udp:
+            self.sock = _connect_udp(address)
+        else:
+            self.sock = socket.create_connection(address, timeout=connect_timeout)
+            self.sock.settimeout(None)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buffer_size = buffer_size
+        self._send_lock = Semaphore()
+        self._in_order: deque[_Pending] = deque()
+        self._by_id: dict[Hashable, _Pending] = {}
+        self._receiver = gevent.spawn(self._receive)
+
+    def send_request(self, payload: bytes, key: Hashable | None = None) -> _Pending:
+        """Send a request and return the pending response (see its result and sent_at)"""
+        if self.closed:
+            raise ConnectionError("Connection is closed")
+        pending = _Pending()
+        data = payload if self.udp else self.framing.encode(payload)
+        with self._send_lock:
+            if self.correlation_id is not None:
+                pending.key = self.correlation_id(payload) if key is None else key
+                if pending.key in self._by_id:
+                    # replacing the earlier request would leave it waiting for a response that goes to this one
+                    raise ValueError(f"A request with correlation id {pending.key!r} is already waiting for a response")
+                self._by_id[pending.key] = pending
+            else:
+                self._in_order.append(pending)
+            pending.sent_at = time.perf_counter()
+            try:
+                self.sock.sendall(data)
+            except OSError as e:
+                self._fail(e)
+                raise
+        return pending
+
+    def send(self, payload: bytes) -> None:
+        """Send a message without expecting a response"""
+        data = payload if self.udp else self.framing.encode(payload)
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def abandon(self, pending: _Pending) -> None:
+        """
+        Stop waiting for a response (e.g. after a timeout). Without correlation ids, later responses can't be
+        matched to their requests anymore, so the connection is closed (and reopened by the pool when needed).
+        """
+        if self.correlation_id is None:
+            self._fail(ConnectionError("Connection closed after a request timed out"))
+        elif self._by_id.get(pending.key) is pending:
+            del self._by_id[pending.key]
+
+    def _receive(self) -> None:
+        try:
+            if self.udp:
+                buffer = bytearray(self._buffer_size)
+                view = memoryview(buffer)
+                while True:
+                    received = self.sock.recv_into(buffer)
+                    self._dispatch(bytes(view[:received]), time.perf_counter())
+            else:
+                reader = FrameReader(self.sock, self.framing, self._buffer_size)
+                while True:
+                    payload = reader.read_frame()
+                    self._dispatch(payload, time.perf_counter())
+        except Exception as e:
+            self._fail(e)
+
+    def _dispatch(self, payload: bytes, received_at: float) -> None:
+        if self.correlation_id is not None:
+            pending = self._by_id.pop(self.correlation_id(payload), None)
+        else:
+            pending = self._in_order.popleft() if self._in_order else None
+        if pending is not None:
+            pending.result.set((payload, received_at))
+        elif self.on_unsolicited is not None:
+            self.on_unsolicited(payload)
+
+    def _fail(self, exception: Exception) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.sock.close()
+        for pending in [*self._in_order, *self._by_id.values()]:
+            pending.result.set_exception(exception)
+        self._in_order.clear()
+        self._by_id.clear()
+
+    def close(self) -> None:
+        self._fail(ConnectionError("Connection closed"))
+        self._receiver.kill(block=False)
+
+
+class SocketPool:
+    """
+    A fixed number of connections to the same address, handed out round robin. The connections are shared rather
+    than borrowed (each one can have many requests in flight), and closed connections are replaced when needed.
+    """
+
+    def __init__(self, address: tuple[str, int], size: int = 1, **connection_kwargs):
+        self.address = address
+        self.connection_kwargs = connection_kwargs
+        self._connections: list[SocketConnection | None] = [None] * size
+        self._counter = itertools.cycle(range(size))
+        self._connect_lock = Semaphore()
+
+    def get(self) -> SocketConnection:
+        index = next(self._counter)
+        connection = self._connections[index]
+        if connection is None or connection.closed:
+            with self._connect_lock:
+                connection = self._connections[index]
+                if connection is None or connection.closed:
+                    connection = self._connections[index] = SocketConnection(self.address, **self.connection_kwargs)
+        return connection
+
+    def close(self) -> None:
+        for connection in self._connections:
+            if connection is not None:
+                connection.close()
+
+
+_pools: dict[tuple, SocketPool] = {}
+
+
+def get_pool(address: tuple[str, int], size: int, **connection_kwargs) -> SocketPool:
+    """The pool shared by all users in this process with the same address, size and connection settings"""
+    key = (address, size, tuple(sorted(connection_kwargs.items(), key=lambda item: item[0])))
+    if key not in _pools:
+        _pools[key] = SocketPool(address, size, **connection_kwargs)
+    return _pools[key]
+
+
+class SocketClient:
+    """
+    Sends requests on the connections of a pool and logs them, with the time from sending each request until its
+    response was read as response time.
+    """
+
+    def __init__(self, request_event, pool: SocketPool, request_type: str = "TCP", timeout: float = 10.0):
+        self.request_event = request_event
+        self.pool = pool
+        self.request_type = request_type
+        self.timeout = timeout
+
+    def _fire(self, name: str, start_time: float, response_time: float, length: int, exception=None) -> None:
+        self.request_event.fire(
+            request_type=self.request_type,
+            name=name,
+            start_time=start_time,
+            response_time=response_time,
+            response_length=length,
+            exception=exception,
+            context={},
+        )
+
+    def _send(self, payload: bytes, name: str, key: Hashable | None) -> tuple[SocketConnection, _Pending] | None:
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        try:
+            connection = self.pool.get()
+            return connection, connection.send_request(payload, key)
+        except Exception as e:
+            self._fire(name, start_time, (time.perf_counter() - start_perf_counter) * 1000, 0, e)
+            return None
+
+    def _wait(
+        self,
+        sent: tuple[SocketConnection, _Pending],
+        name: str,
+        start_time: float,
+        deadline: float,
+    ) -> bytes | None:
+        connection, pending = sent
+        try:
+            response, received_at = pending.result.get(timeout=max(deadline - time.perf_counter(), 0))
+        except gevent.Timeout:
+            connection.abandon(pending)
+            exception = TimeoutError(f"No response within {deadline - pending.sent_at:.3f}s")
+            self._fire(name, start_time, (time.perf_counter() - pending.sent_at) * 1000, 0, exception)
+            return None
+        except Exception as e:
+            self._fire(name, start_time, (time.perf_counter() - pending.sent_at) * 1000, 0, e)
+            return None
+        self._fire(name, start_time, (received_at - pending.sent_at) * 1000, len(response))
+        return response
+
+    def request(
+        self, payload: bytes, name: str = "request", timeout: float | None = None, key: Hashable | None = None
+    ) -> bytes | None:
+        """
+        Send a request and wait for its response, returning the response payload (or None if it failed).
+
+        :param key: The correlation id of the request, if the pool's correlation_id function can't get it from
+                    the payload
+        """
+        start_time = time.time()
+        sent = self._send(payload, name, key)
+        if sent is None:
+            return None
+        return self._wait(sent, name, start_time, sent[1].sent_at + (self.timeout if timeout is None else timeout))
+
+    def request_many(
+        self,
+        payloads: Sequence[bytes],
+        name: str = "request",
+        timeout: float | None = None,
+        keys: Sequence[Hashable] | None = None,
+    ) -> list[bytes | None]:
+        """
+        Send a batch of requests without waiting for any responses (pipelining), then wait (at most timeout
+        seconds in total) for all of them. Each request is logged separately, and the responses (or None for
+        failed requests) are returned in the order of the requests.
+        """
+        start_time = time.time()
+        deadline = time.perf_counter() + (self.timeout if timeout is None else timeout)
+        sent = [self._send(payload, name, key) for payload, key in zip(payloads, keys or [None] * len(payloads))]
+        return [self._wait(s, name, start_time, deadline) if s is not None else None for s in sent]
+
+    def send(self, payload: bytes, name: str = "send") -> None:
+        """Send a message that has no response, logging the time it took to send it"""
+        start_time = time.time()
+        start_perf_counter = time.perf_counter()
+        exception = None
+        try:
+            self.pool.get().send(payload)
+        except Exception as e:
+            exception = e
+        self._fire(name, start_time, (time.perf_counter() - start_perf_counter) * 1000, len(payload), exception)
+
+
+class SocketUser(User):
+    """
+    Sends messages of a custom protocol over TCP or UDP (see SocketClient).
+    The host is given as tcp://host:port or udp://host:port. See example in :gh:`examples/socket_ex.py`.
+    """
+
+    abstract = True
+    framing: Framing = LengthPrefixFraming()
+    """How messages are delimited on TCP connections (with UDP, each datagram is a message)"""
+    correlation_id: Callable[[bytes], Hashable] | None = None
+    """
+    Function (use staticmethod) that returns the id that matches a response to its request, e.g.
+    ``staticmethod(lambda payload: payload[:4])``. If None, responses must arrive in the order of the requests
+    """
+    pool_size: int | None = 1
+    """Number of connections shared by all users in the process, or None to give each user its own connection"""
+    timeout: float = 10.0
+    """Maximum time to wait for a response"""
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        if self.host is None:
+            raise LocustError("You must specify the host, e.g. tcp://127.0.0.1:9000")
+        url = urlsplit(self.host if "://" in self.host else f"tcp://{self.host}")
+        if url.scheme not in ("tcp", "udp") or not url.hostname or not url.port:
+            raise LocustError(f"Invalid host {self.host}, expected tcp://host:port or udp://host:port")
+        address = (url.hostname, url.port)
+        connection_kwargs = {
+            "framing": self.framing,
+            "udp": url.scheme == "udp",
+            "correlation_id": type(self).correlation_id,
+        }
+        if self.pool_size:
+            self.pool = get_pool(address, self.pool_size, **connection_kwargs)
+        else:
+            self.pool = SocketPool(address, 1, **connection_kwargs)
+        self.client = SocketClient(self.environment.events.request, self.pool, url.scheme.upper(), self.timeout)
+
+    def on_stop(self):
+        if not self.pool_size:
+            self.pool.close()
@@ -1,56 +1,230 @@
 from locust import User
 from locust.event import EventHook
 
+import itertools
+import time
+import weakref
+from collections.abc import Hashable
 from typing import Any
 
 import gevent
 import socketio
+from gevent.lock import Semaphore
+
+RESPONSE_TIMEOUT = 30.0
+
+
+class ResponseTimeout(Exception):
+    pass
+
+
+class LatencyTracker:
+    """
+    Keeps track of messages that are waiting for a response (an ack, or a response event matched by correlation id)
+    and logs them as requests when the response arrives, with the round trip time as response time. Messages without
+    a response within timeout seconds are logged as failures.
+
+    A tracker is shared by all SocketIOClients in a process (see get_tracker), so that a message can be matched to
+    responses received by other users (e.g. for measuring pub/sub fan-out latency).
+    """
+
+    def __init__(self, request_event: EventHook, timeout: float = RESPONSE_TIMEOUT):
+        self.request_event = request_event
+        self.timeout = timeout
+        # key -> [request_type, name, start_time, start_perf_counter, response_length, fanout, responses],
+        # in the order the messages were sent
+        self._pending: dict[Hashable, list] = {}
+        self._greenlet: gevent.Greenlet | None = None
+
+    def start(self, key: Hashable, request_type: str, name: str, response_length: int, fanout: bool = False) -> None:
+        """
+        Start waiting for a response to a message. If fanout is set, every response that arrives within timeout is
+        logged (instead of only the first one).
+        """
+        # a reused key is moved to the end, _expire relies on the messages being in the order they were sent
+        self._pending.pop(key, None)
+        self._pending[key] = [request_type, name, time.time(), time.perf_counter(), response_length, fanout, 0]
+        if self._greenlet is None or self._greenlet.dead:
+            self._greenlet = gevent.spawn(self._expire)
+
+    def complete(self, key: Hashable) -> bool:
+        """Log the round trip of the message with this key, returns False if no message was waiting for it"""
+        now = time.perf_counter()
+        pending = self._pending.get(key)
+        if pending is None:
+            return False
+        request_type, name, start_time, start_perf_counter, response_length, fanout, _ = pending
+        if fanout:
+            pending[-1] += 1
+        else:
+            del self._pending[key]
+        self.request_event.fire(
+            request_type=request_type,
+            name=name,
+            start_time=start_time,
+            response_time=(now - start_perf_counter) * 1000,
+            response_length=response_length,
+            exception=None,
+            context={},
+        )
+        return True
+
+    def cancel(self, key: Hashable) -> None:
+        """Stop waiting for a response (e.g. because sending the message failed)"""
+        self._pending.pop(key, None)
+
+    def _expire(self) -> None:
+        while self._pending:
+            gevent.sleep(min(self.timeout / 4, 1.0))
+            deadline = time.perf_counter() - self.timeout
+            expired = []
+            for key, pending in self._pending.items():
+                if pending[3] > deadline:
+                    break
+                expired.append(key)
+            for key in expired:
+                request_type, name, start_time, _, response_length, _, responses = self._pending.pop(key)
+                if not responses:
+                    self.request_event.fire(
+                        request_type=request_type,
+                        name=name,
+                        start_time=start_time,
+                        response_time=self.timeout * 1000,
+                        response_length=response_length,
+                        exception=ResponseTimeout(f"No response within {self.timeout}s"),
+                        context={},
+                    )
+
+
+_trackers: weakref.WeakKeyDictionary[EventHook, LatencyTracker] = weakref.WeakKeyDictionary()
+
+
+def get_tracker(request_event: EventHook) -> LatencyTracker:
+    """The LatencyTracker shared by all SocketIOClients (in this process) logging to request_event"""
+    if request_event not in _trackers:
+        _trackers[request_event] = LatencyTracker(request_event)
+    return _trackers[request_event]
 
 
 class SocketIOClient(socketio.Client):
-    def __init__(self, request_event: EventHook, *args, **kwargs):
+    def __init__(
+        self, request_event: EventHook, *args, tracker: LatencyTracker | None = None, pooled: bool = False, **kwargs
+    ):
         super().__init__(*args, **kwargs)
         self.request_event = request_event
+        self.pooled = pooled
+        self._connect_lock = Semaphore()
+        self._users = 0  # the number of users that have called connect() and not disconnect() on a pooled client
+        self.tracker = tracker or get_tracker(request_event)
+        self._ack_ids = itertools.count()
 
     def connect(self, *args, **kwargs):
         """
         Wraps :meth:`socketio.Client.connect`.
         """
+        if self.pooled:
+            with self._connect_lock:
+                self._users += 1
+                if self.connected:
+                    return
+                with self.request_event.measure("WS", "connect") as _:
+                    super().connect(*args, **kwargs)
+            return
         with self.request_event.measure("WS", "connect") as _:
             super().connect(*args, **kwargs)
 
-    def send(self, data, namespace=None, callback=None, name="Unnamed") -> None:
+    def disconnect(self, *args, **kwargs):
         """
-        Wraps :meth:`socketio.Client.send`.
+        Wraps :meth:`socketio.Client.disconnect`. A pooled client stays connected until all the users that
+        connected it have disconnected (or the test stops).
         """
-        exception = None
-        try:
-            super().send(data, namespace, callback)
-        except Exception as e:
-            exception = e
-        self.request_event.fire(
-            request_type="WSS",
-            name=name,
-            response_time=0,
-            response_length=len(data or []),
-            exception=exception,
-            context={},
-        )
+        if self.pooled:
+            with self._connect_lock:
+                self._users = max(self._users - 1, 0)
+                if self._users:
+                    return
+        super().disconnect(*args, **kwargs)
+
+    def send(
+        self,
+        data,
+        namespace=None,
+        callback=None,
+        name="Unnamed",
+        ack: bool = False,
+        response_event: str | None = None,
+        correlation_id: Hashable | None = None,
+        fanout: bool = False,
+    ) -> None:
+        """
+        Wraps :meth:`socketio.Client.send`. See :meth:`emit` for how the round trip time is measured.
+        """
+        self._emit("WSS", name, "message", data, namespace, callback, ack, response_event, correlation_id, fanout)
 
-    def emit(self, event, data=None, namespace=None, callback=None) -> None:
+    def emit(
+        self,
+        event,
+        data=None,
+        namespace=None,
+        callback=None,
+        name: str | None = None,
+        ack: bool = False,
+        response_event: str | None = None,
+        correlation_id: Hashable | None = None,
+        fanout: bool = False,
+    ) -> None:
         """
         Wraps :meth:`socketio.Client.emit`.
+
+        By default the request is logged when the message has been sent, with response time 0. To measure the round
+        trip time instead, either:
+
+        * ask the server to acknowledge the message (by giving a callback, or ack=True), or
+        * give the name of the event the server responds with (response_event) and an id (correlation_id) that the
+          response will contain (see :meth:`correlation_id`). With fanout=True, every matching response received
+          within the timeout (by any user in this process) is logged, e.g. to measure pub/sub delivery latency.
+
+        The request is named after the event, prefixed by the namespace (if it isn't the default one), unless a
+        name is given. Messages that don't get a response within the timeout of the tracker are logged as failures.
         """
-        exception = None
+        if name is None:
+            name = str(event) if namespace in (None, "/") else f"{namespace} {event}"
+        self._emit("WSE", name, event, data, namespace, callback, ack, response_event, correlation_id, fanout)
+
+    def _emit(self, request_type, name, event, data, namespace, callback, ack, response_event, correlation_id, fanout):
+        response_length = len(data or [])
+        key = None
+        if callback is not None or ack:
+            key = ("ack", next(self._ack_ids), id(self))
+
+            def ack_callback(*args):
+                self.tracker.complete(key)
+                if callback is not None:
+                    callback(*args)
+
+            self.tracker.start(key, request_type, name, response_length)
+        elif response_event is not None and correlation_id is not None:
+            key = (response_event, correlation_id)
+            self.tracker.start(key, request_type, name, response_length, fanout)
+            ack_callback = None
+        else:
+            ack_callback = None
+
         try:
-            super().emit(event, data, namespace, callback)
+            socketio.Client.emit(self, event, data, namespace, ack_callback)
         except Exception as e:
+            if key is not None:
+                self.tracker.cancel(key)
             exception = e
+        else:
+            if key is not None:
+                return  # logged when the response arrives
+            exception = None
         self.request_event.fire(
-            request_type="WSE",
-            name=str(event),
+            request_type=request_type,
+            name=name,
             response_time=0,
-            response_length=len(data or []),
+            response_length=response_length,
             exception=exception,
             context={},
         )
@@ -69,8 +243,12 @@ class SocketIOClient(socketio.Client):
 
         Measuring response_time isn't obvious for for WebSockets/SocketIO so we set them to 0.
         Sometimes response time can be inferred from the event data (if it contains a timestamp)
-        or related to a message that you sent. Override this method in your User class to do that.
+        or related to a message that you sent (see the response_event argument of :meth:`emit`).
+        Override this method in your User class to do that.
         """
+        correlation_id = self.correlation_id(event, data)
+        if correlation_id is not None:
+            self.tracker.complete((event, correlation_id))
         self.request_event.fire(
             request_type="WSR",
             name=event,
@@ -80,6 +258,15 @@ class SocketIOClient(socketio.Client):
             context={},
         )
 
+    def correlation_id(self, event: str, data: Any) -> Hashable | None:
+        """
+        The id that a received event responds to (matched with the correlation_id given to :meth:`emit`).
+        Defaults to the "id" field of the data. Override this if your messages use something else.
+        """
+        if isinstance(data, dict):
+            return data.get("id")
+        return None
+
 
 class SocketIOUser(User):
     """
@@ -90,10 +277,44 @@ class SocketIOUser(User):
     abstract = True
     options: dict[str, Any] = {}
     """socketio.Client options, e.g. `{"reconnection_attempts": 1, "reconnection_delay": 2, "logger": True, "engineio_logger": True}`"""
+    pool_size: int | None = None
+    """
+    Share this many clients (connections) between all users of this class in the process, instead of one per user.
+    The first user to call connect() on a shared client connects it, later calls are ignored. A shared client is
+    disconnected when the last user that connected it calls disconnect(), or when the test stops.
+    """
     sio: SocketIOClient
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.sio = SocketIOClient(self.environment.events.request, **self.options)
-        self.sio_greenlet = gevent.spawn(self.sio.wait)
-        self.sio.on("*", self.sio.on_message)
+        if self.pool_size:
+            if self.environment.events.test_stop not in _test_stop_hooks:
+                self.environment.events.test_stop.add_listener(_close_client_pools)
+                _test_stop_hooks.add(self.environment.events.test_stop)
+            pool, counter = _client_pools.setdefault(type(self), ([], itertools.count()))
+            index = next(counter) % self.pool_size
+            if index == len(pool):
+                pool.append(self._create_client())
+            self.sio, self.sio_greenlet = pool[index]
+        else:
+            self.sio, self.sio_greenlet = self._create_client()
+
+    def _create_client(self) -> tuple[SocketIOClient, gevent.Greenlet]:
+        sio = SocketIOClient(self.environment.events.request, pooled=bool(self.pool_size), **self.options)
+        sio_greenlet = gevent.spawn(sio.wait)
+        sio.on("*", sio.on_message)
+        return sio, sio_greenlet
+
+
+_client_pools: dict[type[SocketIOUser], tuple[list[tuple[SocketIOClient, gevent.Greenlet]], itertools.count]] = {}
+_test_stop_hooks: weakref.WeakSet = weakref.WeakSet()  # the hooks _close_client_pools has been added to
+
+
+def _close_client_pools(**kwargs) -> None:
+    # the users sharing the clients have already stopped, the next run starts with new connections
+    for pool, _ in _client_pools.values():
+        for sio, sio_greenlet in pool:
+            if sio.connected:
+                socketio.Client.disconnect(sio)  # regardless of the users that are still connected
+            sio_greenlet.kill(block=False)
+    _client_pools.clear()
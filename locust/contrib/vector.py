@@ -0,0 +1,93 @@
+"""
+Helpers for driving vector database load tests (see MilvusUser.search_batch and QdrantUser.search_batch) from a
+query dataset stored as .npy files, instead of building the vectors as Python lists in the locustfile.
+"""
+
+from __future__ import annotations
+
+from locust import events
+
+import itertools
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class VectorDataset:
+    """
+    Query vectors (and optionally the ids of their true nearest neighbours), memory-mapped from .npy files.
+
+    Use VectorDataset.load() to get an instance that is shared by all users in the process, so that each dataset is
+    only mapped once per worker. The users take turns reading batches from it, so that all the queries are used.
+    """
+
+    _loaded: dict[tuple[str, str | None], VectorDataset] = {}
+
+    def __init__(self, vectors: np.ndarray, ground_truth: np.ndarray | None = None):
+        """
+        :param vectors: 2d array of query vectors
+        :param ground_truth: 2d array with the ids of the nearest neighbours of each query vector, nearest first
+        """
+        if ground_truth is not None and len(ground_truth) != len(vectors):
+            raise ValueError(f"Ground truth has {len(ground_truth)} rows but there are {len(vectors)} query vectors")
+        self.vectors = vectors
+        self.ground_truth = ground_truth
+        self._offsets = itertools.count()
+
+    @classmethod
+    def load(cls, vectors_path: str, ground_truth_path: str | None = None) -> VectorDataset:
+        key = (vectors_path, ground_truth_path)
+        if key not in cls._loaded:
+            vectors = np.load(vectors_path, mmap_mode="r")
+            ground_truth = np.load(ground_truth_path, mmap_mode="r") if ground_truth_path else None
+            cls._loaded[key] = cls(vectors, ground_truth)
+        return cls._loaded[key]
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def next_batch(self, batch_size: int) -> tuple[np.ndarray, np.ndarray | None]:
+        """The next batch_size query vectors (wrapping around at the end) and their ground truth rows"""
+        start = next(self._offsets) * batch_size % len(self.vectors)
+        indices = np.arange(start, start + batch_size) % len(self.vectors)
+        ground_truth = self.ground_truth[indices] if self.ground_truth is not None else None
+        return self.vectors[indices], ground_truth
+
+
+def batch_recall(retrieved_ids: Sequence[Sequence], ground_truth: np.ndarray, k: int | None = None) -> np.ndarray:
+    """
+    Recall@k of each query in a batch, i.e. the fraction of the k true nearest neighbours that were retrieved.
+
+    :param retrieved_ids: The ids returned for each query (at most k are used)
+    :param ground_truth: 2d array with the ids of the true nearest neighbours of each query, nearest first
+    :param k: Number of neighbours to consider, defaults to the number of columns of the ground truth
+    """
+    ground_truth = np.asarray(ground_truth)
+    if k is None:
+        k = ground_truth.shape[1]
+    if ground_truth.shape[1] < k:
+        raise ValueError(f"Ground truth length is less than limit: {ground_truth.shape[1]} < {k}")
+    truth = ground_truth[:, :k]
+    if truth.dtype.kind not in "iuf":
+        # string (e.g. uuid) ids are compared as objects, so that ids aren't truncated to the ground truth's length
+        truth = truth.astype(object)
+    # queries can return fewer than k ids, so the retrieved ids are padded and the padding is masked out
+    retrieved = np.zeros((len(retrieved_ids), k), dtype=truth.dtype)
+    valid = np.zeros((len(retrieved_ids), k), dtype=bool)
+    for row, ids in enumerate(retrieved_ids):
+        ids = list(ids)[:k]
+        retrieved[row, : len(ids)] = ids
+        valid[row, : len(ids)] = True
+    hits = ((retrieved[:, :, np.newaxis] == truth[:, np.newaxis, :]).any(axis=2) & valid).sum(axis=1)
+    return hits / k
+
+
+def fire_recall_event(request_type: str, name: str, recall: float, response_length: int = 0, exception=None) -> None:
+    """Log a recall value (0-1) as a request, with the recall in percent as its response time"""
+    events.request.fire(
+        request_type=request_type,
+        name=name,
+        response_time=int(recall * 100),
+        response_length=response_length,
+        exception=exception,
+    )
@@ -9,8 +9,10 @@ from configargparse import Namespace
 from .dispatch import UsersDispatcher
 from .event import Events
 from .exception import RunnerAlreadyExistsError
+from .rpc import ClientTransport, ServerTransport
 from .runners import LocalRunner, MasterRunner, Runner, WorkerRunner
 from .shape import LoadTestShape
+from .shared_stats import SharedStats
 from .stats import RequestStats, StatsCSV
 from .user import User
 from .user.task import TaskHolder, TaskSet, filter_tasks_by_tags
@@ -135,26 +137,52 @@ class Environment:
         """
         return self._create_runner(LocalRunner)
 
-    def create_master_runner(self, master_bind_host="*", master_bind_port=5557) -> MasterRunner:
+    def create_master_runner(
+        self,
+        master_bind_host="*",
+        master_bind_port=5557,
+        master_ipc_path: str | None = None,
+        shared_stats: SharedStats | None = None,
+        server_class: type[ServerTransport] | None = None,
+    ) -> MasterRunner:
         """
         Create a :class:`MasterRunner <locust.runners.MasterRunner>` instance for this Environment
 
         :param master_bind_host: Interface/host that the master should use for incoming worker connections.
                                  Defaults to "*" which means all interfaces.
         :param master_bind_port: Port that the master should listen for incoming worker connections on
+        :param master_ipc_path: If set, the master will also listen on a Unix domain socket at this path
+                                (used for workers on the same machine, e.g. with --processes)
+        :param shared_stats: Shared memory segment that forked workers write their stats reports to
+        :param server_class: RPC transport (a :class:`ServerTransport <locust.rpc.ServerTransport>`) to use instead
+                             of ZeroMQ
         """
         return self._create_runner(
             MasterRunner,
             master_bind_host=master_bind_host,
             master_bind_port=master_bind_port,
+            master_ipc_path=master_ipc_path,
+            shared_stats=shared_stats,
+            server_class=server_class,
         )
 
-    def create_worker_runner(self, master_host: str, master_port: int) -> WorkerRunner:
+    def create_worker_runner(
+        self,
+        master_host: str,
+        master_port: int,
+        master_ipc_path: str | None = None,
+        shared_stats: SharedStats | None = None,
+        client_class: type[ClientTransport] | None = None,
+    ) -> WorkerRunner:
         """
         Create a :class:`WorkerRunner <locust.runners.WorkerRunner>` instance for this Environment
 
         :param master_host: Host/IP of a running master node
         :param master_port: Port on master node to connect to
+        :param master_ipc_path: If set, connect to the master's Unix domain socket at this path instead
+        :param shared_stats: Shared memory segment (with its slot set) to write stats reports to
+        :param client_class: RPC transport (a :class:`ClientTransport <locust.rpc.ClientTransport>`) to use instead
+                             of ZeroMQ
         """
         # Create a new RequestStats with use_response_times_cache set to False to save some memory
         # and CPU cycles, since the response_times_cache is not needed for Worker nodes
@@ -163,6 +191,9 @@ class Environment:
             WorkerRunner,
             master_host=master_host,
             master_port=master_port,
+            master_ipc_path=master_ipc_path,
+            shared_stats=shared_stats,
+            client_class=client_class,
         )
 
     def create_web_ui(
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import bisect
+import math
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import datetime, timezone
+
+from .util.date import format_utc_timestamp
+
+"""
+Resolutions (in seconds) and max number of points of the tiers in StatsHistory. Resolution 0 means every sample is
+kept. With the default HISTORY_STATS_INTERVAL_SEC of 5 seconds this keeps every sample for the last hour, one point per
+minute for the last day and one point per 10 minutes for the last 30 days.
+"""
+HISTORY_TIERS: list[tuple[int, int]] = [(0, 720), (60, 1440), (600, 4320)]
+
+
+class _Tier:
+    def __init__(self, resolution: int, max_points: int) -> None:
+        self.resolution = resolution
+        self.max_points = max_points
+        self.timestamps = array("d")
+        self.columns: dict[str, array] = {}
+        # the bucket that is currently being aggregated (only used if resolution > 0)
+        self.pending_bucket: int | None = None
+        self.pending: dict[str, float] = {}
+        self.pending_count = 0
+
+    def add(self, timestamp: float, values: dict[str, float]) -> None:
+        if not self.resolution:
+            self._append(timestamp, values)
+            return
+        bucket = int(timestamp // self.resolution)
+        if self.pending_bucket is not None and bucket != self.pending_bucket:
+            self._append(self.pending_bucket * self.resolution, self._pending_values())
+            self.pending = {}
+            self.pending_count = 0
+        self.pending_bucket = bucket
+        self.pending_count += 1
+        for key, value in values.items():
+            if key in self.pending and _is_percentile(key):
+                self.pending[key] = max(self.pending[key], value)
+            else:
+                self.pending[key] = self.pending.get(key, 0) + value
+
+    def pending_point(self) -> tuple[float, dict[str, float]] | None:
+        if not self.pending_count:
+            return None
+        return self.pending_bucket * self.resolution, self._pending_values()  # type: ignore[operator]
+
+    def _pending_values(self) -> dict[str, float]:
+        return {
+            key: value if _is_percentile(key) else round(value / self.pending_count, 2)
+            for key, value in self.pending.items()
+        }
+
+    def _append(self, timestamp: float, values: dict[str, float]) -> None:
+        for key in values.keys() - self.columns.keys():
+            self.columns[key] = array("d", [math.nan] * len(self.timestamps))
+        self.timestamps.append(timestamp)
+        for key, column in self.columns.items():
+            column.append(values.get(key, math.nan))
+        if len(self.timestamps) > self.max_points:
+            del self.timestamps[0]
+            for column in self.columns.values():
+                del column[0]
+
+    def point(self, i: int) -> tuple[float, dict[str, float]]:
+        return self.timestamps[i], {key: column[i] for key, column in self.columns.items()}
+
+
+def _is_percentile(key: str) -> bool:
+    # the max of percentiles is a better approximation than the mean, as it doesn't hide spikes
+    return key.startswith("response_time_percentile")
+
+
+def _to_dict(timestamp: float, values: dict[str, float]) -> dict:
+    time = format_utc_timestamp(timestamp)
+    return {
+        **{key: [time, 0 if math.isnan(value) else value] for key, value in values.items()},
+        "time": time,
+    }
+
+
+def _from_dict(point: dict) -> tuple[float, dict[str, float]]:
+    timestamp = datetime.strptime(point["time"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    return timestamp, {key: value[1] for key, value in point.items() if key != "time"}
+
+
+class StatsHistory:
+    """
+    Bounded history of the (aggregated) stats, used for the charts in the web UI and HTML report.
+
+    Every sample is added to each of the tiers (see HISTORY_TIERS), which are columnar ring buffers of typed arrays.
+    Tiers with a resolution aggregate the samples into one point per period (the mean of most values, and the max
+    of percentiles). When reading, the finest tier is used for the period that it covers, and coarser tiers for
+    anything before that.
+
+    Like the list that the history used to be, it can be indexed, sliced, iterated and appended to, with the points
+    in the format of to_list(). Reading a point only converts that point.
+    """
+
+    def __init__(self, tiers: list[tuple[int, int]] | None = None) -> None:
+        self._tier_config = tiers or HISTORY_TIERS
+        self.clear()
+
+    def clear(self) -> None:
+        self.tiers = [_Tier(resolution, max_points) for resolution, max_points in self._tier_config]
+        self.last_timestamp: float | None = None
+
+    def append(self, timestamp: float | dict, values: dict[str, float] | None = None) -> None:
+        """
+        Add a sample. Values are keyed by column name, e.g. current_rps. A point in the format of to_list() is
+        accepted too.
+        """
+        if isinstance(timestamp, dict):
+            timestamp, values = _from_dict(timestamp)
+        assert values is not None
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+        self.last_timestamp = timestamp
+
+    def points_since(self, timestamp: float | None) -> list[tuple[float, dict[str, float]]]:
+        """Samples (as added, from the finest tier) newer than timestamp, or all of them if timestamp is None"""
+        tier = self.tiers[0]
+        start = 0 if timestamp is None else bisect.bisect_right(tier.timestamps, timestamp)
+        return [tier.point(i) for i in range(start, len(tier.timestamps))]
+
+    def _segments(self, finest: int) -> list[tuple[_Tier, int]]:
+        """Tiers (from coarsest to finest) and the number of their points to include when using finest as the finest"""
+        segments: list[tuple[_Tier, int]] = []
+        boundary = math.inf
+        for tier in self.tiers[finest:]:
+            count = bisect.bisect_left(tier.timestamps, boundary)
+            segments.append((tier, count))
+            if len(tier.timestamps):
+                boundary = min(boundary, tier.timestamps[0])
+        segments.reverse()
+        return segments
+
+    def _count(self, finest: int) -> int:
+        return sum(count for _, count in self._segments(finest)) + (
+            self.tiers[finest].pending_point() is not None and 1
+        )
+
+    def to_list(self, max_points: int | None = None) -> list[dict]:
+        """
+        Return the history in the same format as the history of the web UI charts (a dict per point), using the finest
+        resolution that doesn't exceed max_points. If even the coarsest resolution has too many points, every n:th
+        point is returned.
+        """
+        if self.last_timestamp is None:
+            return []
+        finest = 0
+        while max_points is not None and finest < len(self.tiers) - 1 and self._count(finest) > max_points:
+            finest += 1
+
+        points = [_to_dict(*tier.point(i)) for tier, count in self._segments(finest) for i in range(count)]
+        if pending := self.tiers[finest].pending_point():
+            points.append(_to_dict(*pending))
+        if max_points and len(points) > max_points:
+            points = points[:: math.ceil(len(points) / max_points)]
+        return points
+
+    def __len__(self) -> int:
+        if self.last_timestamp is None:
+            return 0
+        return self._count(0)
+
+    def _point(self, index: int) -> dict:
+        for tier, count in self._segments(0):
+            if index < count:
+                return _to_dict(*tier.point(index))
+            index -= count
+        return _to_dict(*self.tiers[0].pending_point())  # type: ignore[misc]
+
+    def __iter__(self) -> Iterator[dict]:
+        if self.last_timestamp is None:
+            return
+        for tier, count in self._segments(0):
+            for i in range(count):
+                yield _to_dict(*tier.point(i))
+        if pending := self.tiers[0].pending_point():
+            yield _to_dict(*pending)
+
+    def __getitem__(self, index: int | slice):
+        length = len(self)
+        if isinstance(index, slice):
+            return [self._point(i) for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("history index out of range")
+        return self._point(index)
+
+
+class _RingBuffer:
+    def __init__(self, columns: list[str], max_points: int) -> None:
+        self.max_points = max_points
+        self.timestamps = array("d", bytes(8 * max_points))
+        self.columns = {key: array("d", bytes(8 * max_points)) for key in columns}
+        self.size = 0
+        self.next = 0
+        self.last_active = 0.0
+
+    def add(self, timestamp: float, values: dict[str, float]) -> None:
+        i = self.next
+        self.timestamps[i] = timestamp
+        for key, column in self.columns.items():
+            column[i] = values.get(key, 0)
+        self.next = (i + 1) % self.max_points
+        self.size = min(self.size + 1, self.max_points)
+
+    def to_dict(self) -> dict[str, list]:
+        start = self.next - self.size
+        indexes = [i % self.max_points for i in range(start, start + self.size)]
+        times = [format_utc_timestamp(self.timestamps[i]) for i in indexes]
+        return {
+            "time": times,
+            **{key: [[t, column[i]] for t, i in zip(times, indexes)] for key, column in self.columns.items()},
+        }
+
+
+class EndpointHistory:
+    """
+    Per endpoint (stats entry) history, with a fixed size ring buffer of max_points for each endpoint.
+
+    At most max_entries endpoints are tracked. When a new endpoint becomes active and the limit has been reached,
+    the endpoint that has been inactive for the longest time is dropped (if all tracked endpoints are still active,
+    the new endpoint isn't tracked).
+    """
+
+    def __init__(self, max_entries: int, max_points: int) -> None:
+        self.max_entries = max_entries
+        self.max_points = max_points
+        self.series: OrderedDict[tuple[str, str], _RingBuffer] = OrderedDict()
+        """Ring buffers by (name, method), from least to most recently active"""
+
+    def append(self, timestamp: float, key: tuple[str, str], values: dict[str, float], active: bool = True) -> bool:
+        """
+        Add a sample for an endpoint. Inactive endpoints are only recorded if they are already tracked.
+        Returns whether the sample was recorded.
+        """
+        series = self.series.get(key)
+        if series is None:
+            if not active or not self.max_entries:
+                return False
+            if len(self.series) >= self.max_entries:
+                least_recent = next(iter(self.series))
+                if self.series[least_recent].last_active >= timestamp:
+                    return False
+                del self.series[least_recent]
+            series = self.series[key] = _RingBuffer(list(values), self.max_points)
+        if active:
+            series.last_active = timestamp
+            self.series.move_to_end(key)
+        series.add(timestamp, values)
+        return True
+
+    def get(self, name: str, method: str) -> dict | None:
+        series = self.series.get((name, method))
+        return {"name": name, "method": method, **series.to_dict()} if series else None
+
+    def to_list(self) -> list[dict]:
+        """History of all tracked endpoints, sorted by name and method"""
+        return [self.get(name, method) for name, method in sorted(self.series)]  # type: ignore[misc]
+
+    def clear(self) -> None:
+        self.series.clear()
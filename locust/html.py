@@ -1,8 +1,12 @@
 import os
-from itertools import chain
+from collections.abc import Iterator
+from itertools import chain, islice
+from typing import TextIO
 
+import gevent
 from jinja2 import Environment as JinjaEnvironment
 from jinja2 import FileSystemLoader
+from jinja2.utils import htmlsafe_json_dumps
 
 from . import stats
 from .runners import STATE_STOPPED, STATE_STOPPING, MasterRunner
@@ -11,6 +15,10 @@ from .util.date import format_duration, format_utc_timestamp
 
 PERCENTILES_FOR_HTML_REPORT = [0.50, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0]
 DEFAULT_BUILD_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "webui", "dist")
+"""Number of stats entries serialized at a time when generating the HTML report"""
+HTML_REPORT_CHUNK_SIZE = 500
+
+_TEMPLATE_ARGS_PLACEHOLDER = "__locust_report_template_args__"
 
 
 def process_html_filename(options) -> None:
@@ -30,11 +38,38 @@ def render_template_from(file, build_path=DEFAULT_BUILD_PATH, **kwargs):
     return template.render(**kwargs)
 
 
-def get_html_report(
+def _json_chunks(value, chunk_size):
+    """
+    Serialize value like Jinja's tojson filter, but yield the items of iterators (any non list/tuple/dict
+    iterable) chunk_size at a time, so that huge arrays are never built or serialized in one go
+    """
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield f"{', ' if i else ''}{htmlsafe_json_dumps(key)}: "
+            yield from _json_chunks(item, chunk_size)
+        yield "}"
+    elif isinstance(value, Iterator):
+        yield "["
+        separator = ""
+        while chunk := list(islice(value, chunk_size)):
+            yield separator + htmlsafe_json_dumps(chunk)[1:-1]
+            separator = ", "
+        yield "]"
+    else:
+        yield htmlsafe_json_dumps(value)
+
+
+def generate_html_report(
     environment,
     show_download_link=True,
     theme="",
-):
+) -> Iterator[str]:
+    """
+    Render the HTML report as a sequence of strings. The stats are serialized HTML_REPORT_CHUNK_SIZE entries at a
+    time, yielding to other greenlets in between, so that reports for runs with a huge number of entries don't
+    block the runner or require the entire report to be held in memory.
+    """
     request_stats = environment.runner.stats
 
     start_time = format_utc_timestamp(request_stats.start_time)
@@ -59,9 +94,10 @@ def get_html_report(
         {**exc, "nodes": ", ".join(exc["nodes"])} for exc in environment.runner.exceptions.values()
     ]
 
-    if request_stats.history and request_stats.history[-1]["time"] < end_time:
-        stats.update_stats_history(environment.runner, end_time)
-    history = request_stats.history
+    last_history_timestamp = request_stats.history.last_timestamp
+    if last_history_timestamp is not None and int(last_history_timestamp) < int(end_ts):
+        stats.update_stats_history(environment.runner, end_ts)
+    history = request_stats.history.to_list(stats.HISTORY_CHART_MAX_POINTS)
 
     is_distributed = isinstance(environment.runner, MasterRunner)
     user_spawned = (
@@ -76,34 +112,64 @@ def get_html_report(
         "total": get_ratio(environment.user_classes, user_spawned, True),
     }
 
-    return render_template_from(
+    template_args = {
+        "is_report": True,
+        # generators, so that the entries are converted to dicts one chunk at a time
+        "requests_statistics": (stat.to_dict() for stat in requests_statistics),
+        "failures_statistics": (stat.to_dict() for stat in failures_statistics),
+        "exceptions_statistics": iter(exceptions_statistics),
+        "response_time_statistics": (
+            {
+                "name": stat.name,
+                "method": stat.method or "",
+                **dict(
+                    zip(
+                        map(str, PERCENTILES_FOR_HTML_REPORT),
+                        stat.get_response_time_percentiles(PERCENTILES_FOR_HTML_REPORT),
+                    )
+                ),
+            }
+            for stat in requests_statistics
+        ),
+        "start_time": start_time,
+        "end_time": end_time,
+        "duration": format_duration(request_stats.start_time, end_ts),
+        "host": str(host),
+        "history": iter(history),
+        "endpoint_history": iter(request_stats.endpoint_history.to_list()),
+        "show_download_link": show_download_link,
+        "locustfile": str(environment.locustfile),
+        "tasks": task_data,
+        "percentiles_to_chart": stats.PERCENTILES_TO_CHART,
+        "profile": str(environment.profile) if environment.profile else None,
+    }
+
+    # render the page around a placeholder, which is then replaced by the streamed template args
+    page = render_template_from(
         "report.html",
-        template_args={
-            "is_report": True,
-            "requests_statistics": [stat.to_dict() for stat in requests_statistics],
-            "failures_statistics": [stat.to_dict() for stat in failures_statistics],
-            "exceptions_statistics": [stat for stat in exceptions_statistics],
-            "response_time_statistics": [
-                {
-                    "name": stat.name,
-                    "method": stat.method or "",
-                    **{
-                        str(percentile): stat.get_response_time_percentile(percentile)
-                        for percentile in PERCENTILES_FOR_HTML_REPORT
-                    },
-                }
-                for stat in requests_statistics
-            ],
-            "start_time": start_time,
-            "end_time": end_time,
-            "duration": format_duration(request_stats.start_time, end_ts),
-            "host": str(host),
-            "history": history,
-            "show_download_link": show_download_link,
-            "locustfile": str(environment.locustfile),
-            "tasks": task_data,
-            "percentiles_to_chart": stats.PERCENTILES_TO_CHART,
-            "profile": str(environment.profile) if environment.profile else None,
-        },
+        template_args=_TEMPLATE_ARGS_PLACEHOLDER,
         theme="dark" if theme == "dark" else "light",
     )
+    head, tail = page.split(htmlsafe_json_dumps(_TEMPLATE_ARGS_PLACEHOLDER), 1)
+
+    def generate():
+        yield head
+        for chunk in _json_chunks(template_args, HTML_REPORT_CHUNK_SIZE):
+            yield chunk
+            gevent.sleep(0)
+        yield tail
+
+    return generate()
+
+
+def write_html_report(environment, file: TextIO, show_download_link=True, theme="") -> None:
+    """Stream the HTML report to a file-like object"""
+    file.writelines(generate_html_report(environment, show_download_link=show_download_link, theme=theme))
+
+
+def get_html_report(
+    environment,
+    show_download_link=True,
+    theme="",
+) -> str:
+    return "".join(generate_html_report(environment, show_download_link=show_download_link, theme=theme))
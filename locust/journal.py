@@ -0,0 +1,349 @@
+"""
+Run journal, a compact binary record of a test run that the HTML report, JSON output and CSV files can be rebuilt from
+after the run (using ``locust-report <journal>``), even if the master process crashed.
+
+The journal starts with a magic header, followed by records. Each record is a zlib compressed msgpack encoded
+``[type, data]`` list, prefixed with its length. Records are:
+
+* ``meta``: host, locustfile etc. Always the first record.
+* ``snapshot``: the stats entries (and total), errors and exceptions that changed since the previous snapshot, and
+  new history samples. The counters of entries are cumulative, but their ``response_times`` only contain what was
+  added since the previous snapshot of the entry, and ``num_reqs_per_sec``/``num_fail_per_sec`` only the seconds
+  from the last second of the previous snapshot onwards, so that the journal grows with the length of the run,
+  rather than its square.
+* ``reset``: the stats were reset, so everything before it is discarded.
+* ``end``: the run finished and the journal was closed properly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, NoReturn
+
+import gevent
+import msgpack
+
+from . import __version__, stats
+from .env import Environment
+from .html import write_html_report
+from .log import setup_logging
+from .stats import StatsCSV, StatsEntry, StatsError, diff_response_time_dicts
+
+if TYPE_CHECKING:
+    from .stats import StatsEntryDict, StatsErrorDict
+
+logger = logging.getLogger(__name__)
+
+"""Interval (in seconds) for how frequently snapshots are written to the journal"""
+JOURNAL_INTERVAL_SEC = 5
+
+MAGIC = b"LOCUSTJ\x01"
+
+_record_length = struct.Struct(">I")
+
+
+class _WrittenEntry:
+    """What has been written of a stats entry so far"""
+
+    __slots__ = ("num_requests", "num_failures", "response_times", "last_second")
+
+    def __init__(self) -> None:
+        self.num_requests = 0
+        self.num_failures = 0
+        self.response_times: dict[int, int] = {}
+        self.last_second = 0
+
+
+def _seconds_since(per_sec: dict[int, int], second: int) -> dict[int, int]:
+    """The seconds from second onwards (the last written second may have had more requests since)"""
+    # seconds are (almost always) added in order, so there is no need to look at the older ones
+    seconds = {}
+    for key in reversed(per_sec):
+        if key < second:
+            break
+        seconds[key] = per_sec[key]
+    return seconds
+
+
+class JournalWriter:
+    """
+    Writes a journal of the (master's or local runner's) stats to path, with a snapshot every interval seconds
+    when running journal_writer in a greenlet. Call close() at the end of the run to write the final snapshot.
+    """
+
+    def __init__(self, environment: Environment, path: str, interval: float = JOURNAL_INTERVAL_SEC) -> None:
+        self.environment = environment
+        self.path = path
+        self.interval = interval
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self._start_time = environment.stats.start_time
+        # entries (and the total, keyed by None) as last written, occurrences of errors and counts of exceptions
+        self._written_entries: dict[tuple[str, str] | None, _WrittenEntry] = {}
+        self._written_errors: dict[str, int] = {}
+        self._written_exceptions: dict[int, int] = {}
+        self._history_timestamp: float | None = None
+        self._write(
+            "meta",
+            {
+                "locust_version": __version__,
+                "host": environment.host,
+                "locustfile": environment.locustfile,
+                "profile": environment.profile,
+                "created": time.time(),
+            },
+        )
+
+    def journal_writer(self) -> NoReturn:
+        """Writer loop that should run in a greenlet"""
+        while True:
+            gevent.sleep(self.interval)
+            self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        request_stats = self.environment.stats
+        if request_stats.start_time != self._start_time:
+            self._write("reset", {"start_time": request_stats.start_time})
+            self._start_time = request_stats.start_time
+            self._written_entries.clear()
+            self._written_errors.clear()
+            self._history_timestamp = None
+
+        entries = []
+        for key, entry in request_stats.entries.items():
+            if (delta := self._entry_delta(key, entry)) is not None:
+                entries.append(delta)
+        errors = {}
+        for key, error in request_stats.errors.items():
+            if self._written_errors.get(key) != error.occurrences:
+                self._written_errors[key] = error.occurrences
+                errors[key] = error.serialize()
+        exceptions = []
+        if self.environment.runner is not None:
+            for key, exc in self.environment.runner.exceptions.items():
+                if self._written_exceptions.get(key) != exc["count"]:
+                    self._written_exceptions[key] = exc["count"]
+                    exceptions.append([key, {**exc, "nodes": sorted(exc["nodes"])}])
+        history = request_stats.history.points_since(self._history_timestamp)
+        if history:
+            self._history_timestamp = history[-1][0]
+
+        self._write(
+            "snapshot",
+            {
+                "total": self._entry_delta(None, request_stats.total),
+                "entries": entries,
+                "errors": errors,
+                "exceptions": exceptions,
+                "history": history,
+            },
+        )
+        self.file.flush()
+
+    def _entry_delta(self, key: tuple[str, str] | None, entry: StatsEntry) -> StatsEntryDict | None:
+        """The entry as it should be written in the snapshot, or None if it hasn't changed since the last one"""
+        written = self._written_entries.get(key)
+        if written is None:
+            written = self._written_entries[key] = _WrittenEntry()
+        elif (written.num_requests, written.num_failures) == (entry.num_requests, entry.num_failures):
+            return None
+        data = entry.serialize()
+        data["response_times"] = diff_response_time_dicts(entry.response_times, written.response_times)
+        data["num_reqs_per_sec"] = _seconds_since(entry.num_reqs_per_sec, written.last_second)
+        data["num_fail_per_sec"] = _seconds_since(entry.num_fail_per_sec, written.last_second)
+        written.num_requests = entry.num_requests
+        written.num_failures = entry.num_failures
+        written.response_times = entry.response_times.copy()
+        written.last_second = max(data["num_reqs_per_sec"], default=written.last_second)
+        return data
+
+    def close(self) -> None:
+        """Write a final snapshot and close the journal. Safe to call multiple times."""
+        if self.file.closed:
+            return
+        self.write_snapshot()
+        self._write("end", {"time": time.time()})
+        self.file.close()
+
+    def _write(self, record_type: str, data: Any) -> None:
+        record = zlib.compress(msgpack.dumps([record_type, data]), 1)
+        self.file.write(_record_length.pack(len(record)))
+        self.file.write(record)
+
+
+def _apply_entry_delta(entry: StatsEntryDict | None, delta: StatsEntryDict) -> StatsEntryDict:
+    if entry is None:
+        return delta
+    response_times = entry["response_times"]
+    for response_time, count in delta["response_times"].items():
+        response_times[response_time] = response_times.get(response_time, 0) + count
+    entry["num_reqs_per_sec"].update(delta["num_reqs_per_sec"])
+    entry["num_fail_per_sec"].update(delta["num_fail_per_sec"])
+    return {
+        **delta,
+        "response_times": response_times,
+        "num_reqs_per_sec": entry["num_reqs_per_sec"],
+        "num_fail_per_sec": entry["num_fail_per_sec"],
+    }
+
+
+class Journal:
+    """The contents of a journal, as read by read_journal"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.meta: dict[str, Any] = {}
+        self.total: StatsEntryDict | None = None
+        self.entries: dict[tuple[str, str], StatsEntryDict] = {}
+        self.errors: dict[str, StatsErrorDict] = {}
+        self.exceptions: dict[int, dict] = {}
+        self.history: list[tuple[float, dict[str, float]]] = []
+        self.complete = False
+        """False if the run was interrupted before the journal was closed (e.g. if the master crashed)"""
+
+    @property
+    def label(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    def _apply(self, record_type: str, data: Any) -> None:
+        if record_type == "meta":
+            self.meta = data
+        elif record_type == "reset":
+            self.total = None
+            self.entries.clear()
+            self.errors.clear()
+            self.history.clear()
+        elif record_type == "snapshot":
+            if data["total"] is not None:
+                self.total = _apply_entry_delta(self.total, data["total"])
+            for entry in data["entries"]:
+                key = (entry["name"], entry["method"])
+                self.entries[key] = _apply_entry_delta(self.entries.get(key), entry)
+            self.errors.update(data["errors"])
+            for key, exc in data["exceptions"]:
+                self.exceptions[key] = exc
+            self.history.extend((timestamp, values) for timestamp, values in data["history"])
+        elif record_type == "end":
+            self.complete = True
+
+
+def read_journal(path: str) -> Journal:
+    """
+    Read a journal written by JournalWriter. A truncated last record (if the process writing it died) is ignored.
+    """
+    journal = Journal(path)
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Locust journal")
+        while len(header := file.read(_record_length.size)) == _record_length.size:
+            (length,) = _record_length.unpack(header)
+            record = file.read(length)
+            if len(record) < length:
+                break
+            journal._apply(*msgpack.loads(zlib.decompress(record), raw=False, strict_map_key=False))
+    if not journal.complete:
+        logger.warning(f"Journal {path} is incomplete, the run was probably interrupted")
+    return journal
+
+
+def load_journals(environment: Environment, journals: list[Journal], compare: bool = False) -> None:
+    """
+    Add the stats, errors, exceptions and history of the journals to environment.stats and environment.runner.
+    The journals are merged (like the master merges worker reports), unless compare is set, in which case the names
+    of entries and errors are prefixed with the label (file name) of their journal to keep them apart.
+    """
+    request_stats = environment.stats
+    exceptions = environment.runner.exceptions if environment.runner is not None else {}
+    history = []
+    for journal in journals:
+        prefix = f"[{journal.label}] " if compare else ""
+        for data in journal.entries.values():
+            entry = StatsEntry.unserialize({**data, "name": prefix + data["name"]}, request_stats)
+            request_stats.entries[(entry.name, entry.method)].extend(entry)
+        if journal.total is not None:
+            request_stats.total.extend(StatsEntry.unserialize(journal.total, request_stats))
+        if compare:
+            errors: dict[str, StatsErrorDict] = {}
+            for error in journal.errors.values():
+                error = {**error, "name": prefix + error["name"]}
+                errors[StatsError.create_key(error["method"], error["name"], error["error"])] = error
+            request_stats.extend_errors(errors)
+        else:
+            request_stats.extend_errors(journal.errors)
+        for key, exc in journal.exceptions.items():
+            row = exceptions.setdefault(
+                key, {"count": 0, "msg": exc["msg"], "traceback": exc["traceback"], "nodes": set()}
+            )
+            row["count"] += exc["count"]
+            row["nodes"].update(exc["nodes"])
+        history.extend(journal.history)
+
+    for timestamp, values in sorted(history, key=lambda point: point[0]):
+        request_stats.history.append(timestamp, values)
+
+
+def main(args: list[str] | None = None) -> int:
+    """Entry point of ``locust-report``"""
+    parser = argparse.ArgumentParser(
+        prog="locust-report",
+        description="Build the HTML report, JSON output and/or CSV files of one or more runs from their journals "
+        "(recorded using --journal). Prints the stats to the console if no output is specified.",
+    )
+    parser.add_argument("journals", nargs="+", metavar="<journal>", help="Journal file(s) to build the report from")
+    parser.add_argument("--html", metavar="<filename>", dest="html_file", help="Store HTML report to file path")
+    parser.add_argument("--json-file", metavar="<filename>", dest="json_file", help="Store JSON stats to file path")
+    parser.add_argument(
+        "--csv", metavar="<filename>", dest="csv_prefix", help="Store request stats to files in CSV format"
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Keep the entries of each journal apart (prefixing their names with the journal's file name) instead "
+        "of merging them",
+    )
+    options = parser.parse_args(args)
+
+    setup_logging("WARNING")
+    try:
+        journals = [read_journal(path) for path in options.journals]
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    def common(key: str) -> Any:
+        values = {journal.meta.get(key) for journal in journals}
+        return values.pop() if len(values) == 1 else None
+
+    environment = Environment(host=common("host"), locustfile=common("locustfile"), profile=common("profile"))
+    runner = environment.create_local_runner()
+    load_journals(environment, journals, compare=options.compare)
+
+    if options.html_file:
+        with open(options.html_file, "w", encoding="utf-8") as file:
+            write_html_report(environment, file, show_download_link=False)
+    if options.csv_prefix:
+        stats_csv = StatsCSV(environment, stats.PERCENTILES_TO_REPORT)
+        for suffix, write_csv in (
+            ("stats", stats_csv.requests_csv),
+            ("failures", stats_csv.failures_csv),
+            ("exceptions", stats_csv.exceptions_csv),
+        ):
+            with open(f"{options.csv_prefix}_{suffix}.csv", "w") as file:
+                write_csv(csv.writer(file))
+    if options.json_file:
+        # serializing the stats resets them, so this must be done last
+        stats.save_stats_json(environment.stats, options.json_file)
+    if not (options.html_file or options.csv_prefix or options.json_file):
+        stats.print_stats(environment.stats, current=False)
+        stats.print_percentile_stats(environment.stats)
+        stats.print_error_report(environment.stats)
+
+    runner.quit()
+    return 0
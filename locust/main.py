@@ -12,6 +12,7 @@ import logging
 import os
 import signal
 import sys
+import tempfile
 import time
 import traceback
 import webbrowser
@@ -19,16 +20,17 @@ from typing import TYPE_CHECKING
 
 import gevent
 
-from . import log, stats
+from . import journal, log, stats
 from .argument_parser import (
     get_locustfiles_locally,
     get_parser,
     parse_locustfile_option,
 )
 from .env import Environment
-from .html import get_html_report, process_html_filename
+from .html import process_html_filename, write_html_report
 from .input_events import input_listener
 from .log import greenlet_exception_logger, setup_logging
+from .shared_stats import SharedStats
 from .user.inspectuser import print_task_ratio, print_task_ratio_json
 from .util.load_locustfile import load_locustfile, load_locustfile_pytest
 
@@ -167,6 +169,12 @@ def main():
     if options.stats_history_enabled and (options.csv_prefix is None):
         parser.error("'--csv-full-history' requires '--csv'.")
 
+    if options.csv_summary_at_end and (options.csv_prefix is None):
+        parser.error("'--csv-summary-at-end' requires '--csv'.")
+
+    if options.otel_trace_sample_rate is not None and not 0 <= options.otel_trace_sample_rate <= 1:
+        parser.error("'--otel-trace-sample-rate' must be between 0 and 1.")
+
     stats.validate_stats_configuration()
 
     if options.headful:
@@ -183,10 +191,16 @@ def main():
     start_message = f"Starting Locust {version}"
 
     if options.otel:
-        if setup_opentelemetry(options.locustfile, options.profile):
+        if setup_opentelemetry(
+            options.locustfile,
+            options.profile,
+            aggregated_metrics=options.otel_aggregated_metrics,
+            trace_sample_rate=options.otel_trace_sample_rate,
+        ):
             start_message += ", OpenTelemetry enabled"
 
     children = []
+    shared_stats = None
     logger = logging.getLogger(__name__)
 
     logger.info(start_message)
@@ -212,19 +226,30 @@ def main():
         gc.collect()  # avoid freezing garbage
         if hasattr(gc, "freeze"):
             gc.freeze()  # move all objects to perm gen so ref counts dont get updated
-        for _ in range(options.processes):
+        if not options.worker and not options.master_ipc_path:
+            # the parent will be the master, so let children talk to it over a unix socket instead of tcp loopback
+            options.master_ipc_path = os.path.join(tempfile.gettempdir(), f"locust-{os.getpid()}.sock")
+        if options.shared_memory_stats:
+            if options.worker:
+                sys.stderr.write("--shared-memory-stats cannot be combined with --worker\n")
+                sys.exit(1)
+            shared_stats = SharedStats(options.processes)
+        for worker_slot in range(options.processes):
             if child_pid := gevent.fork():
                 children.append(child_pid)
                 logging.debug(f"Started child worker with pid #{child_pid}")
             else:
                 # child is always a worker, even when it wasn't set on command line
                 options.worker = True
+                if shared_stats:
+                    shared_stats.slot = worker_slot
                 # remove options that dont make sense on worker
                 options.run_time = None
                 options.autostart = None
                 options.csv_prefix = None
                 options.stats_history_enabled = False
                 options.html_file = None
+                options.journal_file = None
                 options.print_stats = None
                 break
         else:
@@ -291,8 +316,15 @@ def main():
                     # otherwise the terminal might look weird.
                     time.sleep(0.1)
 
+                if shared_stats:
+                    # atexit handlers run in reverse order, so this runs after kill_workers
+                    atexit.register(shared_stats.unlink)
                 atexit.register(kill_workers, children)
 
+    elif options.shared_memory_stats:
+        sys.stderr.write("--shared-memory-stats can only be used together with --processes\n")
+        sys.exit(1)
+
     greenlet_exception_handler = greenlet_exception_logger(logger)
 
     if options.list_commands:
@@ -407,13 +439,18 @@ See https://github.com/locustio/locust/wiki/Installation#increasing-maximum-numb
         runner = environment.create_master_runner(
             master_bind_host=options.master_bind_host,
             master_bind_port=options.master_bind_port,
+            master_ipc_path=options.master_ipc_path,
+            shared_stats=shared_stats,
         )
     elif options.worker:
         try:
-            runner = environment.create_worker_runner(options.master_host, options.master_port)
-            logger.debug(
-                "Connected to locust master: %s:%s%s", options.master_host, options.master_port, options.web_base_path
+            runner = environment.create_worker_runner(
+                options.master_host,
+                options.master_port,
+                master_ipc_path=options.master_ipc_path,
+                shared_stats=shared_stats,
             )
+            logger.debug("Connected to locust master: %s", runner.client.endpoint)
         except OSError as e:
             logger.error("Failed to connect to the Locust master: %s", e)
             sys.exit(-1)
@@ -433,7 +470,11 @@ See https://github.com/locustio/locust/wiki/Installation#increasing-maximum-numb
         if not os.path.exists(base_csv_dir) and len(base_csv_dir) != 0:
             os.makedirs(base_csv_dir)
         stats_csv_writer = stats.StatsCSVFileWriter(
-            environment, stats.PERCENTILES_TO_REPORT, options.csv_prefix, options.stats_history_enabled
+            environment,
+            stats.PERCENTILES_TO_REPORT,
+            options.csv_prefix,
+            options.stats_history_enabled,
+            options.csv_summary_at_end,
         )
     else:
         stats_csv_writer = stats.StatsCSV(environment, stats.PERCENTILES_TO_REPORT)
@@ -582,6 +623,11 @@ See https://github.com/locustio/locust/wiki/Installation#increasing-maximum-numb
     if options.csv_prefix:
         gevent.spawn(stats_csv_writer.stats_writer).link_exception(greenlet_exception_handler)
 
+    journal_writer = None
+    if options.journal_file and not options.worker:
+        journal_writer = journal.JournalWriter(environment, options.journal_file)
+        gevent.spawn(journal_writer.journal_writer).link_exception(greenlet_exception_handler)
+
     if options.headless:
         start_automatic_run()
 
@@ -651,6 +697,8 @@ See https://github.com/locustio/locust/wiki/Installation#increasing-maximum-numb
         logger.debug("Cleaning up runner...")
         if runner is not None:
             runner.quit()
+        if journal_writer is not None:
+            journal_writer.close()
         if options.json:
             stats.print_stats_json(runner.stats)
         if options.json_file:
@@ -670,11 +718,10 @@ See https://github.com/locustio/locust/wiki/Installation#increasing-maximum-numb
         shutdown()
 
     def save_html_report():
-        html_report = get_html_report(environment, show_download_link=False)
         process_html_filename(options)
         logger.debug("Writing html report to file: %s", options.html_file)
         with open(options.html_file, "w", encoding="utf-8") as file:
-            file.write(html_report)
+            write_html_report(environment, file, show_download_link=False)
 
     gevent.signal_handler(signal.SIGTERM, sig_term_handler)
 
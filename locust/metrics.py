@@ -0,0 +1,122 @@
+"""
+Rendering of the stats in the OpenMetrics (Prometheus) text format, served by the web UI at /metrics.
+
+Everything is derived from the already aggregated RequestStats (the response times are bucketed by StatsEntry.log
+anyway), so there is no cost per request, only per render.
+"""
+
+from __future__ import annotations
+
+import bisect
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+from .runners import MasterRunner
+
+if TYPE_CHECKING:
+    from .env import Environment
+    from .stats import StatsEntry
+
+"""Upper bounds (in seconds) of the buckets of the request duration histograms"""
+METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0]
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class _MetricsWriter:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def family(self, name: str, metric_type: str, help: str, unit: str = "") -> None:
+        self.lines.append(f"# TYPE {name} {metric_type}")
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help}")
+
+    def sample(self, name: str, value: float, labels: str = "") -> None:
+        self.lines.append(f"{name}{labels} {_number(value)}")
+
+    def text(self) -> str:
+        return "\n".join([*self.lines, "# EOF", ""])
+
+
+def bucket_counts(entry: StatsEntry, buckets: list[float] = METRICS_BUCKETS) -> list[int]:
+    """Cumulative number of requests (with a response time) of the entry within each of the bucket bounds"""
+    bounds_ms = [bound * 1000 for bound in buckets]
+    counts = [0] * len(bounds_ms)
+    for response_time, count in entry.response_times.items():
+        i = bisect.bisect_left(bounds_ms, response_time)
+        if i < len(counts):
+            counts[i] += count
+    return list(accumulate(counts))
+
+
+def render_metrics(environment: Environment) -> str:
+    """The current stats, users and CPU/memory usage (of the workers, if running distributed) as OpenMetrics text"""
+    runner = environment.runner
+    writer = _MetricsWriter()
+    if runner is None:
+        return writer.text()
+    request_stats = runner.stats
+    entries = [(entry, _labels(method=entry.method, name=entry.name)) for entry in request_stats.entries.values()]
+
+    writer.family("locust_requests", "counter", "Number of requests")
+    for entry, labels in entries:
+        writer.sample("locust_requests_total", entry.num_requests, labels)
+    writer.family("locust_failures", "counter", "Number of failed requests")
+    for entry, labels in entries:
+        writer.sample("locust_failures_total", entry.num_failures, labels)
+    writer.family("locust_response_content_bytes", "counter", "Total size of the response content", "bytes")
+    for entry, labels in entries:
+        writer.sample("locust_response_content_bytes_total", entry.total_content_length, labels)
+
+    writer.family("locust_request_duration_seconds", "histogram", "Response times of requests", "seconds")
+    bucket_labels = [_number(bound) for bound in METRICS_BUCKETS]
+    for entry, labels in entries:
+        label_prefix = labels[:-1] + ","
+        for le, count in zip(bucket_labels, bucket_counts(entry)):
+            writer.sample("locust_request_duration_seconds_bucket", count, f'{label_prefix}le="{le}"}}')
+        count = entry.num_requests - entry.num_none_requests
+        writer.sample("locust_request_duration_seconds_bucket", count, f'{label_prefix}le="+Inf"}}')
+        writer.sample("locust_request_duration_seconds_sum", entry.total_response_time / 1000, labels)
+        writer.sample("locust_request_duration_seconds_count", count, labels)
+
+    writer.family("locust_errors", "counter", "Number of occurrences of errors")
+    for error in request_stats.errors.values():
+        labels = _labels(method=error.method, name=error.name, error=error.parse_error(error.error))
+        writer.sample("locust_errors_total", error.occurrences, labels)
+
+    writer.family("locust_users", "gauge", "Number of running users")
+    writer.sample("locust_users", runner.user_count)
+    writer.family("locust_cpu_usage_percent", "gauge", "CPU usage of the Locust process (the master if distributed)")
+    writer.sample("locust_cpu_usage_percent", runner.current_cpu_usage)
+    writer.family("locust_memory_usage_bytes", "gauge", "Memory usage (RSS) of the Locust process", "bytes")
+    writer.sample("locust_memory_usage_bytes", runner.current_memory_usage)
+
+    if isinstance(runner, MasterRunner):
+        workers = [(worker, _labels(worker=worker.id)) for worker in runner.clients.values()]
+        writer.family("locust_workers", "gauge", "Number of connected workers")
+        writer.sample("locust_workers", runner.worker_count)
+        writer.family("locust_worker_users", "gauge", "Number of running users per worker")
+        for worker, labels in workers:
+            writer.sample("locust_worker_users", worker.user_count, labels)
+        writer.family("locust_worker_cpu_usage_percent", "gauge", "CPU usage per worker")
+        for worker, labels in workers:
+            writer.sample("locust_worker_cpu_usage_percent", worker.cpu_usage, labels)
+        writer.family("locust_worker_memory_usage_bytes", "gauge", "Memory usage (RSS) per worker", "bytes")
+        for worker, labels in workers:
+            writer.sample("locust_worker_memory_usage_bytes", worker.memory_usage, labels)
+
+    return writer.text()
@@ -12,7 +12,18 @@ MAX_REQUEST_NAMES = 20
 request_names: set[str] = set()
 
 
-def setup_opentelemetry(locustfile: str, profile: str | None) -> bool:
+def setup_opentelemetry(
+    locustfile: str,
+    profile: str | None,
+    aggregated_metrics: bool = False,
+    trace_sample_rate: float | None = None,
+) -> bool:
+    """
+    :param aggregated_metrics: Instead of recording every request, export the stats that Locust aggregates anyway
+                               (on the master or local runner) when the metrics are collected
+    :param trace_sample_rate: Ratio of traces to sample (head-based, respecting the sampling decision of a parent span).
+                              If 0, requests are not instrumented at all. Defaults to the OTEL_TRACES_SAMPLER setting.
+    """
     try:
         from opentelemetry import _logs, metrics, trace
         from opentelemetry.sdk.resources import Resource
@@ -39,29 +50,28 @@ def setup_opentelemetry(locustfile: str, profile: str | None) -> bool:
     )
 
     if traces_exporters:
-        tracer_provider = _setup_tracer_provider(resource, traces_exporters)
+        tracer_provider = _setup_tracer_provider(resource, traces_exporters, trace_sample_rate)
         trace.set_tracer_provider(tracer_provider)
 
     if metrics_exporters:
         meter_provider = _setup_meter_provider(resource, metrics_exporters)
         metrics.set_meter_provider(meter_provider)
         meter = metrics.get_meter("locust")
-        ttlb_histogram = meter.create_histogram(
-            "locust.client.duration", unit="s", description="Time to last byte for requests"
-        )
+        if aggregated_metrics:
+            _setup_aggregated_metrics(meter)
+        else:
+            ttlb_histogram = meter.create_histogram(
+                "locust.client.duration", unit="s", description="Time to last byte for requests"
+            )
 
-        @events.request.add_listener
-        def on_request(name, response_time, exception, **kwargs):
-            if len(request_names) < MAX_REQUEST_NAMES:
-                request_names.add(name)
-                attributes = {"name": name}
-            else:
-                attributes = {"name": "Too many unique request names"}
+            @events.request.add_listener
+            def on_request(name, response_time, exception, **kwargs):
+                attributes = {"name": _request_name_attribute(name)}
 
-            if exception:
-                attributes["error.type"] = exception.__class__.__name__
+                if exception:
+                    attributes["error.type"] = exception.__class__.__name__
 
-            ttlb_histogram.record(response_time / 1000.0, attributes=attributes)
+                ttlb_histogram.record(response_time / 1000.0, attributes=attributes)
 
         @events.init.add_listener
         def on_locust_init(runner, **kwargs):
@@ -83,17 +93,97 @@ def setup_opentelemetry(locustfile: str, profile: str | None) -> bool:
         logger_provider = _setup_logger_provider(resource, logs_exporters)
         _logs.set_logger_provider(logger_provider)
 
-    _setup_auto_instrumentation()
+    if trace_sample_rate == 0:
+        logger.debug("OpenTelemetry trace sample rate is 0, requests will not be instrumented")
+    else:
+        _setup_auto_instrumentation()
 
     logger.debug("OpenTelemetry configured!")
     return True
 
 
-def _setup_tracer_provider(resource, traces_exporters):
+def _request_name_attribute(name: str) -> str:
+    if name in request_names:
+        return name
+    if len(request_names) < MAX_REQUEST_NAMES:
+        request_names.add(name)
+        return name
+    return "Too many unique request names"
+
+
+def _setup_aggregated_metrics(meter):
+    from opentelemetry.metrics import Observation
+
+    from .metrics import METRICS_BUCKETS, bucket_counts
+    from .runners import WorkerRunner
+
+    @events.init.add_listener
+    def on_locust_init(runner, **kwargs):
+        # worker stats are reset every time they are reported, so the master exports the aggregated stats
+        if runner is None or isinstance(runner, WorkerRunner):
+            return
+
+        def entries_by_name():
+            grouped = {}
+            for entry in list(runner.stats.entries.values()):
+                grouped.setdefault(_request_name_attribute(entry.name), []).append(entry)
+            return grouped.items()
+
+        def observe(value):
+            def callback(options):
+                for name, entries in entries_by_name():
+                    yield Observation(sum(value(entry) for entry in entries), {"name": name})
+
+            return callback
+
+        def observe_buckets(options):
+            for name, entries in entries_by_name():
+                counts = [sum(column) for column in zip(*(bucket_counts(entry) for entry in entries))]
+                for le, count in zip(METRICS_BUCKETS, counts):
+                    yield Observation(count, {"name": name, "le": le})
+
+        meter.create_observable_counter(
+            "locust.requests",
+            callbacks=[observe(lambda entry: entry.num_requests)],
+            unit="{request}",
+            description="Number of requests",
+        )
+        meter.create_observable_counter(
+            "locust.failures",
+            callbacks=[observe(lambda entry: entry.num_failures)],
+            unit="{request}",
+            description="Number of failed requests",
+        )
+        meter.create_observable_counter(
+            "locust.client.duration.count",
+            callbacks=[observe(lambda entry: entry.num_requests - entry.num_none_requests)],
+            unit="{request}",
+            description="Number of requests with a response time",
+        )
+        meter.create_observable_counter(
+            "locust.client.duration.sum",
+            callbacks=[observe(lambda entry: entry.total_response_time / 1000.0)],
+            unit="s",
+            description="Sum of the time to last byte for requests",
+        )
+        meter.create_observable_counter(
+            "locust.client.duration.bucket",
+            callbacks=[observe_buckets],
+            unit="{request}",
+            description="Cumulative number of requests with a time to last byte within le seconds",
+        )
+
+
+def _setup_tracer_provider(resource, traces_exporters, trace_sample_rate=None):
     from opentelemetry.sdk.trace import TracerProvider
     from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 
-    tracer_provider = TracerProvider(resource=resource)
+    if trace_sample_rate is None:
+        # uses OTEL_TRACES_SAMPLER/OTEL_TRACES_SAMPLER_ARG
+        tracer_provider = TracerProvider(resource=resource)
+    else:
+        tracer_provider = TracerProvider(resource=resource, sampler=ParentBased(TraceIdRatioBased(trace_sample_rate)))
 
     for exporter in traces_exporters:
         if exporter == "otlp":
@@ -1,7 +1,10 @@
 __all__ = (
+    "ClientTransport",
     "Message",
+    "ServerTransport",
     "rpc",
 )
 
 from . import zmqrpc as rpc
 from .protocol import Message
+from .transport import ClientTransport, ServerTransport
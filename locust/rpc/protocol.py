@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import datetime
+import zlib
+from collections.abc import Callable
 
 import msgpack
 
@@ -13,6 +15,37 @@ except ImportError:
             raise Exception("You need to install pymongo or at least bson to be able to send/receive ObjectIds")
 
 
+"""Serialized messages smaller than this (in bytes) are never compressed"""
+COMPRESSION_THRESHOLD = 4096
+
+# 0xc1 is never used in msgpack, so it can't be the first byte of an uncompressed message
+COMPRESSED_MARKER = 0xC1
+
+# name => (id, compress, decompress), in order of preference
+_codecs: dict[str, tuple[int, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+
+try:
+    from compression import zstd  # type: ignore  # Python 3.14+
+
+    _codecs["zstd"] = (3, zstd.compress, zstd.decompress)
+except ImportError:
+    pass
+
+try:
+    import lz4.frame  # type: ignore
+
+    _codecs["lz4"] = (2, lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+
+_codecs["zlib"] = (1, lambda data: zlib.compress(data, 1), zlib.decompress)
+
+COMPRESSION_CODECS = list(_codecs)
+"""Compression codecs available in this process, in order of preference. Negotiated between master and worker on connect."""
+
+_decompressors = {codec_id: decompress for codec_id, _, decompress in _codecs.values()}
+
+
 def decode(obj):
     if "__datetime__" in obj:
         obj = datetime.datetime.strptime(obj["as_str"], "%Y%m%dT%H:%M:%S.%f")
@@ -38,10 +71,25 @@ class Message:
     def __repr__(self):
         return f"<Message {self.type}:{self.node_id}>"
 
-    def serialize(self):
-        return msgpack.dumps((self.type, self.data, self.node_id), default=encode)
+    def serialize(self, compression: str | None = None) -> bytes:
+        """
+        :param compression: Name of a codec (from COMPRESSION_CODECS) to compress the message with,
+                            if it is larger than COMPRESSION_THRESHOLD
+        """
+        data = msgpack.dumps((self.type, self.data, self.node_id), default=encode)
+        if compression and len(data) > COMPRESSION_THRESHOLD:
+            codec_id, compress, _ = _codecs[compression]
+            return bytes((COMPRESSED_MARKER, codec_id)) + compress(data)
+        return data
 
     @classmethod
     def unserialize(cls, data):
+        if data[:1] == bytes((COMPRESSED_MARKER,)):
+            if data[1] not in _decompressors:
+                raise ValueError(f"Message compressed with an unsupported codec (id {data[1]})")
+            try:
+                data = _decompressors[data[1]](data[2:])
+            except Exception as e:
+                raise ValueError("Failed to decompress message") from e
         msg = cls(*msgpack.loads(data, raw=False, strict_map_key=False, object_hook=decode))
         return msg
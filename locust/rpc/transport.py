@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+from .protocol import Message
+
+
+class ServerTransport(ABC):
+    """
+    Interface of the master side of the RPC connection (default: :class:`Server <locust.rpc.zmqrpc.Server>`).
+    A different implementation can be passed to :meth:`Environment.create_master_runner
+    <locust.env.Environment.create_master_runner>` as server_class, and is constructed as
+    ``server_class(host, port, ipc_path)``.
+
+    Implementations are expected to raise :class:`RPCError <locust.exception.RPCError>` (or one of its
+    subclasses) on failure, because that is what the runners catch to trigger reconnects.
+    """
+
+    port: int
+    """The port that is listened on (useful if 0 was passed to get a random port)"""
+    client_compression: dict[str, str]
+    """Codecs used to compress large messages sent to each worker, keyed by worker id (set by the runner)"""
+
+    @abstractmethod
+    def send_to_client(self, msg: Message) -> None:
+        """Send a message to the worker identified by ``msg.node_id``"""
+
+    @abstractmethod
+    def recv_from_client(self) -> tuple[str, Message]:
+        """Block until a message is received from any worker, returning the worker id and the message"""
+
+    @abstractmethod
+    def close(self, linger: int | None = None) -> None:
+        """Stop listening and close all connections"""
+
+
+class ClientTransport(ABC):
+    """
+    Interface of the worker side of the RPC connection (default: :class:`Client <locust.rpc.zmqrpc.Client>`).
+    A different implementation can be passed to :meth:`Environment.create_worker_runner
+    <locust.env.Environment.create_worker_runner>` as client_class, and is constructed as
+    ``client_class(host, port, identity, ipc_path)``.
+
+    Implementations are expected to raise :class:`RPCError <locust.exception.RPCError>` (or one of its
+    subclasses) on failure, because that is what the runners catch to trigger reconnects.
+    """
+
+    endpoint: str
+    """Description of what is connected to, for logging (e.g. tcp://master:5557)"""
+    compression: str | None
+    """Codec used to compress large messages sent to the master (set by the runner)"""
+
+    @abstractmethod
+    def send(self, msg: Message) -> None:
+        """Send a message to the master"""
+
+    @abstractmethod
+    def recv(self) -> Message:
+        """Block until a message is received from the master"""
+
+    @abstractmethod
+    def close(self, linger: int | None = None) -> None:
+        """Close the connection"""
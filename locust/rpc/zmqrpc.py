@@ -9,6 +9,7 @@ import zmq.error as zmqerr
 import zmq.green as zmq
 
 from .protocol import Message
+from .transport import ClientTransport, ServerTransport
 
 
 class BaseSocket:
@@ -21,17 +22,22 @@ class BaseSocket:
         if has_dualstack_ipv6() and not ipv4_only:
             self.socket.setsockopt(zmq.IPV6, 1)
 
+        self.compression: str | None = None
+        """Codec used to compress large messages sent with send(), once negotiated with the other side"""
+        self.client_compression: dict[str, str] = {}
+        """Codecs used to compress large messages sent with send_to_client(), per client id"""
+
     @retry()
     def send(self, msg):
         try:
-            self.socket.send(msg.serialize(), zmq.NOBLOCK)
+            self.socket.send(msg.serialize(self.compression), zmq.NOBLOCK)
         except zmqerr.ZMQError as e:
             raise RPCSendError("ZMQ sent failure") from e
 
     @retry()
     def send_to_client(self, msg):
         try:
-            self.socket.send_multipart([msg.node_id.encode(), msg.serialize()])
+            self.socket.send_multipart([msg.node_id.encode(), msg.serialize(self.client_compression.get(msg.node_id))])
         except zmqerr.ZMQError as e:
             raise RPCSendError("ZMQ sent failure") from e
 
@@ -39,7 +45,7 @@ class BaseSocket:
         try:
             data = self.socket.recv()
             msg = Message.unserialize(data)
-        except msgerr.ExtraData as e:
+        except (msgerr.ExtraData, ValueError) as e:
             raise RPCReceiveError("ZMQ interrupted message") from e
         except zmqerr.ZMQError as e:
             raise RPCError("ZMQ network broken") from e
@@ -55,7 +61,7 @@ class BaseSocket:
             raise RPCError("ZMQ network broken") from e
         try:
             msg = Message.unserialize(data[1])
-        except (UnicodeDecodeError, msgerr.ExtraData) as e:
+        except (UnicodeDecodeError, msgerr.ExtraData, ValueError) as e:
             raise RPCReceiveError("ZMQ interrupted or corrupted message", addr=addr) from e
         return addr, msg
 
@@ -74,8 +80,12 @@ class BaseSocket:
         return False
 
 
-class Server(BaseSocket):
-    def __init__(self, host, port):
+class Server(BaseSocket, ServerTransport):
+    def __init__(self, host, port, ipc_path=None):
+        """
+        :param ipc_path: If set, also listen on a Unix domain socket at this path, so that workers
+                         on the same machine can connect without going through the TCP stack
+        """
         BaseSocket.__init__(self, zmq.ROUTER, self.ipv4_only(host, port))
         if port == 0:
             self.port = self.socket.bind_to_random_port(f"tcp://{host}")
@@ -85,10 +95,20 @@ class Server(BaseSocket):
                 self.port = port
             except zmqerr.ZMQError as e:
                 raise RPCError(f"Socket bind failure: {e}")
+        self.ipc_path = ipc_path
+        if ipc_path:
+            try:
+                self.socket.bind(f"ipc://{ipc_path}")
+            except zmqerr.ZMQError as e:
+                raise RPCError(f"Socket bind failure: {e}")
 
 
-class Client(BaseSocket):
-    def __init__(self, host, port, identity):
+class Client(BaseSocket, ClientTransport):
+    def __init__(self, host, port, identity, ipc_path=None):
+        """
+        :param ipc_path: If set, connect to the master's Unix domain socket at this path instead of host/port
+        """
         BaseSocket.__init__(self, zmq.DEALER, self.ipv4_only(host, port))
         self.socket.setsockopt(zmq.IDENTITY, identity.encode())
-        self.socket.connect("tcp://%s:%i" % (host, port))
+        self.endpoint = f"ipc://{ipc_path}" if ipc_path else "tcp://%s:%i" % (host, port)
+        self.socket.connect(self.endpoint)
@@ -30,7 +30,8 @@ from . import argument_parser
 from .dispatch import UsersDispatcher
 from .exception import RPCError, RPCReceiveError, RPCSendError, StopTest
 from .log import get_logs, greenlet_exception_logger
-from .rpc import Message, rpc
+from .rpc import ClientTransport, Message, ServerTransport, rpc
+from .rpc.protocol import COMPRESSION_CODECS
 from .stats import RequestStats, StatsError, setup_distributed_stats_event_listeners
 from .util.directory import get_abspaths_in
 from .util.url import is_url
@@ -38,6 +39,7 @@ from .util.url import is_url
 if TYPE_CHECKING:
     from . import User
     from .env import Environment
+    from .shared_stats import SharedStats
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +53,7 @@ STATE_INIT, STATE_SPAWNING, STATE_RUNNING, STATE_CLEANUP, STATE_STOPPING, STATE_
     "missing",
 ]
 WORKER_REPORT_INTERVAL = 3.0
+SHARED_STATS_COLLECT_INTERVAL = 1.0
 WORKER_LOG_REPORT_INTERVAL = 10
 CPU_MONITOR_INTERVAL = 10.0
 CPU_WARNING_THRESHOLD = 90
@@ -104,6 +107,7 @@ class Runner:
         self.greenlet = Group()
         self.state = STATE_INIT
         self.spawning_greenlet: gevent.Greenlet | None = None
+        self.shared_stats: SharedStats | None = None
         self.shape_greenlet: gevent.Greenlet | None = None
         self.shape_last_tick: tuple[int, float] | tuple[int, float, list[type[User]] | None] | None = None
         self.current_cpu_usage: float = 0.0
@@ -124,7 +128,11 @@ class Runner:
 
         # set up event listeners for recording requests
         def on_request(request_type, name, response_time, response_length, exception=None, **_kwargs):
-            self.stats.log_request(request_type, name, response_time, response_length)
+            # names are templated by the master when it collects them, so that it isn't done for every request
+            if self.shared_stats is None or not self.shared_stats.log_request(
+                request_type, name, response_time, response_length
+            ):
+                self.stats.log_request(request_type, name, response_time, response_length)
             if exception:
                 self.stats.log_error(request_type, name, exception)
 
@@ -582,8 +590,9 @@ class LocalRunner(Runner):
 
 
 class DistributedRunner(Runner):
-    def __init__(self, environment) -> None:
+    def __init__(self, environment, shared_stats: SharedStats | None = None) -> None:
         super().__init__(environment)
+        self.shared_stats = shared_stats
         setup_distributed_stats_event_listeners(self.environment.events, self.stats)
 
 
@@ -656,16 +665,29 @@ class MasterRunner(DistributedRunner):
     :class:`WorkerRunners <WorkerRunner>` will aggregated.
     """
 
-    def __init__(self, environment, master_bind_host, master_bind_port) -> None:
+    def __init__(
+        self,
+        environment,
+        master_bind_host,
+        master_bind_port,
+        master_ipc_path=None,
+        shared_stats: SharedStats | None = None,
+        server_class: type[ServerTransport] | None = None,
+    ) -> None:
         """
         :param environment: Environment instance
         :param master_bind_host: Host/interface to use for incoming worker connections
         :param master_bind_port: Port to use for incoming worker connections
+        :param master_ipc_path: Optional Unix domain socket path to also accept worker connections on
+        :param shared_stats: Optional shared memory segment that (forked) workers log their requests to
+        :param server_class: RPC transport to listen for workers with, defaults to :class:`locust.rpc.zmqrpc.Server`
         """
-        super().__init__(environment)
+        super().__init__(environment, shared_stats)
         self.worker_cpu_warning_emitted = False
         self.master_bind_host = master_bind_host
         self.master_bind_port = master_bind_port
+        self.master_ipc_path = master_ipc_path
+        self.server_class = server_class
         self.spawn_rate: float = 0.0
         self.spawning_completed = False
         self.worker_indexes: dict[str, int] = {}
@@ -673,7 +695,7 @@ class MasterRunner(DistributedRunner):
 
         self.clients = WorkerNodes()
         try:
-            self.server = rpc.Server(master_bind_host, master_bind_port)
+            self.server = self._create_server()
         except RPCError as e:
             if e.args[0] == "Socket bind failure: Address already in use":
                 port_string = (
@@ -690,6 +712,8 @@ class MasterRunner(DistributedRunner):
 
         self.greenlet.spawn(self.heartbeat_worker).link_exception(locust_exception_handler(self.environment))
         self.greenlet.spawn(self.client_listener).link_exception(locust_exception_handler(self.environment))
+        if self.shared_stats is not None:
+            self.greenlet.spawn(self.shared_stats_collector).link_exception(locust_exception_handler(self.environment))
 
         # listener that gathers info on how many users the worker has spawned
         def on_worker_report(client_id: str, data: dict[str, Any]) -> None:
@@ -697,6 +721,9 @@ class MasterRunner(DistributedRunner):
                 logger.info("Discarded report from unrecognized worker %s", client_id)
                 return
             self.clients[client_id].user_classes_count = data["user_classes_count"]
+            if self.shared_stats is not None:
+                # pick up everything that was logged up to this report, so that the final reports are complete
+                self.shared_stats.collect(self.stats)
 
         self.environment.events.worker_report.add_listener(on_worker_report)
 
@@ -963,11 +990,23 @@ class MasterRunner(DistributedRunner):
                     # trigger redistribution after missing cclient removal
                     self.start(user_count=self.target_user_count, spawn_rate=self.spawn_rate)
 
+    def shared_stats_collector(self) -> NoReturn:
+        assert self.shared_stats is not None
+        while True:
+            gevent.sleep(SHARED_STATS_COLLECT_INTERVAL)
+            self.shared_stats.collect(self.stats)
+
+    def _create_server(self) -> ServerTransport:
+        server_class = self.server_class or rpc.Server
+        return server_class(self.master_bind_host, self.master_bind_port, self.master_ipc_path)
+
     def reset_connection(self) -> None:
         logger.info("Resetting RPC server and all worker connections.")
         try:
+            client_compression = self.server.client_compression
             self.server.close(linger=0)
-            self.server = rpc.Server(self.master_bind_host, self.master_bind_port)
+            self.server = self._create_server()
+            self.server.client_compression = client_compression
             self.connection_broken = False
         except RPCError as e:
             logger.error(f"Temporary failure when resetting connection: {e}, will retry later.")
@@ -1029,7 +1068,13 @@ class MasterRunner(DistributedRunner):
                         logger.warning(
                             f"A worker ({client_id}) running a different version ({msg.data}) connected, master version is {__version__}"
                         )
-                self.send_message("ack", client_id=client_id, data={"index": self.get_worker_index(client_id)})
+                # (re)negotiate compression, workers that support it will reply with a compression message
+                self.server.client_compression.pop(client_id, None)
+                self.send_message(
+                    "ack",
+                    client_id=client_id,
+                    data={"index": self.get_worker_index(client_id), "compression": COMPRESSION_CODECS},
+                )
                 self.environment.events.worker_connect.fire(client_id=msg.node_id)
                 client_already_connected = client_id in self.clients
                 self.clients[client_id] = WorkerNode(client_id, heartbeat_liveness=HEARTBEAT_LIVENESS)
@@ -1133,6 +1178,10 @@ class MasterRunner(DistributedRunner):
                     self.server.send_to_client(Message("heartbeat", None, msg.node_id))
                 else:
                     logging.debug(f"Got heartbeat message from unknown worker {msg.node_id}")
+            case "compression":
+                if msg.data in COMPRESSION_CODECS:
+                    logger.debug(f"Worker {msg.node_id} will use {msg.data} compression")
+                    self.server.client_compression[msg.node_id] = msg.data
             case "stats":
                 self.environment.events.worker_report.fire(client_id=msg.node_id, data=msg.data)
             case "spawning":
@@ -1227,13 +1276,24 @@ class WorkerRunner(DistributedRunner):
     # the worker index is set on ACK, if master provided it (masters <= 2.10.2 do not provide it)
     worker_index = -1
 
-    def __init__(self, environment: Environment, master_host: str, master_port: int) -> None:
+    def __init__(
+        self,
+        environment: Environment,
+        master_host: str,
+        master_port: int,
+        master_ipc_path: str | None = None,
+        shared_stats: SharedStats | None = None,
+        client_class: type[ClientTransport] | None = None,
+    ) -> None:
         """
         :param environment: Environment instance
         :param master_host: Host/IP to use for connection to the master
         :param master_port: Port to use for connecting to the master
+        :param master_ipc_path: Optional Unix domain socket path to connect to instead of master_host/master_port
+        :param shared_stats: Optional shared memory segment to log requests to (its slot must be set)
+        :param client_class: RPC transport to connect to the master with, defaults to :class:`locust.rpc.zmqrpc.Client`
         """
-        super().__init__(environment)
+        super().__init__(environment, shared_stats)
         self.retry = 0
         self.connected = False
         self.last_heartbeat_timestamp: float | None = None
@@ -1242,11 +1302,13 @@ class WorkerRunner(DistributedRunner):
         self.client_id = socket.gethostname() + "_" + uuid4().hex
         self.master_host = master_host
         self.master_port = master_port
+        self.master_ipc_path = master_ipc_path
+        self.client_class = client_class
         self.web_base_path = environment.parsed_options.web_base_path if environment.parsed_options else ""
         self.logs: list[str] = []
         self.worker_cpu_warning_emitted = False
         self._users_dispatcher: UsersDispatcher | None = None
-        self.client = rpc.Client(master_host, master_port, self.client_id)
+        self.client = self._create_client()
         self.greenlet.spawn(self.worker).link_exception(locust_exception_handler(self.environment))
         self.connect_to_master()
         self.greenlet.spawn(self.heartbeat).link_exception(locust_exception_handler(self.environment))
@@ -1346,11 +1408,17 @@ class WorkerRunner(DistributedRunner):
                 logger.error(f"Didn't get heartbeat from master in over {MASTER_HEARTBEAT_TIMEOUT}s")
                 self.quit()
 
+    def _create_client(self) -> ClientTransport:
+        client_class = self.client_class or rpc.Client
+        return client_class(self.master_host, self.master_port, self.client_id, self.master_ipc_path)
+
     def reset_connection(self) -> None:
         logger.info("Reset connection to master")
         try:
+            compression = self.client.compression
             self.client.close()
-            self.client = rpc.Client(self.master_host, self.master_port, self.client_id)
+            self.client = self._create_client()
+            self.client.compression = compression
         except RPCError as e:
             logger.error(f"Temporary failure when resetting connection: {e}, will retry later.")
 
@@ -1370,6 +1438,12 @@ class WorkerRunner(DistributedRunner):
                 # backward-compatible support of masters that do not send a worker index
                 if msg.data is not None and "index" in msg.data:
                     self.worker_index = msg.data["index"]
+                # masters that don't support compression don't send a list of codecs. The ack may come from a
+                # restarted master, so compression that was negotiated before is turned off unless renegotiated
+                codecs = msg.data.get("compression", ()) if msg.data is not None else ()
+                self.client.compression = next((c for c in COMPRESSION_CODECS if c in codecs), None)
+                if self.client.compression:
+                    self.client.send(Message("compression", self.client.compression, self.client_id))
                 self.connection_event.set()
             case "spawn":
                 self.client.send(Message("spawning", None, self.client_id))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import math
+import struct
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
+
+from . import stats as stats_module
+from .stats import StatsEntry
+
+if TYPE_CHECKING:
+    from .stats import RequestStats
+
+"""Max number of request entries (name + method) per worker that are logged in shared memory"""
+SHARED_STATS_MAX_ENTRIES = 256
+"""Max length of the utf-8 encoded method + name of an entry"""
+SHARED_STATS_MAX_NAME_LENGTH = 256
+
+# The response time histogram has a fixed bucket per value that the default bucket_response_time() rounds to
+# below 100 seconds: 0-99 ms in steps of 1 ms, 100-990 ms in steps of 10 ms, and so on
+_BUCKET_RANGES = ((0, 100, 1), (100, 1000, 10), (1000, 10000, 100), (10000, 100000, 1000))
+_BUCKET_VALUES = [value for start, stop, step in _BUCKET_RANGES for value in range(start, stop, step)]
+_BUCKET_INDEXES = {value: index for index, value in enumerate(_BUCKET_VALUES)}
+NUM_BUCKETS = len(_BUCKET_VALUES)
+
+# Number of seconds that the number of requests per second is kept for in each row. The master collects every
+# SHARED_STATS_COLLECT_INTERVAL, so it only misses a second if it falls this far behind.
+PER_SECOND_SLOTS = 16
+
+# Each row (one entry of one worker) is an array of 8 byte cells: counters (int64 or float64), a ring of
+# (second, number of requests) pairs and the histogram. A worker only writes to its own rows, and writes NUM_REQUESTS
+# last, so that the master (which reads it first) never misses anything that was counted in it.
+NUM_REQUESTS = 0
+NUM_NONE_REQUESTS = 1
+TOTAL_CONTENT_LENGTH = 2
+TOTAL_RESPONSE_TIME = 3
+MAX_RESPONSE_TIME = 4
+MIN_RESPONSE_TIME = 5  # only set if there are requests with a response time
+LAST_REQUEST_TIMESTAMP = 6
+PER_SECOND = 7
+HISTOGRAM = PER_SECOND + 2 * PER_SECOND_SLOTS
+ROW_CELLS = HISTOGRAM + NUM_BUCKETS
+
+_name = struct.Struct(f"<H{SHARED_STATS_MAX_NAME_LENGTH}s")
+_NAME_CELLS = math.ceil(_name.size / 8)
+
+
+class _SeenRow:
+    """What the master has already added to its stats from a row"""
+
+    __slots__ = (
+        "name",
+        "method",
+        "num_requests",
+        "num_none_requests",
+        "total_content_length",
+        "total_response_time",
+        "max_response_time",
+        "min_response_time",
+        "histogram",
+        "per_second",
+    )
+
+    def __init__(self, name: str, method: str) -> None:
+        self.name = name
+        self.method = method
+        self.num_requests = 0
+        self.num_none_requests = 0
+        self.total_content_length = 0
+        self.total_response_time = 0.0
+        self.max_response_time = 0.0
+        self.min_response_time = 0.0
+        self.histogram = array("q", bytes(NUM_BUCKETS * 8))
+        self.per_second: dict[int, int] = {}
+
+
+class SharedStats:
+    """
+    Shared memory segment that forked worker processes log their requests to, and that the master (their parent
+    process) aggregates into its RequestStats, so that the requests don't have to be serialized and sent over RPC.
+
+    The segment has one slot per worker, with a fixed layout row (counters and response time histogram) per entry.
+    Workers update the counters of a row for each request (see log_request) and the master adds whatever changed
+    since it last looked to its own entries (see collect). Requests that don't fit (more than max_entries entries
+    per worker, response times of 100 s or more, or a custom bucket_response_time) are logged and reported as usual,
+    as are failures.
+    """
+
+    def __init__(self, num_workers: int, max_entries: int = SHARED_STATS_MAX_ENTRIES) -> None:
+        self.num_workers = num_workers
+        self.max_entries = max_entries
+        # a slot is its number of rows, the rows, and their names
+        self.slot_cells = 1 + max_entries * ROW_CELLS + max_entries * _NAME_CELLS
+        self.shm = shared_memory.SharedMemory(create=True, size=num_workers * self.slot_cells * 8)
+        self._int_cells = self.shm.buf.cast("q")
+        self._float_cells = self.shm.buf.cast("d")
+        self.slot: int | None = None
+        """Slot that this (worker) process writes to. Set after forking."""
+        self._rows: dict[tuple[str, str], int] = {}
+        self._seen: dict[int, _SeenRow] = {}
+
+    def _row(self, slot: int, index: int) -> int:
+        return slot * self.slot_cells + 1 + index * ROW_CELLS
+
+    def _name_offset(self, slot: int, index: int) -> int:
+        return (slot * self.slot_cells + 1 + self.max_entries * ROW_CELLS + index * _NAME_CELLS) * 8
+
+    def log_request(self, method: str, name: str, response_time: int | float | None, content_length: int) -> bool:
+        """
+        Count a request in this worker's slot. Returns False if it couldn't be, in which case it should be logged
+        as usual.
+        """
+        if self.slot is None:
+            return False
+        bucket = None
+        if response_time is not None:
+            bucket = _BUCKET_INDEXES.get(stats_module.bucket_response_time(response_time))
+            if bucket is None:
+                return False
+        row = self._rows.get((method, name))
+        if row is None:
+            row = self._add_row(method, name)
+            if row is None:
+                return False
+
+        int_cells = self._int_cells
+        float_cells = self._float_cells
+        int_cells[row + TOTAL_CONTENT_LENGTH] += int(content_length)
+        if bucket is None:
+            int_cells[row + NUM_NONE_REQUESTS] += 1
+        else:
+            float_cells[row + TOTAL_RESPONSE_TIME] += response_time
+            if response_time > float_cells[row + MAX_RESPONSE_TIME]:
+                float_cells[row + MAX_RESPONSE_TIME] = response_time
+            has_response_times = int_cells[row + NUM_REQUESTS] > int_cells[row + NUM_NONE_REQUESTS]
+            if not has_response_times or response_time < float_cells[row + MIN_RESPONSE_TIME]:
+                float_cells[row + MIN_RESPONSE_TIME] = response_time
+            int_cells[row + HISTOGRAM + bucket] += 1
+        now = time.time()
+        float_cells[row + LAST_REQUEST_TIMESTAMP] = now
+        second = int(now)
+        cell = row + PER_SECOND + second % PER_SECOND_SLOTS * 2
+        if int_cells[cell] != second:
+            # the count is reset before the second, so the master never adds the old count to the new second
+            int_cells[cell + 1] = 0
+            int_cells[cell] = second
+        int_cells[cell + 1] += 1
+        int_cells[row + NUM_REQUESTS] += 1
+        return True
+
+    def _add_row(self, method: str, name: str) -> int | None:
+        assert self.slot is not None
+        index = len(self._rows)
+        encoded = f"{method}\0{name}".encode()
+        if index >= self.max_entries or len(encoded) > SHARED_STATS_MAX_NAME_LENGTH:
+            return None
+        _name.pack_into(self.shm.buf, self._name_offset(self.slot, index), len(encoded), encoded)
+        # the row only becomes visible to the master when the number of rows is increased
+        self._int_cells[self.slot * self.slot_cells] = index + 1
+        row = self._rows[(method, name)] = self._row(self.slot, index)
+        return row
+
+    def collect(self, stats: RequestStats) -> None:
+        """Add everything the workers have logged since the last call to stats (used by the master)"""
+        int_cells = self._int_cells
+        float_cells = self._float_cells
+        for slot in range(self.num_workers):
+            for index in range(int_cells[slot * self.slot_cells]):
+                row = self._row(slot, index)
+                num_requests = int_cells[row + NUM_REQUESTS]
+                seen = self._seen.get(row)
+                if seen is None:
+                    if not num_requests:
+                        continue
+                    length, encoded = _name.unpack_from(self.shm.buf, self._name_offset(slot, index))
+                    method, name = encoded[:length].decode().split("\0", 1)
+                    seen = self._seen[row] = _SeenRow(name, method)
+
+                num_reqs_per_sec = self._per_second_delta(row, seen)
+                if num_requests == seen.num_requests and not num_reqs_per_sec:
+                    continue
+
+                delta = StatsEntry(stats, seen.name, seen.method)
+                # requests are counted in the second they were made, not the one they were collected in
+                delta.num_reqs_per_sec = num_reqs_per_sec
+                delta.num_requests = num_requests - seen.num_requests
+                delta.num_none_requests = int_cells[row + NUM_NONE_REQUESTS] - seen.num_none_requests
+                delta.total_content_length = int_cells[row + TOTAL_CONTENT_LENGTH] - seen.total_content_length
+                delta.total_response_time = float_cells[row + TOTAL_RESPONSE_TIME] - seen.total_response_time
+                delta.last_request_timestamp = float_cells[row + LAST_REQUEST_TIMESTAMP]
+                histogram = array("q", bytes(int_cells[row + HISTOGRAM : row + HISTOGRAM + NUM_BUCKETS]))
+                for bucket, (count, seen_count) in enumerate(zip(histogram, seen.histogram)):
+                    if count != seen_count:
+                        delta.response_times[_BUCKET_VALUES[bucket]] = count - seen_count
+                # the max/min cells are for all requests of the row, if they haven't changed the (rounded) response
+                # times of this delta are the best we have
+                max_response_time = float_cells[row + MAX_RESPONSE_TIME]
+                min_response_time = float_cells[row + MIN_RESPONSE_TIME]
+                if delta.response_times:
+                    if max_response_time != seen.max_response_time:
+                        delta.max_response_time = max_response_time
+                    else:
+                        delta.max_response_time = max(delta.response_times)
+                    if min_response_time != seen.min_response_time or not seen.num_requests > seen.num_none_requests:
+                        delta.min_response_time = min_response_time
+                    else:
+                        delta.min_response_time = min(delta.response_times)
+
+                seen.num_requests += delta.num_requests
+                seen.num_none_requests += delta.num_none_requests
+                seen.total_content_length += delta.total_content_length
+                seen.total_response_time += delta.total_response_time
+                seen.max_response_time = max_response_time
+                seen.min_response_time = min_response_time
+                seen.histogram = histogram
+
+                # like any other request, the name is templated and the number of entries limited
+                stats._get_entry(seen.name, seen.method).extend(delta)
+                stats.total.extend(delta)
+
+    def _per_second_delta(self, row: int, seen: _SeenRow) -> dict[int, int]:
+        """The number of requests per second counted in the row since the last collect"""
+        int_cells = self._int_cells
+        delta = {}
+        for cell in range(row + PER_SECOND, row + HISTOGRAM, 2):
+            second = int_cells[cell]
+            count = int_cells[cell + 1]
+            if not second or int_cells[cell] != second:
+                continue  # unused, or the worker moved on to a new second while it was being read
+            seen_count = seen.per_second.get(second, 0)
+            if count > seen_count:
+                delta[second] = count - seen_count
+                seen.per_second[second] = count
+        if delta and len(seen.per_second) > PER_SECOND_SLOTS:
+            oldest = max(seen.per_second) - PER_SECOND_SLOTS
+            seen.per_second = {second: count for second, count in seen.per_second.items() if second > oldest}
+        return delta
+
+    def close(self) -> None:
+        self._int_cells.release()
+        self._float_cells.release()
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Close and remove the segment. Only called by the process that created it (the master)."""
+        self.close()
+        self.shm.unlink()
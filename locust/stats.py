@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import bisect
 import csv
 import hashlib
 import json
 import logging
 import os
+import re
 import signal
 import sys
 import time
@@ -17,6 +19,7 @@ from typing import TYPE_CHECKING, Protocol, TypedDict, TypeVar, cast
 import gevent
 
 from .exception import CatchResponseError
+from .history import EndpointHistory, StatsHistory
 from .util.date import format_utc_timestamp
 from .util.rounding import proper_round
 
@@ -102,6 +105,12 @@ CONSOLE_STATS_INTERVAL_SEC = 2
 
 """Default interval for how frequently results are written to history."""
 HISTORY_STATS_INTERVAL_SEC = 5
+"""Max number of history points passed to the charts of the web UI and HTML report (older history is downsampled)"""
+HISTORY_CHART_MAX_POINTS = 1500
+"""Max number of endpoints (stats entries) that per endpoint history is kept for"""
+ENDPOINT_HISTORY_MAX_ENTRIES = 100
+"""Number of history points kept per endpoint (one point per HISTORY_STATS_INTERVAL_SEC)"""
+ENDPOINT_HISTORY_MAX_POINTS = 720
 
 """Default interval for how frequently CSV files are written if this option is configured."""
 CSV_STATS_INTERVAL_SEC = 1
@@ -119,6 +128,43 @@ PERCENTILES_TO_REPORT = [0.50, 0.66, 0.75, 0.80, 0.90, 0.95, 0.98, 0.99, 0.999,
 
 PERCENTILES_TO_STATISTICS = [0.95, 0.99]
 PERCENTILES_TO_CHART = [0.5, 0.95]
+PERCENTILES_TO_CHART_PER_ENDPOINT = [0.5, 0.95, 0.99]
+
+"""
+Max number of distinct errors (request name, method and error message) kept in RequestStats.errors, or None for no
+limit. On workers the errors are cleared every report, on the master this is the total. Further errors are counted in
+an "other errors" entry per request name and method.
+"""
+ERRORS_MAX_ENTRIES: int | None = None
+ERRORS_OVERFLOW_MESSAGE = "Other errors (the number of distinct errors exceeded ERRORS_MAX_ENTRIES)"
+"""
+Regular expressions and replacements (as for re.sub) applied to error messages before grouping them, e.g.
+(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", "<uuid>") to group errors that only differ by an id
+"""
+ERROR_NORMALIZERS: list[tuple[str | re.Pattern, str]] = []
+"""Max number of error keys cached by StatsError.create_key (the cache is cleared when it is full)"""
+ERROR_KEY_CACHE_SIZE = 10000
+
+"""
+Max number of distinct request names/methods kept in RequestStats.entries, or None for no limit. Requests with other
+names are logged in an "other" entry per method. Setting it protects against running out of memory when urls with ids
+are logged without name=...
+"""
+STATS_MAX_ENTRIES: int | None = None
+STATS_OVERFLOW_NAME = "Other (the number of distinct names exceeded STATS_MAX_ENTRIES)"
+"""
+Regular expressions and replacements (as for re.sub) applied to new request names, e.g. DEFAULT_NAME_TEMPLATES.
+Only names that are not already in the stats are templated, and the result is cached.
+"""
+NAME_TEMPLATES: list[tuple[str | re.Pattern, str]] = []
+"""Templates for path segments that are numbers, uuids or long hex strings (like commit hashes)"""
+DEFAULT_NAME_TEMPLATES: list[tuple[str | re.Pattern, str]] = [
+    (re.compile(r"(?<=/)[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}(?=[/?#]|$)"), "{uuid}"),
+    (re.compile(r"(?<=/)[0-9]+(?=[/?#]|$)"), "{id}"),
+    (re.compile(r"(?<=/)[0-9a-fA-F]{16,}(?=[/?#]|$)"), "{hash}"),
+]
+"""Max number of request names mapped to a template or to STATS_OVERFLOW_NAME that are cached per RequestStats"""
+NAME_TEMPLATE_CACHE_SIZE = 10000
 
 
 def bucket_response_time(response_time: int | float) -> int:
@@ -179,6 +225,28 @@ def calculate_response_time_percentile(response_times: dict[int, int], num_reque
     return 0
 
 
+def calculate_response_time_percentiles(
+    response_times: dict[int, int], num_requests: int, percents: list[float]
+) -> list[int]:
+    """
+    Same as calculate_response_time_percentile, but for several percentiles at once,
+    sorting and walking the response times only once. Returns the values in the order of percents.
+    """
+    result = [0] * len(percents)
+    # the highest percentile is reached first when walking from the highest response time
+    pending = sorted(range(len(percents)), key=lambda i: percents[i], reverse=True)
+    if not pending:
+        return result
+    processed_count = 0
+    for response_time in sorted(response_times.keys(), reverse=True):
+        processed_count += response_times[response_time]
+        while num_requests - processed_count <= int(num_requests * percents[pending[0]]):
+            result[pending.pop(0)] = response_time
+            if not pending:
+                return result
+    return result
+
+
 def diff_response_time_dicts(latest: dict[int, int], old: dict[int, int]) -> dict[int, int]:
     """
     Returns the delta between two {response_times:request_count} dicts.
@@ -195,8 +263,14 @@ def diff_response_time_dicts(latest: dict[int, int], old: dict[int, int]) -> dic
 
 
 class EntriesDict(dict):
+    """
+    Creates missing entries on access, and keeps a sorted index of its keys (sorted_keys), so that
+    listing the entries in order (see sort_stats) doesn't require sorting all of them every time.
+    """
+
     def __init__(self, request_stats):
         self.request_stats = request_stats
+        self.sorted_keys: list[tuple[str, str]] = []
 
     def __missing__(self, key):
         self[key] = StatsEntry(
@@ -204,6 +278,38 @@ class EntriesDict(dict):
         )
         return self[key]
 
+    def __setitem__(self, key, value):
+        if key not in self:
+            bisect.insort(self.sorted_keys, key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+
+    def pop(self, key, *default):
+        if key in self:
+            del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self.sorted_keys.clear()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
 
 class RequestStats:
     """
@@ -221,7 +327,11 @@ class RequestStats:
         self.entries: dict[tuple[str, str], StatsEntry] = EntriesDict(self)
         self.errors: dict[str, StatsError] = {}
         self.total = StatsEntry(self, "Aggregated", "", use_response_times_cache=self.use_response_times_cache)
-        self.history: list[dict] = []
+        self.history = StatsHistory()
+        self.endpoint_history = EndpointHistory(ENDPOINT_HISTORY_MAX_ENTRIES, ENDPOINT_HISTORY_MAX_POINTS)
+        self._errors_overflowed = False
+        self._entry_keys: dict[tuple[str, str], tuple[str, str]] = {}
+        self._entries_overflowed = False
 
     @property
     def num_requests(self):
@@ -245,20 +355,74 @@ class RequestStats:
 
     def log_request(self, method: str, name: str, response_time: int, content_length: int) -> None:
         self.total.log(response_time, content_length)
-        self.entries[(name, method)].log(response_time, content_length)
+        self._get_entry(name, method).log(response_time, content_length)
 
     def log_error(self, method: str, name: str, error: Exception | str | None) -> None:
         self.total.log_error(error)
-        self.entries[(name, method)].log_error(error)
+        request_entry = self._get_entry(name, method)
+        request_entry.log_error(error)
+        name = request_entry.name  # group errors by the templated name too
 
         # store error in errors dict
         key = StatsError.create_key(method, name, error)
         entry = self.errors.get(key)
         if not entry:
-            entry = StatsError(method, name, error)
-            self.errors[key] = entry
+            if ERRORS_MAX_ENTRIES is not None and len(self.errors) >= ERRORS_MAX_ENTRIES:
+                entry = self._overflow_error(method, name)
+            else:
+                entry = StatsError(method, name, error)
+                self.errors[key] = entry
         entry.occurred()
 
+    def _overflow_error(self, method: str, name: str) -> StatsError:
+        """The entry that errors are counted in when there are already ERRORS_MAX_ENTRIES errors"""
+        key = StatsError.create_key(method, name, ERRORS_OVERFLOW_MESSAGE)
+        entry = self.errors.get(key)
+        if not entry:
+            if not self._errors_overflowed:
+                logger.warning(
+                    f"More than {ERRORS_MAX_ENTRIES} distinct errors, further errors are counted as "
+                    f'"{ERRORS_OVERFLOW_MESSAGE}". Consider using stats.ERROR_NORMALIZERS to group similar errors.'
+                )
+                self._errors_overflowed = True
+            entry = StatsError(method, name, ERRORS_OVERFLOW_MESSAGE)
+            self.errors[key] = entry
+        return entry
+
+    def _get_entry(self, name: str, method: str) -> StatsEntry:
+        entry = self.entries.get((name, method))
+        if entry is None:
+            entry = self.entries[self.entry_key(name, method)]
+        return entry
+
+    def entry_key(self, name: str, method: str) -> tuple[str, str]:
+        """
+        The key of the entry that requests with this name and method are logged in. This is the name after applying
+        NAME_TEMPLATES, or STATS_OVERFLOW_NAME if STATS_MAX_ENTRIES is set and there are already that many entries.
+        """
+        key = (name, method)
+        if key in self.entries:
+            return key
+        if (cached := self._entry_keys.get(key)) is not None:
+            return cached
+        templated = key
+        for pattern, replacement in NAME_TEMPLATES:
+            templated = (re.sub(pattern, replacement, templated[0]), method)
+        if STATS_MAX_ENTRIES is not None and templated not in self.entries and len(self.entries) >= STATS_MAX_ENTRIES:
+            if not self._entries_overflowed:
+                logger.warning(
+                    f"More than {STATS_MAX_ENTRIES} distinct request names, further names are logged as "
+                    f'"{STATS_OVERFLOW_NAME}". Use name=... when making requests to group urls that contain ids, '
+                    "or set stats.NAME_TEMPLATES (e.g. to stats.DEFAULT_NAME_TEMPLATES)."
+                )
+                self._entries_overflowed = True
+            templated = (STATS_OVERFLOW_NAME, method)
+        if templated != key:
+            if len(self._entry_keys) >= NAME_TEMPLATE_CACHE_SIZE:
+                self._entry_keys.clear()
+            self._entry_keys[key] = templated
+        return templated
+
     def get(self, name: str, method: str) -> StatsEntry:
         """
         Retrieve a StatsEntry instance by name and method
@@ -273,7 +437,8 @@ class RequestStats:
         self.errors = {}
         for r in self.entries.values():
             r.reset()
-        self.history = []
+        self.history.clear()
+        self.endpoint_history.clear()
 
     def clear_all(self) -> None:
         """
@@ -282,7 +447,9 @@ class RequestStats:
         self.total = StatsEntry(self, "Aggregated", "", use_response_times_cache=self.use_response_times_cache)
         self.entries = EntriesDict(self)
         self.errors = {}
-        self.history = []
+        self._entry_keys.clear()
+        self.history.clear()
+        self.endpoint_history.clear()
 
     def serialize_stats(self) -> list[StatsEntryDict]:
         return [
@@ -292,6 +459,27 @@ class RequestStats:
     def serialize_errors(self) -> dict[str, StatsErrorDict]:
         return {k: e.serialize() for k, e in self.errors.items()}
 
+    def extend_errors(self, errors: dict[str, StatsErrorDict]) -> None:
+        """
+        Add serialized errors (e.g. from a worker report) to this instance's errors
+        """
+        for error_key, error in errors.items():
+            existing = self.errors.get(error_key)
+            if existing is None and (ERRORS_MAX_ENTRIES is None or len(self.errors) < ERRORS_MAX_ENTRIES):
+                self.errors[error_key] = StatsError.unserialize(error)
+            else:
+                if existing is None:
+                    existing = self._overflow_error(error["method"], error["name"])
+                existing.occurrences += error["occurrences"]
+                if incoming_first := error.get("first_seen"):
+                    existing.first_seen = (
+                        incoming_first if existing.first_seen is None else min(existing.first_seen, incoming_first)
+                    )
+                if incoming_last := error.get("last_seen"):
+                    existing.last_seen = (
+                        incoming_last if existing.last_seen is None else max(existing.last_seen, incoming_last)
+                    )
+
 
 class StatsEntry:
     """
@@ -610,6 +798,15 @@ class StatsEntry:
             self.response_times, self.num_requests - self.num_none_requests, percent
         )
 
+    def get_response_time_percentiles(self, percents: list[float]) -> list[int]:
+        """
+        Same as get_response_time_percentile, but for several percentiles at once (which is a lot cheaper
+        than calculating them one by one for entries with many distinct response times)
+        """
+        return calculate_response_time_percentiles(
+            self.response_times, self.num_requests - self.num_none_requests, percents
+        )
+
     def get_current_response_time_percentile(self, percent: float) -> int | None:
         """
         Calculate the *current* response time for a certain percentile. We use a sliding
@@ -662,7 +859,7 @@ class StatsEntry:
 
         return tpl % (
             (self.method or "", self.name)
-            + tuple(self.get_response_time_percentile(p) for p in PERCENTILES_TO_REPORT)
+            + tuple(self.get_response_time_percentiles(PERCENTILES_TO_REPORT))
             + (self.num_requests,)
         )
 
@@ -689,8 +886,10 @@ class StatsEntry:
 
     def to_dict(self, escape_string_values=False) -> dict[str, int | float | str]:
         response_time_percentiles = {
-            f"response_time_percentile_{percentile}": self.get_response_time_percentile(percentile)
-            for percentile in PERCENTILES_TO_STATISTICS
+            f"response_time_percentile_{percentile}": value
+            for percentile, value in zip(
+                PERCENTILES_TO_STATISTICS, self.get_response_time_percentiles(PERCENTILES_TO_STATISTICS)
+            )
         }
 
         return {
@@ -711,6 +910,9 @@ class StatsEntry:
         }
 
 
+_error_key_cache: dict[tuple, str] = {}
+
+
 class StatsError:
     def __init__(
         self,
@@ -728,8 +930,8 @@ class StatsError:
         self.first_seen = first_seen
         self.last_seen = last_seen
 
-    @classmethod
-    def parse_error(cls, error: Exception | str | None) -> str:
+    @staticmethod
+    def _strip_address(error: Exception | str | None) -> str:
         if isinstance(error, str):
             string_error = error
         else:
@@ -745,10 +947,36 @@ class StatsError:
         hex_address = string_error[start:end]
         return string_error.replace(hex_address, "0x....")
 
+    @classmethod
+    def parse_error(cls, error: Exception | str | None) -> str:
+        string_error = cls._strip_address(error)
+        for pattern, replacement in ERROR_NORMALIZERS:
+            string_error = re.sub(pattern, replacement, string_error)
+        return string_error
+
     @classmethod
     def create_key(cls, method: str, name: str, error: Exception | str | None) -> str:
-        key = f"{method}.{name}.{StatsError.parse_error(error)!r}"
-        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+        # Exceptions with the default repr are identified by their type and args, which is a lot cheaper than
+        # formatting and hashing the error message every time (something that happens for every failed request)
+        cache_key: tuple | None
+        if isinstance(error, BaseException) and type(error).__repr__ is BaseException.__repr__:
+            cache_key = (method, name, type(error), error.args)
+        elif isinstance(error, str):
+            cache_key = (method, name, str, error)
+        else:
+            cache_key = None
+        try:
+            if cache_key is not None and (key := _error_key_cache.get(cache_key)) is not None:
+                return key
+        except TypeError:  # unhashable args
+            cache_key = None
+
+        key = hashlib.sha256(f"{method}.{name}.{StatsError.parse_error(error)!r}".encode()).hexdigest()
+        if cache_key is not None:
+            if len(_error_key_cache) >= ERROR_KEY_CACHE_SIZE:
+                _error_key_cache.clear()
+            _error_key_cache[cache_key] = key
+        return key
 
     def occurred(self) -> None:
         self.occurrences += 1
@@ -836,25 +1064,14 @@ def setup_distributed_stats_event_listeners(events: Events, stats: RequestStats)
     def on_worker_report(client_id: str, data: dict[str, Any]) -> None:
         for stats_data in data["stats"]:
             entry = StatsEntry.unserialize(stats_data, stats)
-            request_key = (entry.name, entry.method)
+            request_key = stats.entry_key(entry.name, entry.method)
             if request_key not in stats.entries:
-                stats.entries[request_key] = StatsEntry(stats, entry.name, entry.method, use_response_times_cache=True)
+                stats.entries[request_key] = StatsEntry(
+                    stats, request_key[0], request_key[1], use_response_times_cache=True
+                )
             stats.entries[request_key].extend(entry)
 
-        for error_key, error in data["errors"].items():
-            if error_key not in stats.errors:
-                stats.errors[error_key] = StatsError.unserialize(error)
-            else:
-                existing = stats.errors[error_key]
-                existing.occurrences += error["occurrences"]
-                if incoming_first := error.get("first_seen"):
-                    existing.first_seen = (
-                        incoming_first if existing.first_seen is None else min(existing.first_seen, incoming_first)
-                    )
-                if incoming_last := error.get("last_seen"):
-                    existing.last_seen = (
-                        incoming_last if existing.last_seen is None else max(existing.last_seen, incoming_last)
-                    )
+        stats.extend_errors(data["errors"])
 
         stats.total.extend(StatsEntry.unserialize(data["stats_total"], stats))
 
@@ -958,29 +1175,61 @@ def stats_printer(stats: RequestStats) -> Callable[[], None]:
 
 
 def sort_stats(stats: dict[Any, S]) -> list[S]:
+    if isinstance(stats, EntriesDict):
+        return [stats[key] for key in stats.sorted_keys]
     return [stats[key] for key in sorted(stats.keys())]
 
 
-def update_stats_history(runner: Runner, timestamp: str | None = None) -> None:
+def _endpoint_history_values(entry: StatsEntry) -> dict[str, float]:
+    return {
+        "current_rps": entry.current_rps or 0,
+        "current_fail_per_sec": entry.current_fail_per_sec or 0,
+        **{
+            f"response_time_percentile_{percentile}": entry.get_current_response_time_percentile(percentile) or 0
+            for percentile in PERCENTILES_TO_CHART_PER_ENDPOINT
+        },
+    }
+
+
+def update_endpoint_history(stats: RequestStats, timestamp: float, since: float | None) -> None:
+    """
+    Record the current stats of all endpoints that have been active since the last update (and keep recording
+    endpoints that are already tracked, so that their charts drop to zero when they become inactive)
+    """
+    endpoint_history = stats.endpoint_history
+
+    def is_active(entry: StatsEntry) -> bool:
+        return bool(entry.last_request_timestamp) and (since is None or entry.last_request_timestamp > since)
+
+    # tracked endpoints first, so that they aren't replaced by new ones if they are still active
+    for key in list(endpoint_history.series):
+        if entry := stats.entries.get(key):
+            endpoint_history.append(timestamp, key, _endpoint_history_values(entry), is_active(entry))
+    for key, entry in stats.entries.items():
+        if key not in endpoint_history.series and is_active(entry):
+            if not endpoint_history.append(timestamp, key, _endpoint_history_values(entry)):
+                break
+
+
+def update_stats_history(runner: Runner, timestamp: float | None = None) -> None:
     stats = runner.stats
-    timestamp = timestamp or format_utc_timestamp(time.time())
+    timestamp = timestamp or time.time()
+    update_endpoint_history(stats, timestamp, stats.history.last_timestamp)
     current_response_time_percentiles = {
-        f"response_time_percentile_{percentile}": [
-            timestamp,
-            stats.total.get_current_response_time_percentile(percentile) or 0,
-        ]
+        f"response_time_percentile_{percentile}": stats.total.get_current_response_time_percentile(percentile) or 0
         for percentile in PERCENTILES_TO_CHART
     }
 
-    r = {
-        **current_response_time_percentiles,
-        "current_rps": [timestamp, stats.total.current_rps or 0],
-        "current_fail_per_sec": [timestamp, stats.total.current_fail_per_sec or 0],
-        "total_avg_response_time": [timestamp, proper_round(stats.total.avg_response_time, digits=2)],
-        "user_count": [timestamp, runner.user_count or 0],
-        "time": timestamp,
-    }
-    stats.history.append(r)
+    stats.history.append(
+        timestamp,
+        {
+            **current_response_time_percentiles,
+            "current_rps": stats.total.current_rps or 0,
+            "current_fail_per_sec": stats.total.current_fail_per_sec or 0,
+            "total_avg_response_time": proper_round(stats.total.avg_response_time, digits=2),
+            "user_count": runner.user_count or 0,
+        },
+    )
 
 
 def stats_history(runner: Runner) -> None:
@@ -1037,13 +1286,56 @@ class StatsCSV:
             "Nodes",
         ]
 
+        # (method, name) -> (state of the entry, cells of its requests csv row except the rates, percentiles).
+        # Calculating percentiles means iterating over all response time buckets, so rows are only rendered again
+        # for entries that have changed.
+        self._row_cache: dict[tuple[str | None, str], tuple[tuple, list, list[int]]] = {}
+
+    def _row_fields(self, stats_entry: StatsEntry) -> tuple[list, list[int]]:
+        """Cells of an entry's requests csv row (except Requests/s and Failures/s) and its percentiles"""
+        key = (stats_entry.method, stats_entry.name)
+        state = (
+            stats_entry.num_requests,
+            stats_entry.num_failures,
+            stats_entry.total_response_time,
+            stats_entry.total_content_length,
+        )
+        cached = self._row_cache.get(key)
+        if cached is not None and cached[0] == state:
+            return cached[1], cached[2]
+        cells = [
+            stats_entry.method,
+            stats_entry.name,
+            stats_entry.num_requests,
+            stats_entry.num_failures,
+            stats_entry.median_response_time,
+            stats_entry.avg_response_time,
+            stats_entry.min_response_time or 0,
+            stats_entry.max_response_time,
+            stats_entry.avg_content_length,
+        ]
+        if stats_entry.num_requests:
+            percentiles = [int(p or 0) for p in stats_entry.get_response_time_percentiles(self.percentiles_to_report)]
+        else:
+            percentiles = self.percentiles_na
+        self._row_cache[key] = (state, cells, percentiles)
+        return cells, percentiles
+
+    def _evict_stale_rows(self) -> None:
+        """Forget rows of entries that no longer exist (e.g. after the stats were reset)"""
+        stats = self.environment.stats
+        if len(self._row_cache) > len(stats.entries) + 1:
+            for key in [key for key in self._row_cache if key[::-1] not in stats.entries]:
+                if key != (stats.total.method, stats.total.name):
+                    del self._row_cache[key]
+
     def _percentile_fields(self, stats_entry: StatsEntry, use_current: bool = False) -> list[str] | list[int]:
         if not stats_entry.num_requests:
             return self.percentiles_na
         elif use_current:
             return [int(stats_entry.get_current_response_time_percentile(x) or 0) for x in self.percentiles_to_report]
         else:
-            return [int(stats_entry.get_response_time_percentile(x) or 0) for x in self.percentiles_to_report]
+            return self._row_fields(stats_entry)[1]
 
     def requests_csv(self, csv_writer: CSVWriter) -> None:
         """Write requests csv with header and data rows."""
@@ -1053,25 +1345,11 @@ class StatsCSV:
     def _requests_data_rows(self, csv_writer: CSVWriter) -> None:
         """Write requests csv data row, excluding header."""
         stats = self.environment.stats
+        self._evict_stale_rows()
         for stats_entry in chain(sort_stats(stats.entries), [stats.total]):
-            csv_writer.writerow(
-                chain(
-                    [
-                        stats_entry.method,
-                        stats_entry.name,
-                        stats_entry.num_requests,
-                        stats_entry.num_failures,
-                        stats_entry.median_response_time,
-                        stats_entry.avg_response_time,
-                        stats_entry.min_response_time or 0,
-                        stats_entry.max_response_time,
-                        stats_entry.avg_content_length,
-                        stats_entry.total_rps,
-                        stats_entry.total_fail_per_sec,
-                    ],
-                    self._percentile_fields(stats_entry),
-                )
-            )
+            cells, percentiles = self._row_fields(stats_entry)
+            # the rates of every entry change with stats.last_request_timestamp, so they are never cached
+            csv_writer.writerow(chain(cells, (stats_entry.total_rps, stats_entry.total_fail_per_sec), percentiles))
 
     def failures_csv(self, csv_writer: CSVWriter) -> None:
         csv_writer.writerow(self.failures_columns)
@@ -1106,7 +1384,15 @@ class StatsCSV:
 
 
 class StatsCSVFileWriter(StatsCSV):
-    """Write statistics to CSV files"""
+    """
+    Write statistics to CSV files
+
+    _stats_history.csv is appended to every CSV_STATS_INTERVAL_SEC. The summary files (_stats.csv, _failures.csv
+    and _exceptions.csv) are rewritten whenever their contents have changed, or, if summary_at_end is set,
+    only once when the files are closed. Note that as long as requests are being made, _stats.csv changes every
+    interval, because the rates of all rows depend on the time of the last request. Only the rows of entries
+    that received requests are rendered from scratch though, the others just get their rates updated.
+    """
 
     def __init__(
         self,
@@ -1114,10 +1400,12 @@ class StatsCSVFileWriter(StatsCSV):
         percentiles_to_report: list[float],
         base_filepath: str,
         full_history: bool = False,
+        summary_at_end: bool = False,
     ):
         super().__init__(environment, percentiles_to_report)
         self.base_filepath = base_filepath
         self.full_history = full_history
+        self.summary_at_end = summary_at_end
 
         self.requests_csv_filehandle = open(self.base_filepath + "_stats.csv", "w")
         self.requests_csv_writer = csv.writer(self.requests_csv_filehandle)
@@ -1133,6 +1421,12 @@ class StatsCSVFileWriter(StatsCSV):
         self.exceptions_csv_writer = csv.writer(self.exceptions_csv_filehandle)
         self.exceptions_csv_data_start: int = 0
 
+        self.requests_csv_data_start: int = 0
+        # what the summary files were last written from, used to skip rewriting files that haven't changed
+        self._requests_version: tuple | None = None
+        self._failures_version: tuple | None = None
+        self._exceptions_version: tuple | None = None
+
         self.stats_history_csv_columns = [
             "Timestamp",
             "User Count",
@@ -1158,7 +1452,7 @@ class StatsCSVFileWriter(StatsCSV):
 
         # Write header row for all files and save position for non-append files
         self.requests_csv_writer.writerow(self.requests_csv_columns)
-        requests_csv_data_start = self.requests_csv_filehandle.tell()
+        self.requests_csv_data_start = self.requests_csv_filehandle.tell()
 
         self.stats_history_csv_writer.writerow(self.stats_history_csv_columns)
 
@@ -1174,19 +1468,9 @@ class StatsCSVFileWriter(StatsCSV):
             while True:
                 now = time.time()
 
-                self.requests_csv_filehandle.seek(requests_csv_data_start)
-                self._requests_data_rows(self.requests_csv_writer)
-                self.requests_csv_filehandle.truncate()
-
                 self._stats_history_data_rows(self.stats_history_csv_writer, now)
-
-                self.failures_csv_filehandle.seek(self.failures_csv_data_start)
-                self._failures_data_rows(self.failures_csv_writer)
-                self.failures_csv_filehandle.truncate()
-
-                self.exceptions_csv_filehandle.seek(self.exceptions_csv_data_start)
-                self._exceptions_data_rows(self.exceptions_csv_writer)
-                self.exceptions_csv_filehandle.truncate()
+                if not self.summary_at_end:
+                    self.write_summary_files()
 
                 if now - last_flush_time > CSV_STATS_FLUSH_INTERVAL_SEC:
                     self.requests_flush()
@@ -1199,6 +1483,47 @@ class StatsCSVFileWriter(StatsCSV):
         except KeyboardInterrupt as e:
             logger.debug(e, exc_info=True)
 
+    def write_summary_files(self, force: bool = False) -> None:
+        """Rewrite the data rows of the summary files whose contents have changed since they were last written"""
+        stats = self.environment.stats
+        # any change to an entry also updates the total, and the rates of all entries depend on the last request
+        requests_version = (
+            id(stats.entries),
+            len(stats.entries),
+            stats.total.num_requests,
+            stats.total.num_failures,
+            stats.total.start_time,
+            stats.last_request_timestamp,
+        )
+        if force or requests_version != self._requests_version:
+            self.requests_csv_filehandle.seek(self.requests_csv_data_start)
+            self._requests_data_rows(self.requests_csv_writer)
+            self.requests_csv_filehandle.truncate()
+            self._requests_version = requests_version
+
+        failures_version = (
+            id(stats.errors),
+            len(stats.errors),
+            sum(e.occurrences for e in stats.errors.values()),
+        )
+        if force or failures_version != self._failures_version:
+            self.failures_csv_filehandle.seek(self.failures_csv_data_start)
+            self._failures_data_rows(self.failures_csv_writer)
+            self.failures_csv_filehandle.truncate()
+            self._failures_version = failures_version
+
+        exceptions = self.environment.runner.exceptions if self.environment.runner is not None else {}
+        exceptions_version = (
+            len(exceptions),
+            sum(exc["count"] for exc in exceptions.values()),
+            sum(len(exc["nodes"]) for exc in exceptions.values()),
+        )
+        if force or exceptions_version != self._exceptions_version:
+            self.exceptions_csv_filehandle.seek(self.exceptions_csv_data_start)
+            self._exceptions_data_rows(self.exceptions_csv_writer)
+            self.exceptions_csv_filehandle.truncate()
+            self._exceptions_version = exceptions_version
+
     def _stats_history_data_rows(self, csv_writer: CSVWriter, now: float) -> None:
         """
         Write CSV rows with the *current* stats. By default only includes the
@@ -1215,6 +1540,7 @@ class StatsCSVFileWriter(StatsCSV):
             stats_entries = sort_stats(stats.entries)
 
         for stats_entry in chain(stats_entries, [stats.total]):
+            median = self._row_fields(stats_entry)[0][4]
             csv_writer.writerow(
                 chain(
                     (
@@ -1229,7 +1555,7 @@ class StatsCSVFileWriter(StatsCSV):
                     (
                         stats_entry.num_requests,
                         stats_entry.num_failures,
-                        stats_entry.median_response_time,
+                        median,
                         stats_entry.avg_response_time,
                         stats_entry.min_response_time or 0,
                         stats_entry.max_response_time,
@@ -1251,6 +1577,8 @@ class StatsCSVFileWriter(StatsCSV):
         self.exceptions_csv_filehandle.flush()
 
     def close_files(self) -> None:
+        if self.summary_at_end and not self.requests_csv_filehandle.closed:
+            self.write_summary_files(force=True)
         self.requests_csv_filehandle.close()
         self.stats_history_csv_filehandle.close()
         self.failures_csv_filehandle.close()
@@ -0,0 +1,117 @@
+"""Tests for locust.contrib.columnar_request_logger."""
+
+from locust.env import Environment
+from locust.test.test_csv_request_logger import _fire
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+try:
+    from locust.contrib.columnar_request_logger import ColumnarRequestLogger, read_samples
+except ImportError:
+    ColumnarRequestLogger = None  # type: ignore
+
+
+@unittest.skipIf(ColumnarRequestLogger is None, reason="pyarrow is not installed")
+class TestColumnarRequestLogger(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self._tmpdir.name, "samples")
+        self.env = Environment(events=None, catch_exceptions=False)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _run(self, log, requests):
+        log.register(self.env)
+        self.env.events.test_start.fire(environment=self.env)
+        for overrides in requests:
+            _fire(self.env, **overrides)
+        self.env.events.test_stop.fire(environment=self.env)
+
+    def test_arrow(self):
+        resp = MagicMock()
+        resp.status_code = 200
+        log = ColumnarRequestLogger(self.directory, batch_size=2)
+        self._run(
+            log,
+            [
+                dict(response=resp),
+                dict(name="/b", request_type="POST", exception=ConnectionError("timeout")),
+                dict(name="/c", response_time=None),
+            ],
+        )
+
+        self.assertEqual(["local_001.arrow"], os.listdir(self.directory))
+        rows = read_samples(self.directory).to_pylist()
+        self.assertEqual(3, len(rows))
+        self.assertEqual(
+            {
+                "timestamp": 1_700_000_000.0,
+                "request_type": "GET",
+                "name": "/test",
+                "response_time_ms": 123.45,
+                "response_length": 512,
+                "status_code": 200,
+                "exception": None,
+            },
+            rows[0],
+        )
+        self.assertEqual("POST", rows[1]["request_type"])
+        self.assertEqual(0, rows[1]["status_code"])
+        self.assertEqual("timeout", rows[1]["exception"])
+        self.assertEqual("/c", rows[2]["name"])
+
+    def test_parquet(self):
+        log = ColumnarRequestLogger(self.directory, format="parquet", batch_size=100)
+        self._run(log, [dict(name=f"/route/{i}") for i in range(250)])
+
+        table = read_samples(self.directory)
+        self.assertEqual(250, table.num_rows)
+        self.assertEqual("/route/249", table.column("name")[249].as_py())
+
+    def test_new_file_per_run(self):
+        log = ColumnarRequestLogger(self.directory)
+        self._run(log, [dict()])
+        self.env.events.test_start.fire(environment=self.env)
+        _fire(self.env)
+        _fire(self.env)
+        self.env.events.quitting.fire(environment=self.env, exitcode=0)
+
+        self.assertEqual(["local_001.arrow", "local_002.arrow"], sorted(os.listdir(self.directory)))
+        self.assertEqual(1, read_samples(self.directory, run=1).num_rows)
+        self.assertEqual(2, read_samples(self.directory, run=2).num_rows)
+
+    def test_no_file_without_requests(self):
+        self._run(ColumnarRequestLogger(self.directory), [])
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_requests_outside_of_a_run_are_ignored(self):
+        log = ColumnarRequestLogger(self.directory)
+        log.register(self.env)
+        _fire(self.env)
+        log.close()
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_write_errors_are_logged(self):
+        log = ColumnarRequestLogger(self.directory, batch_size=1)
+        with (
+            mock.patch.object(log, "_open_writer", side_effect=OSError("disk full")),
+            self.assertLogs("locust.contrib.columnar_request_logger", "ERROR") as logs,
+        ):
+            self._run(log, [dict(), dict()])
+
+        self.assertEqual(2, len(logs.records))
+        self.assertIn("disk full", logs.output[0])
+        self.assertEqual([], log._pending)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            ColumnarRequestLogger(self.directory, format="xlsx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+from locust.env import Environment
+
+import itertools
+import time
+import unittest
+
+import gevent
+from gevent.server import DatagramServer
+
+try:
+    from locust.contrib import dns as locust_dns
+
+    import dns.message
+    import dns.rdatatype
+except ImportError:
+    locust_dns = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        gevent.sleep(0.01)
+
+
+class FakeNameserver:
+    """Answers every query with an empty NOERROR response, except every tenth one, which is dropped"""
+
+    def __init__(self, drop_every=10):
+        self.drop_every = drop_every
+        self.received = []
+        self.server = DatagramServer(("127.0.0.1", 0), self._handle)
+        self.server.start()
+        self.port = self.server.server_port
+
+    def _handle(self, data, address):
+        query = dns.message.from_wire(data)
+        self.received.append(query)
+        if self.drop_every and len(self.received) % self.drop_every == 0:
+            return
+        self.server.sendto(dns.message.make_response(query).to_wire(), address)
+
+    def stop(self):
+        self.server.stop()
+
+
+@unittest.skipIf(locust_dns is None, reason="dnspython is not installed")
+class TestPreparedQuery(unittest.TestCase):
+    def test_wire(self):
+        query = locust_dns.PreparedQuery("example.com", "AAAA")
+        self.assertEqual("AAAA", query.name)
+        message = dns.message.from_wire((1234).to_bytes(2, "big") + query.wire)
+        self.assertEqual(1234, message.id)
+        self.assertEqual("example.com.", message.question[0].name.to_text())
+        self.assertEqual(dns.rdatatype.AAAA, message.question[0].rdtype)
+
+    def test_name(self):
+        self.assertEqual("lookup", locust_dns.PreparedQuery("example.com", name="lookup").name)
+
+
+@unittest.skipIf(locust_dns is None, reason="dnspython is not installed")
+class TestDNSLoadEngine(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self.nameserver = FakeNameserver()
+
+    def tearDown(self):
+        self.nameserver.stop()
+        super().tearDown()
+
+    def _engine(self, **kwargs):
+        engine = locust_dns.DNSLoadEngine(
+            self.environment.events.request, "127.0.0.1", port=self.nameserver.port, **kwargs
+        )
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_responses_and_timeouts(self):
+        engine = self._engine(timeout=0.2, max_in_flight=100)
+        engine.send_many([locust_dns.PreparedQuery("example.com")] * 50)
+        stats = self.environment.stats
+        wait_for(lambda: stats.total.num_requests == 50)
+        self.assertEqual(45, stats.get("A NOERROR", "DNS").num_requests)
+        self.assertEqual(0, stats.get("A NOERROR", "DNS").num_failures)
+        self.assertEqual(5, stats.get("A TIMEOUT", "DNS").num_failures)
+        self.assertEqual([{}] * 4, engine._pending)
+        # every query got a slot back
+        self.assertEqual(100, engine._in_flight.counter)
+
+    def test_id_wraparound(self):
+        self.nameserver.drop_every = 1  # keep all the queries pending
+        engine = self._engine(sockets=1)
+        engine._next_ids[0] = itertools.count(0xFFFE)
+        query = locust_dns.PreparedQuery("example.com")
+        engine.send(query)
+        engine.send(query)
+        engine.send(query)
+        # the ids wrap around after 0xFFFF
+        self.assertEqual([0xFFFE, 0xFFFF, 0], list(engine._pending[0]))
+
+        # ids still in use are skipped
+        engine._next_ids[0] = itertools.count(0xFFFF)
+        engine.send(query)
+        self.assertEqual([0xFFFE, 0xFFFF, 0, 1], list(engine._pending[0]))
+        wait_for(lambda: len(self.nameserver.received) == 4)
+
+    def test_expire_in_send_order(self):
+        self.nameserver.drop_every = 1
+        engine = self._engine(sockets=1, timeout=0.4)
+        engine.send(locust_dns.PreparedQuery("example.com", name="first"))
+        gevent.sleep(0.25)
+        engine.send(locust_dns.PreparedQuery("example.com", name="second"))
+        stats = self.environment.stats
+        wait_for(lambda: ("first TIMEOUT", "DNS") in stats.entries)
+        # the later query has not expired yet, and is still pending
+        self.assertNotIn(("second TIMEOUT", "DNS"), stats.entries)
+        self.assertEqual(["second"], [query.name for query, _, _ in engine._pending[0].values()])
+        wait_for(lambda: ("second TIMEOUT", "DNS") in stats.entries)
+        self.assertEqual({}, engine._pending[0])
+
+
+@unittest.skipIf(locust_dns is None, reason="dnspython is not installed")
+class TestDNSUser(LocustTestCase):
+    def test_get_engine(self):
+        nameserver = FakeNameserver(drop_every=0)
+        self.addCleanup(nameserver.stop)
+
+        class MyUser(locust_dns.DNSUser):
+            pass
+
+        environment = Environment(user_classes=[MyUser])
+        user = MyUser(environment)
+        engine = user.get_engine("127.0.0.1", port=nameserver.port)
+        self.assertIs(engine, MyUser(environment).get_engine("127.0.0.1", port=nameserver.port))
+        self.assertIsNot(engine, user.get_engine("127.0.0.1", port=nameserver.port, timeout=1.0))
+        self.assertIs(
+            user.get_engine("127.0.0.1", port=nameserver.port, failure_rcodes=[2]),
+            user.get_engine("127.0.0.1", port=nameserver.port, failure_rcodes=[2]),
+        )
+
+        environment.events.test_stop.fire(environment=environment)
+        self.assertEqual({}, locust_dns._engines)
+        self.assertTrue(all(sock.closed for sock in engine._sockets))
+        # a new engine is created for the next run
+        self.assertIsNot(engine, user.get_engine("127.0.0.1", port=nameserver.port))
+        environment.events.test_stop.fire(environment=environment)
+        self.assertEqual({}, locust_dns._engines)
@@ -0,0 +1,125 @@
+import unittest
+from types import SimpleNamespace
+
+try:
+    from locust.contrib import grpc_user
+
+    import grpc
+except ImportError:
+    grpc_user = None  # type: ignore
+
+from .testcases import LocustTestCase
+from .util import wait
+
+METHOD = "/hello.HelloService/SayHello"
+
+
+class FakeRpcError(grpc.RpcError if grpc_user is not None else Exception):  # type: ignore[misc]
+    pass
+
+
+class FakeCall:
+    def __init__(self, result=None, exception=None):
+        self._result = result
+        self._exception = exception
+
+    def result(self):
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class FakeStream:
+    def __init__(self, messages, exception=None):
+        self._messages = iter(messages)
+        self._exception = exception
+        self.cancelled = False
+
+    def __next__(self):
+        try:
+            return next(self._messages)
+        except StopIteration:
+            if self._exception is not None:
+                raise self._exception
+            raise
+
+    def cancel(self):
+        self.cancelled = True
+        return True
+
+    def code(self):
+        return "OK"
+
+
+@unittest.skipIf(grpc_user is None, reason="grpcio is not installed")
+class TestLocustInterceptor(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self.interceptor = grpc_user.LocustInterceptor(self.environment)
+        self.details = SimpleNamespace(method=METHOD)
+        self.requests = []
+        self.environment.events.request.add_listener(lambda **kwargs: self.requests.append(kwargs))
+
+    def test_unary(self):
+        call = FakeCall(b"hello")
+        self.assertIs(call, self.interceptor.intercept_unary_unary(lambda details, request: call, self.details, b"x"))
+        self.assertEqual(1, len(self.requests))
+        self.assertEqual(grpc_user.REQUEST_TYPE, self.requests[0]["request_type"])
+        self.assertEqual(METHOD, self.requests[0]["name"])
+        self.assertEqual(5, self.requests[0]["response_length"])
+        self.assertEqual(b"hello", self.requests[0]["response"])
+        self.assertIsNone(self.requests[0]["exception"])
+
+    def test_unary_failure(self):
+        error = FakeRpcError("unavailable")
+        call = FakeCall(exception=error)
+        self.interceptor.intercept_stream_unary(lambda details, requests: call, self.details, iter([b"x"]))
+        self.assertIs(error, self.requests[0]["exception"])
+        self.assertIsNone(self.requests[0]["response"])
+        self.assertEqual(1, self.environment.stats.get(METHOD, grpc_user.REQUEST_TYPE).num_failures)
+
+    def _stream(self, stream):
+        return self.interceptor.intercept_unary_stream(lambda details, request: stream, self.details, b"x")
+
+    def test_stream(self):
+        call = self._stream(FakeStream([b"a", b"bb"]))
+        wait(0.01)
+        self.assertEqual([b"a", b"bb"], list(call))
+        self.assertEqual("OK", call.code())
+
+        stats = self.environment.stats
+        messages = stats.get(METHOD, grpc_user.MESSAGE_REQUEST_TYPE)
+        self.assertEqual(2, messages.num_requests)
+        self.assertEqual(3, messages.total_content_length)
+        # the first message is timed from the start of the call
+        self.assertLess(10, messages.max_response_time)
+        self.assertEqual(1, stats.get(METHOD, grpc_user.REQUEST_TYPE).num_requests)
+        self.assertEqual({"messages": 2}, self.requests[-1]["context"])
+        self.assertEqual(0, stats.total.num_failures)
+
+        # the call is only logged once
+        self.assertRaises(StopIteration, next, call)
+        self.assertEqual(1, stats.get(METHOD, grpc_user.REQUEST_TYPE).num_requests)
+
+    def test_stream_failure(self):
+        error = FakeRpcError("reset")
+        call = self.interceptor.intercept_stream_stream(
+            lambda details, requests: FakeStream([b"a"], error), self.details, iter([b"x"])
+        )
+        with self.assertRaises(FakeRpcError):
+            list(call)
+        self.assertIs(error, self.requests[-1]["exception"])
+        self.assertEqual({"messages": 1}, self.requests[-1]["context"])
+
+    def test_stream_cancel(self):
+        stream = FakeStream([b"a", b"b"])
+        call = self._stream(stream)
+        next(call)
+        self.assertTrue(call.cancel())
+        self.assertTrue(stream.cancelled)
+        entry = self.environment.stats.get(METHOD, grpc_user.REQUEST_TYPE)
+        self.assertEqual(1, entry.num_failures)
+        self.assertIsInstance(self.requests[-1]["exception"], grpc.FutureCancelledError)
+        # cancelling again doesn't log the call twice
+        call.cancel()
+        self.assertEqual(1, entry.num_requests)
@@ -0,0 +1,164 @@
+from locust import journal
+from locust.env import Environment
+
+import csv
+import json
+import os
+import tempfile
+from unittest import mock
+
+from .testcases import LocustTestCase
+
+
+class TestJournal(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmpdir.name, "run.journal")
+        self.stats = self.environment.stats
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+        super().tearDown()
+
+    def _journal_path(self, name):
+        return os.path.join(self._tmpdir.name, name)
+
+    def _load(self, *paths, compare=False):
+        environment = Environment()
+        environment.create_local_runner()
+        journal.load_journals(environment, [journal.read_journal(path) for path in paths], compare=compare)
+        return environment
+
+    def test_write_and_read(self):
+        writer = journal.JournalWriter(self.environment, self.path)
+        self.stats.log_request("GET", "/a", 100, 10)
+        self.stats.log_request("GET", "/b", 200, 10)
+        self.stats.log_error("GET", "/b", "oops")
+        self.runner.log_exception("local", "boom", "Traceback...")
+        self.stats.history.append(1000.0, {"current_rps": 2.0, "user_count": 1})
+        writer.write_snapshot()
+        # only /a changes, but the journal must still contain the latest version of both entries
+        self.stats.log_request("GET", "/a", 300, 10)
+        self.stats.history.append(1005.0, {"current_rps": 3.0, "user_count": 1})
+        writer.close()
+        writer.close()
+
+        data = journal.read_journal(self.path)
+        self.assertTrue(data.complete)
+        self.assertEqual(2, data.entries[("/a", "GET")]["num_requests"])
+        self.assertEqual(1, data.entries[("/b", "GET")]["num_requests"])
+        self.assertEqual(3, data.total["num_requests"])
+        self.assertEqual(1, len(data.errors))
+        self.assertEqual(1, len(data.exceptions))
+        self.assertEqual([1000.0, 1005.0], [timestamp for timestamp, _ in data.history])
+
+        environment = self._load(self.path)
+        entry = environment.stats.get("/a", "GET")
+        self.assertEqual(2, entry.num_requests)
+        self.assertEqual(300, entry.max_response_time)
+        self.assertEqual(3, environment.stats.total.num_requests)
+        self.assertEqual(1, environment.stats.total.num_failures)
+        self.assertEqual(["oops"], [e.error for e in environment.stats.errors.values()])
+        self.assertEqual({"local"}, list(environment.runner.exceptions.values())[0]["nodes"])
+        self.assertEqual(2, len(environment.stats.history))
+
+    def test_snapshots_are_deltas(self):
+        writer = journal.JournalWriter(self.environment, self.path)
+        records = []
+        with mock.patch.object(writer, "_write", side_effect=lambda *record: records.append(record)):
+            with mock.patch("time.time", return_value=1000.0):
+                self.stats.log_request("GET", "/a", 100, 10)
+            writer.write_snapshot()
+            with mock.patch("time.time", return_value=1001.0):
+                self.stats.log_request("GET", "/a", 200, 10)
+                self.stats.log_request("GET", "/a", 200, 10)
+            writer.write_snapshot()
+            writer.write_snapshot()
+
+        first, second, third = (data for record_type, data in records)
+        self.assertEqual({100: 1}, first["entries"][0]["response_times"])
+        self.assertEqual({200: 2}, second["entries"][0]["response_times"])
+        self.assertEqual({1000: 1, 1001: 2}, second["entries"][0]["num_reqs_per_sec"])
+        self.assertEqual({200: 2}, second["total"]["response_times"])
+        self.assertEqual([], third["entries"])
+        self.assertIsNone(third["total"])
+
+        for record in records:
+            writer._write(*record)
+        writer.close()
+        data = journal.read_journal(self.path)
+        self.assertEqual({100: 1, 200: 2}, data.entries[("/a", "GET")]["response_times"])
+        self.assertEqual({1000: 1, 1001: 2}, data.entries[("/a", "GET")]["num_reqs_per_sec"])
+        self.assertEqual(3, data.total["num_requests"])
+        self.assertEqual({100: 1, 200: 2}, data.total["response_times"])
+
+    def test_reset(self):
+        writer = journal.JournalWriter(self.environment, self.path)
+        self.stats.log_request("GET", "/a", 100, 10)
+        writer.write_snapshot()
+        self.stats.clear_all()
+        self.stats.log_request("GET", "/b", 100, 10)
+        writer.close()
+
+        data = journal.read_journal(self.path)
+        self.assertEqual([("/b", "GET")], list(data.entries))
+
+    def test_incomplete_journal(self):
+        writer = journal.JournalWriter(self.environment, self.path)
+        self.stats.log_request("GET", "/a", 100, 10)
+        writer.write_snapshot()
+        self.stats.log_request("GET", "/a", 100, 10)
+        writer.write_snapshot()
+        writer.file.close()
+        # simulate a crash in the middle of writing the last record
+        with open(self.path, "r+b") as file:
+            file.truncate(os.path.getsize(self.path) - 5)
+
+        data = journal.read_journal(self.path)
+        self.assertFalse(data.complete)
+        self.assertEqual(1, data.entries[("/a", "GET")]["num_requests"])
+
+    def test_not_a_journal(self):
+        with open(self.path, "wb") as file:
+            file.write(b"something else")
+        with self.assertRaises(ValueError):
+            journal.read_journal(self.path)
+
+    def test_merge_and_compare(self):
+        paths = []
+        for name, response_time in (("run1", 100), ("run2", 200)):
+            environment = Environment()
+            environment.create_local_runner()
+            environment.stats.log_request("GET", "/a", response_time, 10)
+            environment.stats.log_error("GET", "/a", "oops")
+            paths.append(self._journal_path(f"{name}.journal"))
+            journal.JournalWriter(environment, paths[-1]).close()
+
+        merged = self._load(*paths)
+        self.assertEqual(["/a"], [entry.name for entry in merged.stats.entries.values()])
+        self.assertEqual(2, merged.stats.get("/a", "GET").num_requests)
+        self.assertEqual([2], [e.occurrences for e in merged.stats.errors.values()])
+
+        compared = self._load(*paths, compare=True)
+        self.assertEqual(["[run1] /a", "[run2] /a"], sorted(entry.name for entry in compared.stats.entries.values()))
+        self.assertEqual(200, compared.stats.get("[run2] /a", "GET").max_response_time)
+        self.assertEqual(2, compared.stats.total.num_requests)
+        self.assertEqual(2, len(compared.stats.errors))
+
+    def test_report(self):
+        self.stats.log_request("GET", "/a", 100, 10)
+        self.stats.log_error("GET", "/a", "oops")
+        journal.JournalWriter(self.environment, self.path).close()
+        prefix = self._journal_path("report")
+
+        with mock.patch("locust.journal.setup_logging"):
+            self.assertEqual(0, journal.main([self.path, "--csv", prefix, "--json-file", prefix]))
+
+        with open(f"{prefix}_stats.csv") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(["/a", "Aggregated"], [row["Name"] for row in rows])
+        with open(f"{prefix}_failures.csv") as file:
+            self.assertEqual("oops", next(csv.DictReader(file))["Error"])
+        with open(f"{prefix}.json") as file:
+            self.assertEqual(1, json.load(file)[0]["num_requests"])
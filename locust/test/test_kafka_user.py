@@ -0,0 +1,26 @@
+import unittest
+from unittest import mock
+
+try:
+    from locust.contrib import kafka_user
+except ImportError:
+    kafka_user = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+
+@unittest.skipIf(kafka_user is None, reason="kafka-python is not installed")
+class TestKafkaUser(LocustTestCase):
+    def test_producers_are_flushed_on_test_stop(self):
+        class MyUser(kafka_user.KafkaUser):
+            pass
+
+        with mock.patch.object(kafka_user, "KafkaProducer") as producer_class, mock.patch.dict(kafka_user._producers):
+            users = [MyUser(self.environment) for _ in range(3)]
+            self.assertIs(users[0].client.producer, users[1].client.producer)
+            producer_class.assert_called_once()
+
+            for user in users:
+                user.on_stop()
+            self.environment.events.test_stop.fire(environment=self.environment)
+            producer_class.return_value.flush.assert_called_once_with()
@@ -1519,6 +1519,38 @@ class AnyUser(HttpUser):
                 tp.expect("The last worker quit, stopping test")
                 tp.not_expect_any("Traceback")
 
+    @unittest.skipIf(IS_WINDOWS, reason="--processes doesnt work on windows")
+    def test_processes_shared_memory_stats(self):
+        content = textwrap.dedent(
+            """
+            from locust import User, task, constant
+
+            class TestUser(User):
+                wait_time = constant(0.1)
+
+                @task
+                def my_task(self):
+                    self.environment.events.request.fire(
+                        request_type="GET",
+                        name="/shared",
+                        response_time=5,
+                        response_length=0,
+                        exception=None,
+                        context={},
+                    )
+            """
+        )
+        with mock_locustfile(content=content) as mocked:
+            with TestProcess(
+                f"locust -f {mocked.file_path} --processes 2 --shared-memory-stats --headless -u 2 -r 2 -t 5 --exit-code-on-error 0",
+                join_timeout=5,
+                expect_timeout=10,
+            ) as tp:
+                tp.expect("(index 1) reported as ready")
+                tp.expect("Shutting down (exit code 0)")
+                tp.not_expect_any("Traceback")
+        self.assertRegex("\n".join(tp.stderr_output), r"GET\s+/shared\s+[1-9]\d+ ")
+
     @unittest.skipIf(IS_WINDOWS, reason="--processes doesnt work on windows")
     def test_processes_autodetect(self):
         with mock_locustfile() as mocked:
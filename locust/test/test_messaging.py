@@ -0,0 +1,103 @@
+from locust.contrib.messaging import SENT_AT_HEADER, MessagingClient, get_sent_at
+
+import time
+from collections import namedtuple
+
+from .testcases import LocustTestCase
+from .util import wait
+
+Record = namedtuple("Record", ["topic", "value", "headers"])
+
+
+class LocalBroker:
+    """Stand-in for a broker, with a producer and consumer that have the same interface as kafka-python's"""
+
+    def __init__(self):
+        self.topics = {}
+        self.pending = []
+
+    def send(self, topic, value=None, key=None, headers=None):
+        if topic == "forbidden":
+            raise Exception("Not authorized")
+        future = Future()
+        self.topics.setdefault(topic, []).append(Record(topic, value, headers))
+        if topic == "failing":
+            future.fail(Exception("Broker error"))
+        else:
+            self.pending.append(future)
+        return future
+
+    def flush(self, timeout=None):
+        # acknowledge everything that has been sent
+        for future in self.pending:
+            future.succeed(None)
+        self.pending.clear()
+
+    def poll(self, timeout_ms=0, max_records=500):
+        records = [record for records in self.topics.values() for record in records][:max_records]
+        self.topics.clear()
+        return {0: records}
+
+    def close(self):
+        pass
+
+
+class Future:
+    def __init__(self):
+        self.callbacks = []
+        self.errbacks = []
+        self.exception = None
+
+    def add_callback(self, f):
+        self.callbacks.append(f)
+
+    def add_errback(self, f):
+        # like kafka-python, errbacks added to a future that has already failed are called immediately
+        if self.exception is not None:
+            f(self.exception)
+        else:
+            self.errbacks.append(f)
+
+    def succeed(self, value):
+        for f in self.callbacks:
+            f(value)
+
+    def fail(self, exception):
+        self.exception = exception
+        for f in self.errbacks:
+            f(exception)
+
+
+class TestMessagingClient(LocustTestCase):
+    def test_produce_and_consume(self):
+        broker = LocalBroker()
+        client = MessagingClient(self.environment.events.request, producer=broker, consumer=broker)
+        futures = client.produce_many("orders", [b"a", b"bb", b"ccc"])
+        self.assertEqual(3, len(futures))
+        self.assertIsNone(client.produce("forbidden", b"x"))
+        client.produce("failing", b"x", name="failing topic")
+        broker.topics["orders"].append(Record("orders", b"not from locust", []))
+        wait(0.02)
+        client.flush()
+
+        stats = self.environment.stats
+        produced = stats.get("orders", "PRODUCE")
+        self.assertEqual(3, produced.num_requests)
+        self.assertEqual(6, produced.total_content_length)
+        self.assertLess(15, produced.min_response_time)
+        self.assertEqual(1, stats.get("forbidden", "PRODUCE").num_failures)
+        self.assertEqual(1, stats.get("failing topic", "PRODUCE").num_failures)
+
+        wait(0.02)
+        records = client.consume()
+        self.assertEqual(5, len(records))
+        consumed = stats.get("orders", "CONSUME")
+        self.assertEqual(3, consumed.num_requests)
+        self.assertLess(35, consumed.min_response_time)
+        self.assertEqual(1, stats.get("failing", "CONSUME").num_requests)
+
+    def test_get_sent_at(self):
+        now = time.time()
+        self.assertEqual(now, get_sent_at([("other", b"1"), (SENT_AT_HEADER, repr(now).encode())]))
+        self.assertIsNone(get_sent_at([(SENT_AT_HEADER, b"garbage")]))
+        self.assertIsNone(get_sent_at(None))
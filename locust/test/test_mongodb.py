@@ -0,0 +1,128 @@
+import unittest
+from unittest import mock
+
+try:
+    from locust.contrib import mongodb
+
+    import bson
+    from bson.raw_bson import RawBSONDocument
+    from pymongo.errors import OperationFailure
+except ImportError:
+    mongodb = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+
+def raw_documents(*documents):
+    return [RawBSONDocument(bson.encode(document)) for document in documents]
+
+
+def patch_mongo_client(test):
+    """Make MongoDBClients that don't set up any of pymongo's internals (connection pools, monitors etc)"""
+    for attribute, value in (
+        ("__init__", lambda self, *args, **kwargs: None),
+        ("__getitem__", lambda self, name: mock.MagicMock()),
+        ("close", mock.DEFAULT),
+    ):
+        patcher = mock.patch.object(mongodb.MongoClient, attribute, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(mongodb is None, reason="pymongo is not installed")
+class TestMongoDBClient(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(mongodb, "events", self.environment.events)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.requests = []
+        self.environment.events.request.add_listener(lambda **kwargs: self.requests.append(kwargs))
+        patch_mongo_client(self)
+        self.client = mongodb.MongoDBClient("mongodb://localhost:1", "test", batch_size=100)
+        self.collection = self.client.db.get_collection.return_value
+
+    def test_execute_query(self):
+        documents = raw_documents({"_id": 1, "a": "x"}, {"_id": 2, "a": "yy"})
+
+        def cursor():
+            # the documents are read from the server in batches, while the cursor is iterated
+            self.assertEqual([], self.requests)
+            yield from documents
+
+        self.collection.find.return_value = cursor()
+        self.assertEqual(documents, self.client.execute_query("items", {"a": "x"}, name="find items"))
+        self.client.db.get_collection.assert_called_once_with("items", codec_options=mongodb.RAW_CODEC_OPTIONS)
+        self.collection.find.assert_called_once_with({"a": "x"}, batch_size=100)
+        self.assertEqual("find items", self.requests[0]["name"])
+        self.assertEqual(sum(len(document.raw) for document in documents), self.requests[0]["response_length"])
+        self.assertEqual({"documents": 2}, self.requests[0]["context"])
+
+    def test_execute_query_failure(self):
+        def cursor():
+            yield from raw_documents({"_id": 1})
+            raise OperationFailure("cursor killed")
+
+        self.collection.find.return_value = cursor()
+        self.assertIsNone(self.client.execute_query("items", {}, batch_size=0))
+        self.collection.find.assert_called_once_with({}, batch_size=0)
+        self.assertIsInstance(self.requests[0]["exception"], OperationFailure)
+        self.assertEqual(1, self.environment.stats.get("QUERY", mongodb.REQUEST_TYPE).num_failures)
+
+    def test_execute_aggregate(self):
+        documents = raw_documents({"_id": "a", "count": 3})
+        self.collection.aggregate.return_value = iter(documents)
+        pipeline = [{"$group": {"_id": "$a", "count": {"$sum": 1}}}]
+        self.assertEqual(documents, self.client.execute_aggregate("items", pipeline))
+        self.collection.aggregate.assert_called_once_with(pipeline, batchSize=100)
+        self.assertEqual({"documents": 1}, self.requests[0]["context"])
+
+        self.collection.aggregate.side_effect = OperationFailure("invalid pipeline")
+        self.assertIsNone(self.client.execute_aggregate("items", pipeline, batch_size=0))
+        self.collection.aggregate.assert_called_with(pipeline)
+        self.assertEqual(1, self.environment.stats.get("AGGREGATE", mongodb.REQUEST_TYPE).num_failures)
+
+    def test_execute_insert_many(self):
+        collection = self.client.db.__getitem__.return_value
+        collection.insert_many.return_value.inserted_ids = [1, 2, 3]
+        result = self.client.execute_insert_many("items", [{"a": i} for i in range(3)], ordered=False)
+        self.assertIs(collection.insert_many.return_value, result)
+        self.assertFalse(collection.insert_many.call_args.kwargs["ordered"])
+        self.assertEqual({"documents": 3}, self.requests[0]["context"])
+
+        collection.insert_many.side_effect = OperationFailure("duplicate key")
+        self.assertIsNone(self.client.execute_insert_many("items", [{"a": 1}]))
+        self.assertEqual(1, self.environment.stats.get("INSERT_MANY", mongodb.REQUEST_TYPE).num_failures)
+
+    def test_execute_bulk_write(self):
+        collection = self.client.db.__getitem__.return_value
+        result = collection.bulk_write.return_value
+        result.inserted_count, result.modified_count, result.deleted_count, result.upserted_count = 1, 2, 3, 4
+        self.assertIs(result, self.client.execute_bulk_write("items", [], name="bulk"))
+        self.assertEqual({"documents": 10}, self.requests[0]["context"])
+
+        collection.bulk_write.side_effect = OperationFailure("write conflict")
+        self.assertIsNone(self.client.execute_bulk_write("items", [], name="bulk"))
+        self.assertEqual(1, self.environment.stats.get("bulk", mongodb.REQUEST_TYPE).num_failures)
+
+
+@unittest.skipIf(mongodb is None, reason="pymongo is not installed")
+class TestMongoDBUser(LocustTestCase):
+    def test_shared_clients_are_closed_on_test_stop(self):
+        patch_mongo_client(self)
+
+        class MyUser(mongodb.MongoDBUser):
+            conn_string = "mongodb://localhost:1"
+            db_name = "test"
+
+        users = [MyUser(self.environment) for _ in range(2)]
+        client = users[0].client
+        self.assertIs(client, users[1].client)
+        for user in users:
+            user.on_stop()
+        client.close.assert_not_called()
+        self.environment.events.test_stop.fire(environment=self.environment)
+        client.close.assert_called_once_with()
+        self.assertEqual({}, mongodb._clients)
+        self.assertIsNot(client, MyUser(self.environment).client)
+        mongodb._clients.clear()
@@ -0,0 +1,180 @@
+from locust.env import Environment
+
+import socket
+import time
+import unittest
+from contextlib import suppress
+from unittest import mock
+
+import gevent
+from gevent.server import StreamServer
+
+try:
+    from locust.contrib import mqtt
+except ImportError:
+    mqtt = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PINGREQ, PINGRESP, DISCONNECT = 1, 2, 3, 4, 12, 13, 14
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        gevent.sleep(0.01)
+
+
+class FakeBroker:
+    """Just enough of an MQTT 3.1.1 broker: accepts connections, acks QoS 1 publishes and answers pings"""
+
+    def __init__(self):
+        self.packets = []
+        self.connections = []
+        self.server = StreamServer(("127.0.0.1", 0), self._handle)
+        self.server.start()
+        self.port = self.server.server_port
+
+    def _read_packet(self, file):
+        header = file.read(1)
+        if not header:
+            return None, b""
+        length, multiplier = 0, 1
+        while True:
+            byte = file.read(1)[0]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte & 0x80:
+                break
+        return header[0] >> 4, file.read(length)
+
+    def _handle(self, sock, _address):
+        self.connections.append(sock)
+        file = sock.makefile("rb")
+        while True:
+            packet_type, body = self._read_packet(file)
+            if packet_type is None:
+                return
+            self.packets.append(packet_type)
+            if packet_type == CONNECT:
+                sock.sendall(bytes([CONNACK << 4, 2, 0, 0]))
+            elif packet_type == PUBLISH:
+                topic_length = int.from_bytes(body[:2], "big")
+                packet_id = body[2 + topic_length : 4 + topic_length]
+                sock.sendall(bytes([PUBACK << 4, 2]) + packet_id)
+            elif packet_type == PINGREQ:
+                sock.sendall(bytes([PINGRESP << 4, 0]))
+            elif packet_type == DISCONNECT:
+                sock.close()
+                return
+
+    def drop_connections(self):
+        for sock in self.connections:
+            with suppress(OSError):
+                sock.shutdown(socket.SHUT_RDWR)
+            sock.close()
+        self.connections.clear()
+
+    def stop(self):
+        self.drop_connections()
+        self.server.stop()
+
+
+@unittest.skipIf(mqtt is None, reason="paho-mqtt is not installed")
+class TestMqttEventLoop(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self.broker = FakeBroker()
+        self.loop = mqtt.MqttEventLoop(misc_interval=0.1)
+
+    def tearDown(self):
+        self.broker.stop()
+        super().tearDown()
+
+    def _client(self):
+        client = mqtt.MqttClient(environment=self.environment)
+        client.connect_async("127.0.0.1", self.broker.port, keepalive=1)
+        self.loop.add(client)
+        return client
+
+    def test_serve_clients(self):
+        clients = [self._client() for _ in range(3)]
+        wait_for(lambda: all(client.is_connected() for client in clients))
+        self.assertEqual(3, self.environment.stats.get("connect", "MQTT").num_requests)
+
+        for client in clients:
+            client.publish("my/topic", b"hello", qos=1)
+        wait_for(lambda: self.environment.stats.get("publish:1:my/topic", "MQTT").num_requests == 3)
+        self.assertEqual(0, self.environment.stats.total.num_failures)
+        self.assertEqual(15, self.environment.stats.get("publish:1:my/topic", "MQTT").total_content_length)
+
+        # keepalive pings are sent by the loop (through loop_misc)
+        wait_for(lambda: PINGREQ in self.broker.packets)
+
+        for client in clients:
+            self.loop.remove(client)
+            client.disconnect()
+        self.assertIsNone(self.loop._greenlet)
+        self.assertEqual({}, self.loop._watchers)
+
+    def test_reconnect(self):
+        with mock.patch.object(mqtt, "RECONNECT_MIN_DELAY", 0.05):
+            client = self._client()
+            wait_for(client.is_connected)
+            self.broker.drop_connections()
+            wait_for(lambda: self.broker.packets.count(CONNECT) == 2)
+            wait_for(client.is_connected)
+        self.loop.remove(client)
+        client.disconnect()
+
+    def test_reconnect_delay_doubles(self):
+        client = mqtt.MqttClient(environment=self.environment)
+        self.loop._clients.add(client)
+        with (
+            mock.patch.object(client, "reconnect", side_effect=[OSError("refused"), OSError("refused"), None]),
+            mock.patch("gevent.spawn_later") as spawn_later,
+        ):
+            self.loop._connect(client)
+            self.loop._connect(client)
+            self.assertEqual(
+                [mqtt.RECONNECT_MIN_DELAY, mqtt.RECONNECT_MIN_DELAY * 2],
+                [c.args[0] for c in spawn_later.call_args_list],
+            )
+            self.loop._connect(client)
+        self.assertNotIn(client, self.loop._reconnect_delays)
+
+        # removed clients are not reconnected
+        self.loop.remove(client)
+        with mock.patch.object(client, "reconnect") as reconnect:
+            self.loop._connect(client)
+        reconnect.assert_not_called()
+
+
+@unittest.skipIf(mqtt is None, reason="paho-mqtt is not installed")
+class TestMqttUser(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self.broker = FakeBroker()
+
+    def tearDown(self):
+        self.broker.stop()
+        super().tearDown()
+
+    def test_on_stop(self):
+        for use_shared_loop in (True, False):
+
+            class MyUser(mqtt.MqttUser):
+                host = "127.0.0.1"
+                port = self.broker.port
+
+            MyUser.use_shared_loop = use_shared_loop
+            user = MyUser(Environment())
+            wait_for(user.client.is_connected)
+            user.on_stop()
+            wait_for(lambda: DISCONNECT in self.broker.packets)
+            self.assertIsNone(user.client.socket())
+            if use_shared_loop:
+                self.assertNotIn(user.client, mqtt.get_event_loop()._clients)
+            self.broker.packets.clear()
@@ -0,0 +1,141 @@
+import gc
+import os
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    import httpx
+
+    with mock.patch.dict(os.environ, {"OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "test")}):
+        from locust.contrib import oai
+except ImportError:
+    oai = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+
+def chat_chunk(content):
+    return b'data: {"choices": [{"index": 0, "delta": {"content": "%s"}}]}\n\n' % content.encode()
+
+
+@unittest.skipIf(oai is None, reason="openai is not installed")
+class TestTokenStreamParser(unittest.TestCase):
+    def test_events_split_across_chunks(self):
+        parser = oai.TokenStreamParser()
+        data = chat_chunk("Hello") + chat_chunk(" world")
+        parser.feed(data[:10], 1.0)
+        self.assertEqual([], parser.token_times)
+        parser.feed(data[10:-30], 2.0)
+        self.assertEqual([2.0], parser.token_times)
+        parser.feed(data[-30:], 3.0)
+        self.assertEqual([2.0, 3.0], parser.token_times)
+
+    def test_crlf(self):
+        parser = oai.TokenStreamParser()
+        data = (chat_chunk("a") + chat_chunk("b")).replace(b"\n", b"\r\n")
+        # split in the middle of a \r\n\r\n event separator
+        parser.feed(data[: data.index(b"\r\n") + 1], 1.0)
+        parser.feed(data[data.index(b"\r\n") + 1 :], 2.0)
+        self.assertEqual([2.0, 2.0], parser.token_times)
+
+    def test_done_and_usage(self):
+        parser = oai.TokenStreamParser()
+        parser.feed(chat_chunk("a"), 1.0)
+        parser.feed(b'data: {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}\n\n', 2.0)
+        parser.feed(b'data: {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 7}}\n\n', 3.0)
+        parser.feed(b"data: [DONE]\n\n", 4.0)
+        self.assertEqual([1.0], parser.token_times)
+        self.assertEqual(7, parser.output_tokens)
+
+    def test_responses_api(self):
+        parser = oai.TokenStreamParser()
+        parser.feed(b'event: response.created\ndata: {"type": "response.created", "response": {}}\n\n', 1.0)
+        parser.feed(
+            b'event: response.output_text.delta\ndata: {"type": "response.output_text.delta", "delta": "Hi"}\n\n', 2.0
+        )
+        parser.feed(b'data: {"type": "response.output_text.delta", "delta": ""}\n\n', 3.0)
+        parser.feed(
+            b'data: {"type": "response.completed", "response": {"usage": {"input_tokens": 2, "output_tokens": 4}}}\n\n',
+            4.0,
+        )
+        self.assertEqual([2.0], parser.token_times)
+        self.assertEqual(4, parser.output_tokens)
+
+
+class ChunkStream(httpx.SyncByteStream if oai is not None else object):  # type: ignore[misc]
+    def __init__(self, chunks, exception=None):
+        self.chunks = chunks
+        self.exception = exception
+
+    def __iter__(self):
+        yield from self.chunks
+        if self.exception is not None:
+            raise self.exception
+
+
+@unittest.skipIf(oai is None, reason="openai is not installed")
+class TestOpenAIClient(LocustTestCase):
+    def _streamed_response(self, stream):
+        user = SimpleNamespace(environment=self.environment)
+        client = oai.OpenAIClient(self.environment.events.request, user, api_key="test")
+        request = httpx.Request("POST", "http://localhost/v1/chat/completions")
+        request.start_time = time.time()
+        request.start_perf_counter = time.perf_counter()
+        response = httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream, request=request)
+        client._instrument_stream(response, "chat", self.environment.events.request)
+        return response
+
+    def test_stream(self):
+        response = self._streamed_response(ChunkStream([chat_chunk("a"), chat_chunk("b"), b"data: [DONE]\n\n"]))
+        response.read()
+        response.close()
+
+        stats = self.environment.stats
+        self.assertEqual(1, stats.get("chat", "POST").num_requests)
+        self.assertEqual(0, stats.get("chat", "POST").num_failures)
+        self.assertEqual(2, stats.get("chat", "POST").total_content_length)
+        self.assertEqual([("chat", "POST")], list(stats.entries))
+        self.assertEqual(1, stats.total.num_requests)
+        metrics = oai.get_token_metrics(self.environment).stats
+        self.assertEqual(1, metrics.get("chat", oai.TIME_TO_FIRST_TOKEN).num_requests)
+        self.assertEqual(1, metrics.get("chat", oai.INTER_TOKEN_LATENCY).num_requests)
+        self.assertEqual(2, metrics.get("chat", oai.OUTPUT_TOKENS).avg_response_time)
+
+    def test_stream_failure(self):
+        response = self._streamed_response(ChunkStream([chat_chunk("a")], httpx.ReadError("connection reset")))
+        with self.assertRaises(httpx.ReadError):
+            response.read()
+        response.close()
+
+        stats = self.environment.stats
+        self.assertEqual(1, stats.get("chat", "POST").num_failures)
+        self.assertIn("connection reset", next(iter(stats.errors.values())).to_name())
+        self.assertFalse(oai.get_token_metrics(self.environment).stats.entries)
+
+    def test_stream_abandoned(self):
+        response = self._streamed_response(ChunkStream([chat_chunk("a"), chat_chunk("b")]))
+        chunks = response.iter_raw()
+        next(chunks)
+        del chunks, response
+        gc.collect()
+
+        stats = self.environment.stats
+        self.assertEqual(1, stats.get("chat", "POST").num_requests)
+        self.assertEqual(0, stats.get("chat", "POST").num_failures)
+        self.assertFalse(oai.get_token_metrics(self.environment).stats.entries)
+
+    def test_token_metrics_reported_to_master(self):
+        metrics = oai.get_token_metrics(self.environment)
+        metrics.log(oai.TIME_TO_FIRST_TOKEN, "chat", 100)
+        metrics.log(oai.TIME_TO_FIRST_TOKEN, "chat", 300)
+        data = {}
+        self.environment.events.report_to_master.fire(client_id="worker", data=data)
+        self.assertEqual(0, metrics.stats.get("chat", oai.TIME_TO_FIRST_TOKEN).num_requests)
+
+        self.environment.events.worker_report.fire(client_id="worker", data=data)
+        self.environment.events.worker_report.fire(client_id="worker", data=data)
+        self.assertEqual(4, metrics.stats.get("chat", oai.TIME_TO_FIRST_TOKEN).num_requests)
+        self.assertEqual(200, metrics.stats.get("chat", oai.TIME_TO_FIRST_TOKEN).avg_response_time)
+        self.assertFalse(self.environment.stats.entries)
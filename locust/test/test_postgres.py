@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+try:
+    from locust.contrib import postgres
+
+    import psycopg
+except ImportError:
+    postgres = None  # type: ignore
+
+from .testcases import LocustTestCase
+
+
+def fake_connection(rowcount=1):
+    conn = mock.MagicMock()
+    conn.closed = False
+    conn.info.transaction_status = psycopg.pq.TransactionStatus.IDLE
+    conn.execute.return_value.rowcount = rowcount
+    return conn
+
+
+@unittest.skipIf(postgres is None, reason="psycopg is not installed")
+class TestPostgres(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(postgres, "events", self.environment.events)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connect = mock.patch.object(postgres.psycopg, "connect", side_effect=lambda *a, **kw: fake_connection())
+        self.connect = connect.start()
+        self.addCleanup(connect.stop)
+
+    def test_pool(self):
+        pool = postgres.PostgresPool("postgresql://test", max_size=2)
+        with pool.connection() as first:
+            with pool.connection() as second:
+                self.assertIsNot(first, second)
+                with self.assertRaises(TimeoutError):
+                    with pool.connection(timeout=0.01):
+                        pass
+        # idle connections are reused, most recently used first
+        with pool.connection() as conn:
+            self.assertIs(first, conn)
+            conn.info.transaction_status = psycopg.pq.TransactionStatus.INTRANS
+        # a connection left in a transaction is closed instead of being reused
+        conn.close.assert_called_once()
+        with pool.connection() as conn:
+            self.assertIs(second, conn)
+        self.assertEqual(2, self.connect.call_count)
+        self.assertEqual({"autocommit": True}, self.connect.call_args.kwargs)
+
+        pool.close()
+        second.close.assert_called_once()
+
+    def test_execute_query(self):
+        client = postgres.PostgresClient("postgresql://test", prepare=True)
+        cursor = client.execute_query("SELECT * FROM t WHERE id = %s", (1,), name="select")
+        client.connection.execute.assert_called_once_with("SELECT * FROM t WHERE id = %s", (1,), prepare=True)
+        self.assertIs(client.connection.execute.return_value, cursor)
+        client.execute_query("SELECT 1", prepare=False)
+        self.assertFalse(client.connection.execute.call_args.kwargs["prepare"])
+
+        client.connection.execute.side_effect = psycopg.OperationalError("server closed the connection")
+        self.assertIsNone(client.execute_query("SELECT 1"))
+
+        stats = self.environment.stats
+        self.assertEqual(1, stats.get("select", postgres.SUCCESS_REQUEST_TYPE).num_requests)
+        self.assertEqual(1, stats.get("select", postgres.SUCCESS_REQUEST_TYPE).total_content_length)
+        self.assertEqual(1, stats.get("execute_query", postgres.SUCCESS_REQUEST_TYPE).num_requests)
+        self.assertEqual(1, stats.get("execute_query", postgres.FAILURE_REQUEST_TYPE).num_failures)
+
+    def test_execute_pipeline(self):
+        client = postgres.PostgresClient("postgresql://test", pool=postgres.PostgresPool("postgresql://test", 1))
+        cursors = client.execute_pipeline([("SELECT %s", (i,)) for i in range(3)], name="batch")
+        self.assertEqual(3, len(cursors))
+        stats = self.environment.stats
+        self.assertEqual(1, stats.get("batch", postgres.SUCCESS_REQUEST_TYPE).num_requests)
+        self.assertEqual(3, stats.get("batch", postgres.SUCCESS_REQUEST_TYPE).total_content_length)
+
+        with client.pool.connection() as conn:
+            conn.pipeline.side_effect = psycopg.OperationalError("pipeline aborted")
+        self.assertIsNone(client.execute_pipeline([("SELECT 1", None)], name="batch"))
+        self.assertEqual(1, stats.get("batch", postgres.FAILURE_REQUEST_TYPE).num_failures)
+
+    def test_pools_are_closed_on_test_stop(self):
+        class MyUser(postgres.PostgresUser):
+            conn_string = "postgresql://test"
+            pool_size = 2
+
+        users = [MyUser(self.environment) for _ in range(3)]
+        self.assertIs(users[0].client.pool, users[2].client.pool)
+        users[0].client.execute_query("SELECT 1")
+        conn = users[0].client.pool._idle.peek()
+        for user in users:
+            user.on_stop()
+        self.environment.events.test_stop.fire(environment=self.environment)
+        conn.close.assert_called_once()
+        self.assertEqual({}, postgres._pools)
+        self.assertIsNot(users[0].client.pool, MyUser(self.environment).client.pool)
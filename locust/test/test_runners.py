@@ -9,6 +9,7 @@ from locust.exception import RPCError, RPCReceiveError, StopUser
 from locust.log import LogReader
 from locust.main import create_environment
 from locust.rpc import Message
+from locust.rpc.protocol import COMPRESSION_CODECS
 from locust.runners import (
     STATE_INIT,
     STATE_MISSING,
@@ -53,6 +54,8 @@ def mocked_rpc(raise_on_close=True):
         queue = Queue()
         outbox = []
         raise_error_on_close = raise_on_close
+        compression = None
+        client_compression: dict[str, str] = {}
 
         def __init__(self, *args, **kwargs):
             pass
@@ -2301,6 +2304,15 @@ class TestMasterRunner(LocustRunnerTestCase):
             server.mocked_send(Message("quit", None, "zeh_fake_client3"))
             self.assertEqual(3, len(master.clients))
 
+    def test_custom_server_class(self):
+        server = mocked_rpc()
+        master = self.environment.create_master_runner("*", 5557, server_class=server)
+        self.assertIsInstance(master.server, server)
+        server.mocked_send(Message("client_ready", __version__, "zeh_fake_client1"))
+        self.assertIn("zeh_fake_client1", master.clients)
+        master.reset_connection()
+        self.assertIsInstance(master.server, server)
+
     def test_worker_connect_with_special_versions(self):
         with mock.patch("locust.rpc.rpc.Server", mocked_rpc()) as server:
             master = self.get_runner()
@@ -3398,6 +3410,21 @@ class TestMasterRunner(LocustRunnerTestCase):
             self.assertEqual(1, len(messages))
             self.assertEqual(0, messages[0].data["index"])
 
+    def test_master_negotiates_compression(self):
+        with mock.patch("locust.rpc.rpc.Server", mocked_rpc()) as server:
+            master = self.get_runner()
+            server.mocked_send(Message("client_ready", __version__, "dummy_client"))
+            ack = server.get_messages("ack")[0]
+            self.assertEqual(COMPRESSION_CODECS, ack.data["compression"])
+            self.assertNotIn("dummy_client", master.server.client_compression)
+
+            server.mocked_send(Message("compression", "zlib", "dummy_client"))
+            self.assertEqual("zlib", master.server.client_compression["dummy_client"])
+
+            # unknown codecs are ignored
+            server.mocked_send(Message("compression", "middle-out", "dummy_client2"))
+            self.assertNotIn("dummy_client2", master.server.client_compression)
+
     def test_worker_sends_bad_message_to_master(self):
         """
         Validate master sends reconnect message to worker when it receives a bad message.
@@ -3496,6 +3523,29 @@ class TestWorkerRunner(LocustTestCase):
         environment.user_classes = user_classes
         return WorkerRunner(environment, master_host="localhost", master_port=5557)
 
+    def test_worker_negotiates_compression(self):
+        with mock.patch("locust.rpc.rpc.Client", mocked_rpc()) as client:
+            client.mocked_send(Message("ack", {"index": 0, "compression": ["unknown", "zlib"]}, "dummy_client_id"))
+            worker = self.get_runner(environment=Environment(), client=client, auto_connect=False)
+            self.assertEqual("zlib", worker.client.compression)
+            self.assertEqual(["client_ready", "compression"], [m.type for m in client.get_messages()])
+            self.assertEqual("zlib", client.get_messages("compression")[0].data)
+
+    def test_worker_without_compression_support_on_master(self):
+        with mock.patch("locust.rpc.rpc.Client", mocked_rpc()) as client:
+            worker = self.get_runner(environment=Environment(), client=client)
+            self.assertIsNone(worker.client.compression)
+            self.assertEqual(["client_ready"], [m.type for m in client.get_messages()])
+
+    def test_worker_turns_off_compression_when_master_does_not_support_it(self):
+        with mock.patch("locust.rpc.rpc.Client", mocked_rpc()) as client:
+            client.mocked_send(Message("ack", {"index": 0, "compression": ["zlib"]}, "dummy_client_id"))
+            worker = self.get_runner(environment=Environment(), client=client, auto_connect=False)
+            self.assertEqual("zlib", worker.client.compression)
+            # reconnected to a master without compression support
+            worker.handle_message(Message("ack", {"index": 0}, "dummy_client_id"))
+            self.assertIsNone(worker.client.compression)
+
     def test_worker_stop_timeout(self):
         class MyTestUser(User):
             _test_state = 0
@@ -0,0 +1,162 @@
+from locust.contrib.socket_user import (
+    DelimiterFraming,
+    FrameReader,
+    LengthPrefixFraming,
+    SocketClient,
+    SocketPool,
+    SocketUser,
+)
+
+import socket
+import struct
+
+import gevent
+from gevent.server import DatagramServer, StreamServer
+
+from .testcases import LocustTestCase
+
+
+def length_prefixed_echo(sock, _address):
+    """Echoes length prefixed messages, except that the responses to pairs of messages are swapped if asked to"""
+    reader = FrameReader(sock, LengthPrefixFraming())
+    held = None
+    try:
+        while True:
+            payload = reader.read_frame()
+            if payload.startswith(b"silent"):
+                continue
+            if payload.startswith(b"swap") and held is None:
+                held = payload
+                continue
+            sock.sendall(struct.pack("!I", len(payload)) + payload)
+            if held is not None:
+                sock.sendall(struct.pack("!I", len(held)) + held)
+                held = None
+    except ConnectionError:
+        pass
+
+
+class TestFraming(LocustTestCase):
+    def test_frame_reader(self):
+        a, b = socket.socketpair()
+        framing = DelimiterFraming(b"\r\n")
+        reader = FrameReader(b, framing, buffer_size=8)
+        a.sendall(b"one\r\ntwo\r\n" + b"x" * 20 + b"\r\nth")
+        self.assertEqual(b"one", reader.read_frame())
+        self.assertEqual(b"two", reader.read_frame())
+        self.assertEqual(b"x" * 20, reader.read_frame())
+        a.sendall(b"ree\r\n")
+        self.assertEqual(b"three", reader.read_frame())
+        a.close()
+        self.assertRaises(ConnectionError, reader.read_frame)
+
+    def test_length_prefix(self):
+        framing = LengthPrefixFraming("!H", length_includes_header=True)
+        data = framing.encode(b"abc") + framing.encode(b"")
+        self.assertEqual(b"\x00\x05abc\x00\x02", data)
+        buffer = bytearray(data)
+        self.assertEqual((2, 5, 5), framing.decode(buffer, 0, len(buffer)))
+        self.assertEqual((7, 7, 7), framing.decode(buffer, 5, len(buffer)))
+        self.assertIsNone(framing.decode(buffer, 0, 4))
+
+
+class TestSocketUser(LocustTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = StreamServer(("127.0.0.1", 0), length_prefixed_echo)
+        self.server.start()
+        self.host = f"tcp://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.stop()
+        super().tearDown()
+
+    def test_request(self):
+        class MyUser(SocketUser):
+            host = self.host
+            pool_size = None
+            timeout = 0.2
+
+        user = MyUser(self.environment)
+        self.assertEqual(b"hello", user.client.request(b"hello", name="hello"))
+        self.assertEqual([b"a", b"bb", b"ccc"], user.client.request_many([b"a", b"bb", b"ccc"], name="many"))
+        self.assertIsNone(user.client.request(b"silent", name="silent"))
+        # the connection is reopened, because the responses can't be matched to the requests after a timeout
+        self.assertEqual(b"again", user.client.request(b"again", name="hello"))
+        user.client.send(b"silent too", name="send")
+        user.on_stop()
+
+        stats = self.environment.stats
+        self.assertEqual(2, stats.get("hello", "TCP").num_requests)
+        self.assertEqual(3, stats.get("many", "TCP").num_requests)
+        self.assertEqual(6, stats.get("many", "TCP").total_content_length)
+        self.assertEqual(1, stats.get("silent", "TCP").num_failures)
+        self.assertEqual(1, stats.get("send", "TCP").num_requests)
+        self.assertEqual(0, stats.get("send", "TCP").num_failures)
+
+    def test_correlation_id(self):
+        class MyUser(SocketUser):
+            host = self.host
+            pool_size = 1
+            correlation_id = staticmethod(lambda payload: payload[-1:])
+
+        users = [MyUser(self.environment) for _ in range(3)]
+        self.assertIs(users[0].pool, users[2].pool)
+        greenlets = [gevent.spawn(users[i].client.request, f"swap{i}".encode()) for i in range(2)]
+        gevent.joinall(greenlets, timeout=2)
+        self.assertEqual([b"swap0", b"swap1"], [g.value for g in greenlets])
+        self.assertEqual(
+            [b"swap2", b"swap3"], users[2].client.request_many([b"swap2", b"swap3"], name="many", timeout=1)
+        )
+        self.assertEqual(4, self.environment.stats.total.num_requests)
+        self.assertEqual(0, self.environment.stats.total.num_failures)
+
+    def test_duplicate_correlation_id(self):
+        pool = SocketPool(("127.0.0.1", self.server.server_port), correlation_id=lambda payload: payload[-1:])
+        client = SocketClient(self.environment.events.request, pool, timeout=1)
+        # the second request has the same id as the first one, which is still waiting for its response
+        self.assertEqual([b"one1", None], client.request_many([b"one1", b"two1"], name="duplicate"))
+        entry = self.environment.stats.get("duplicate", "TCP")
+        self.assertEqual(2, entry.num_requests)
+        self.assertEqual(1, entry.num_failures)
+        self.assertIn("already waiting", next(iter(self.environment.stats.errors.values())).to_name())
+        pool.close()
+
+    def test_connection_failure(self):
+        pool = SocketPool(("127.0.0.1", self.server.server_port))
+        client = SocketClient(self.environment.events.request, pool, timeout=1)
+        self.assertEqual(b"x", client.request(b"x"))
+        self.server.stop()
+        pool.get().sock.shutdown(socket.SHUT_RDWR)
+        self.assertIsNone(client.request(b"y"))
+        self.assertIsNone(client.request(b"z"))
+        self.assertEqual(2, self.environment.stats.get("request", "TCP").num_failures)
+
+    def test_udp(self):
+        server = DatagramServer(("127.0.0.1", 0), lambda data, address: server.sendto(data.upper(), address))
+        server.start()
+
+        class MyUser(SocketUser):
+            host = f"udp://127.0.0.1:{server.server_port}"
+
+        user = MyUser(self.environment)
+        self.assertEqual(b"PING", user.client.request(b"ping", name="ping"))
+        self.assertEqual(1, self.environment.stats.get("ping", "UDP").num_requests)
+        server.stop()
+
+    def test_udp_ipv6(self):
+        try:
+            server = DatagramServer(("::1", 0), lambda data, address: server.sendto(data.upper(), address))
+            server.start()
+        except OSError:
+            self.skipTest("IPv6 is not available")
+
+        class MyUser(SocketUser):
+            host = f"udp://[::1]:{server.server_port}"
+            pool_size = None
+
+        user = MyUser(self.environment)
+        self.assertEqual(socket.AF_INET6, user.pool.get().sock.family)
+        self.assertEqual(b"PING", user.client.request(b"ping", name="ping"))
+        user.on_stop()
+        server.stop()
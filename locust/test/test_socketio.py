@@ -1,11 +1,13 @@
-from locust.contrib.socketio import SocketIOUser
+from locust.contrib.socketio import LatencyTracker, SocketIOUser, _client_pools
 
 import time
 from unittest.mock import patch
 
+import gevent
 import socketio
 
 from .testcases import LocustTestCase
+from .util import wait
 
 
 class TestSocketIOUser(LocustTestCase):
@@ -32,3 +34,95 @@ class TestSocketIOUser(LocustTestCase):
             self.assertLess(0.001, self.environment.stats.entries[("test_2", "WSC")].avg_response_time)
             self.assertEqual(1, self.environment.stats.entries[("error", "WSC")].num_requests)
             self.assertEqual(1, len(self.environment.stats.errors))
+
+    def test_round_trip_latency(self):
+        callbacks = []
+
+        def emit(self, event, data=None, namespace=None, callback=None):
+            if callback is not None:
+                callbacks.append(callback)
+
+        acks = []
+        with patch.multiple(socketio.Client, emit=emit):
+            user = SocketIOUser(self.environment)
+            user.sio.emit("with_ack", {"data": 1}, callback=acks.append)
+            user.sio.emit("no_ack", {"data": 1}, namespace="/chat")
+            user.sio.send("hello", ack=True)
+            user.sio.emit("publish", {"id": 1}, response_event="published", correlation_id=1, fanout=True)
+            wait(0.02)
+            for callback in callbacks:
+                callback("ok")
+            user.sio.on_message("published", {"id": 1})
+            user.sio.on_message("published", {"id": 1})
+            user.sio.on_message("published", {"id": 2})
+
+        stats = self.environment.stats
+        self.assertEqual(["ok"], acks)
+        self.assertLess(15, stats.get("with_ack", "WSE").avg_response_time)
+        self.assertEqual(1, stats.get("/chat no_ack", "WSE").num_requests)
+        self.assertLess(15, stats.get("Unnamed", "WSS").avg_response_time)
+        self.assertEqual(2, stats.get("publish", "WSE").num_requests)
+        self.assertLess(15, stats.get("publish", "WSE").min_response_time)
+        self.assertEqual(3, stats.get("published", "WSR").num_requests)
+        self.assertIsNone(stats.entries.get(("message", "WSE")))
+
+    def test_response_timeout(self):
+        tracker = LatencyTracker(self.environment.events.request, timeout=0.05)
+        tracker.start("a", "WSE", "slow", 0)
+        tracker.start("b", "WSE", "fast", 0)
+        self.assertTrue(tracker.complete("b"))
+        self.assertFalse(tracker.complete("b"))
+        gevent.sleep(0.2)
+        self.assertEqual(1, self.environment.stats.get("slow", "WSE").num_failures)
+        self.assertEqual(0, self.environment.stats.get("fast", "WSE").num_failures)
+        self.assertFalse(tracker.complete("a"))
+
+    def test_reused_key_expires_in_send_order(self):
+        tracker = LatencyTracker(self.environment.events.request, timeout=0.1)
+        tracker.start("a", "WSE", "first", 0)
+        tracker.start("b", "WSE", "second", 0)
+        wait(0.05)
+        # "a" is sent again, after "b", so "b" can expire before it
+        tracker.start("a", "WSE", "first", 0)
+        self.assertEqual(["b", "a"], list(tracker._pending))
+        wait(0.06)
+        gevent.sleep(0.03)
+        self.assertEqual(1, self.environment.stats.get("second", "WSE").num_failures)
+        self.assertNotIn(("first", "WSE"), self.environment.stats.entries)
+        self.assertTrue(tracker.complete("a"))
+
+    def test_client_pool(self):
+        connects = []
+
+        def connect(self, *args, **kwargs):
+            connects.append(self)
+            self.connected = True
+
+        class PooledUser(SocketIOUser):
+            pool_size = 2
+
+        with patch.multiple(socketio.Client, connect=connect):
+            users = [PooledUser(self.environment) for _ in range(5)]
+            for user in users:
+                user.sio.connect("http://fake-url.com")
+
+        self.assertEqual(2, len({id(user.sio) for user in users}))
+        self.assertIs(users[0].sio, users[2].sio)
+        self.assertEqual(2, len(connects))
+        self.assertEqual(2, self.environment.stats.get("connect", "WS").num_requests)
+
+        # a pooled client stays connected until all of its users have disconnected
+        with patch.object(socketio.Client, "disconnect") as disconnect:
+            users[0].sio.disconnect()
+            users[2].sio.disconnect()
+            self.assertEqual(0, disconnect.call_count)
+            users[4].sio.disconnect()
+            self.assertEqual(1, disconnect.call_count)
+
+        # the pooled clients are disconnected when the test stops, the next run gets new ones
+        with patch.object(socketio.Client, "disconnect") as disconnect:
+            self.environment.events.test_stop.fire(environment=self.environment)
+        self.assertEqual(2, disconnect.call_count)
+        self.assertEqual({}, _client_pools)
+        self.assertTrue(all(user.sio_greenlet.dead for user in users))
+        self.assertIsNot(users[0].sio, PooledUser(self.environment).sio)
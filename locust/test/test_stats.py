@@ -1,13 +1,16 @@
 import locust
 from locust import HttpUser, TaskSet, User, __version__, constant, task
 from locust.env import Environment
+from locust.history import EndpointHistory, StatsHistory
 from locust.rpc.protocol import Message
+from locust.shared_stats import SharedStats
 from locust.stats import (
     PERCENTILES_TO_REPORT,
     STATS_NAME_WIDTH,
     STATS_TYPE_WIDTH,
     CachedResponseTimes,
     RequestStats,
+    StatsCSV,
     StatsCSVFileWriter,
     StatsEntry,
     StatsError,
@@ -19,6 +22,7 @@ from locust.stats import (
 from locust.test.test_runners import mocked_rpc
 from locust.test.testcases import LocustTestCase, WebserverTestCase
 from locust.user.inspectuser import _get_task_ratio
+from locust.util.date import format_utc_timestamp
 
 import csv
 import json
@@ -153,6 +157,19 @@ class TestRequestStats(unittest.TestCase):
         self.assertEqual(s.get_response_time_percentile(0.6), 60)
         self.assertEqual(s.get_response_time_percentile(0.95), 95)
 
+    def test_percentiles(self):
+        s = StatsEntry(self.stats, "percentile_test", "GET")
+        for x in range(100):
+            s.log(x, 0)
+        s.log(None, 0)
+
+        percents = [0.95, 0.5, 1.0, 0.0, 0.6]
+        self.assertEqual(s.get_response_time_percentiles(percents), [95, 50, 99, 0, 60])
+        self.assertEqual(
+            s.get_response_time_percentiles(percents), [s.get_response_time_percentile(p) for p in percents]
+        )
+        self.assertEqual(StatsEntry(self.stats, "empty", "GET").get_response_time_percentiles([0.5, 0.9]), [0, 0])
+
     def test_median(self):
         self.assertEqual(self.s.median_response_time, 79)
 
@@ -232,6 +249,20 @@ class TestRequestStats(unittest.TestCase):
         self.assertEqual(self.s.median_response_time, 0)
         self.assertEqual(self.s.get_response_time_percentile(0.5), 0)
 
+    def test_entries_sorted_index(self):
+        s = RequestStats()
+        for name in ["/b", "/c", "/a", "/b"]:
+            s.log_request("GET", name, 10, 0)
+        s.entries[("/a", "POST")] = StatsEntry(s, "/a", "POST")
+        self.assertEqual([("/a", "GET"), ("/a", "POST"), ("/b", "GET"), ("/c", "GET")], s.entries.sorted_keys)
+        self.assertEqual(sorted(s.entries.keys()), s.entries.sorted_keys)
+
+        del s.entries[("/b", "GET")]
+        s.entries.pop(("/c", "GET"))
+        self.assertEqual(["/a", "/a"], [e.name for e in locust.stats.sort_stats(s.entries)])
+        s.clear_all()
+        self.assertEqual([], s.entries.sorted_keys)
+
     def test_reset_min_response_time(self):
         self.s.reset()
         self.s.log(756, 0)
@@ -370,6 +401,132 @@ class TestRequestStats(unittest.TestCase):
         self.stats.log_error("GET", "/", Exception(f"Error caused by {Dummy()!r}"))
         self.assertEqual(1, len(self.stats.errors))
 
+    def test_error_key_cache(self):
+        class CustomReprError(Exception):
+            def __init__(self, message, detail):
+                super().__init__(message)
+                self.detail = detail
+
+            def __repr__(self):
+                return f"CustomReprError({self.args[0]}, {self.detail})"
+
+        key = StatsError.create_key("GET", "/", Exception("boom"))
+        self.assertEqual(key, StatsError.create_key("GET", "/", Exception("boom")))
+        self.assertEqual(key, StatsError.create_key("GET", "/", "Exception('boom')"))
+        self.assertNotEqual(key, StatsError.create_key("GET", "/", ValueError("boom")))
+        self.assertNotEqual(key, StatsError.create_key("POST", "/", Exception("boom")))
+        self.assertNotEqual(
+            StatsError.create_key("GET", "/", CustomReprError("boom", 1)),
+            StatsError.create_key("GET", "/", CustomReprError("boom", 2)),
+        )
+        # unhashable args
+        self.assertEqual(
+            StatsError.create_key("GET", "/", Exception(["boom"])),
+            StatsError.create_key("GET", "/", Exception(["boom"])),
+        )
+
+    def test_error_normalizers(self):
+        self.stats = RequestStats()
+        with mock.patch("locust.stats.ERROR_NORMALIZERS", [(r"id=\d+", "id=<id>")]):
+            for i in range(5):
+                self.stats.log_error("GET", "/", Exception(f"Not found: id={i}"))
+
+            self.assertEqual(1, len(self.stats.errors))
+            error = list(self.stats.errors.values())[0]
+            self.assertEqual(5, error.occurrences)
+            self.assertEqual("Exception('Not found: id=<id>')", error.to_dict()["error"])
+
+    def test_error_cardinality_limit(self):
+        self.stats = RequestStats()
+        with mock.patch("locust.stats.ERRORS_MAX_ENTRIES", 3):
+            for i in range(10):
+                self.stats.log_error("GET", "/a", Exception(f"error {i}"))
+            self.stats.log_error("GET", "/b", Exception("error 11"))
+            self.stats.log_error("GET", "/a", Exception("error 0"))
+
+        errors = {(e.name, StatsError.parse_error(e.error)): e.occurrences for e in self.stats.errors.values()}
+        self.assertEqual(
+            {
+                ("/a", "Exception('error 0')"): 2,
+                ("/a", "Exception('error 1')"): 1,
+                ("/a", "Exception('error 2')"): 1,
+                ("/a", locust.stats.ERRORS_OVERFLOW_MESSAGE): 7,
+                ("/b", locust.stats.ERRORS_OVERFLOW_MESSAGE): 1,
+            },
+            errors,
+        )
+        self.assertEqual(11, self.stats.get("/a", "GET").num_failures)
+
+    def test_error_cardinality_limit_master_merge(self):
+        master_stats = RequestStats()
+        errors = {}
+        for i in range(5):
+            error = Exception(f"error {i}")
+            errors[StatsError.create_key("GET", "/x", error)] = StatsError(
+                "GET", "/x", error, occurrences=2
+            ).serialize()
+
+        with mock.patch("locust.stats.ERRORS_MAX_ENTRIES", 3):
+            master_stats.extend_errors(errors)
+            master_stats.extend_errors(errors)
+
+        self.assertEqual(4, len(master_stats.errors))
+        overflow = master_stats.errors[StatsError.create_key("GET", "/x", locust.stats.ERRORS_OVERFLOW_MESSAGE)]
+        self.assertEqual(8, overflow.occurrences)
+        self.assertEqual(20, sum(e.occurrences for e in master_stats.errors.values()))
+
+    def test_name_templates(self):
+        self.stats = RequestStats()
+        with mock.patch("locust.stats.NAME_TEMPLATES", locust.stats.DEFAULT_NAME_TEMPLATES):
+            self.stats.log_request("GET", "/item/1", 100, 10)
+            self.stats.log_request("GET", "/item/2/details?x=1", 100, 10)
+            self.stats.log_request("GET", "/item/3", 100, 10)
+            self.stats.log_request("GET", "/user/0b5b3d4c-7f3c-4c4e-9d4a-1c6f0e4d2a11", 100, 10)
+            self.stats.log_request("GET", "/commit/2f0c0f5e6e8a4f1b9c3d", 100, 10)
+            self.stats.log_request("GET", "/v2/items", 100, 10)
+            self.stats.log_error("GET", "/item/4", "oops")
+            self.stats.log_error("GET", "/item/5", "oops")
+
+        self.assertEqual(2, self.stats.get("/item/{id}", "GET").num_requests)
+        self.assertEqual(2, self.stats.get("/item/{id}", "GET").num_failures)
+        self.assertEqual(1, self.stats.get("/item/{id}/details?x=1", "GET").num_requests)
+        self.assertEqual(1, self.stats.get("/user/{uuid}", "GET").num_requests)
+        self.assertEqual(1, self.stats.get("/commit/{hash}", "GET").num_requests)
+        self.assertEqual(1, self.stats.get("/v2/items", "GET").num_requests)
+        self.assertEqual(["/item/{id}"], [e.name for e in self.stats.errors.values()])
+        self.assertEqual(2, list(self.stats.errors.values())[0].occurrences)
+
+    def test_entries_cardinality_limit(self):
+        self.stats = RequestStats()
+        with mock.patch("locust.stats.STATS_MAX_ENTRIES", 3), self.assertLogs("locust.stats", "WARNING") as logs:
+            for i in range(10):
+                self.stats.log_request("GET", f"/item/{i}", 100, 10)
+            self.stats.log_request("POST", "/item/0", 100, 10)
+            self.stats.log_error("GET", "/item/9", "oops")
+
+        self.assertEqual(1, len(logs.records))
+        self.assertEqual(
+            ["/item/0", "/item/1", "/item/2", locust.stats.STATS_OVERFLOW_NAME, locust.stats.STATS_OVERFLOW_NAME],
+            [name for name, _ in self.stats.entries.sorted_keys],
+        )
+        self.assertEqual(7, self.stats.get(locust.stats.STATS_OVERFLOW_NAME, "GET").num_requests)
+        self.assertEqual(1, self.stats.get(locust.stats.STATS_OVERFLOW_NAME, "GET").num_failures)
+        self.assertEqual(1, self.stats.get(locust.stats.STATS_OVERFLOW_NAME, "POST").num_requests)
+        self.assertEqual(11, self.stats.total.num_requests)
+
+        self.stats.clear_all()
+        self.stats.log_request("GET", "/item/9", 100, 10)
+        self.assertEqual(1, self.stats.get("/item/9", "GET").num_requests)
+
+    def test_no_cardinality_limit_by_default(self):
+        self.stats = RequestStats()
+        for i in range(1500):
+            self.stats.log_request("GET", f"/item/{i}", 100, 10)
+            self.stats.log_error("GET", f"/item/{i}", "oops")
+        self.assertEqual(1500, len(self.stats.entries))
+        self.assertEqual(1500, len(self.stats.errors))
+        self.assertNotIn((locust.stats.STATS_OVERFLOW_NAME, "GET"), self.stats.entries)
+
     def test_error_first_seen_and_last_seen(self):
         self.stats = RequestStats()
 
@@ -411,6 +568,81 @@ class TestRequestStats(unittest.TestCase):
         self.assertEqual(merged.first_seen, 90.0)
         self.assertEqual(merged.last_seen, 120.0)
 
+    def test_shared_stats(self):
+        shared_stats = SharedStats(num_workers=2, max_entries=1)
+        self.addCleanup(shared_stats.unlink)
+        worker_env = Environment()
+        worker_runner = worker_env.create_local_runner()
+        worker_runner.shared_stats = shared_stats
+        master_stats = RequestStats()
+
+        shared_stats.slot = 1
+        worker_env.events.request.fire(
+            request_type="GET", name="/a", response_time=10, response_length=100, exception=None, context={}
+        )
+        worker_env.events.request.fire(
+            request_type="GET", name="/a", response_time=123, response_length=100, exception=None, context={}
+        )
+        # only one entry fits, and response times that aren't in the histogram are logged the usual way
+        worker_env.events.request.fire(
+            request_type="POST", name="/b", response_time=20, response_length=0, exception=None, context={}
+        )
+        worker_env.events.request.fire(
+            request_type="GET", name="/a", response_time=200_000, response_length=0, exception=None, context={}
+        )
+        self.assertEqual(2, worker_runner.stats.total.num_requests)
+        self.assertEqual(1, worker_runner.stats.get("/b", "POST").num_requests)
+
+        shared_stats.collect(master_stats)
+        entry = master_stats.get("/a", "GET")
+        self.assertEqual(2, entry.num_requests)
+        self.assertEqual(200, entry.total_content_length)
+        self.assertEqual(133, entry.total_response_time)
+        self.assertEqual(10, entry.min_response_time)
+        self.assertEqual(123, entry.max_response_time)
+        self.assertEqual({10: 1, 120: 1}, dict(entry.response_times))
+        self.assertEqual(2, master_stats.total.num_requests)
+        self.assertEqual(2, sum(master_stats.total.num_reqs_per_sec.values()))
+
+        # only what changed since the last collect is added
+        shared_stats.collect(master_stats)
+        self.assertEqual(2, master_stats.total.num_requests)
+        shared_stats.log_request("GET", "/a", 30, 10)
+        shared_stats.log_request("GET", "/a", None, 10)
+        shared_stats.collect(master_stats)
+        self.assertEqual(4, entry.num_requests)
+        self.assertEqual(1, entry.num_none_requests)
+        self.assertEqual({10: 1, 30: 1, 120: 1}, dict(entry.response_times))
+        self.assertEqual(4, master_stats.total.num_requests)
+
+        # the rest still goes through the usual report, which always has a total
+        data = {}
+        setup_distributed_stats_event_listeners(worker_env.events, worker_runner.stats)
+        worker_env.events.report_to_master.fire(client_id="w", data=data)
+        self.assertEqual(2, data["stats_total"]["num_requests"])
+
+    def test_shared_stats_per_second_and_templates(self):
+        shared_stats = SharedStats(num_workers=1)
+        self.addCleanup(shared_stats.unlink)
+        shared_stats.slot = 0
+        master_stats = RequestStats()
+
+        with mock.patch("locust.shared_stats.time.time", side_effect=[1000.1, 1000.5, 1002.2]):
+            for _ in range(3):
+                shared_stats.log_request("GET", "/item/1", 10, 0)
+        shared_stats.collect(master_stats)
+        # requests are counted in the second they were made, not when they were collected
+        self.assertEqual({1000: 2, 1002: 1}, dict(master_stats.total.num_reqs_per_sec))
+
+        with mock.patch("locust.shared_stats.time.time", return_value=1002.7):
+            shared_stats.log_request("GET", "/item/2", 10, 0)
+        with mock.patch("locust.stats.NAME_TEMPLATES", locust.stats.DEFAULT_NAME_TEMPLATES):
+            shared_stats.collect(master_stats)
+        self.assertEqual({1000: 2, 1002: 2}, dict(master_stats.total.num_reqs_per_sec))
+        # entries are created like for any other request, so the names are templated
+        self.assertEqual(1, master_stats.get("/item/{id}", "GET").num_requests)
+        self.assertEqual({1002: 1}, dict(master_stats.get("/item/{id}", "GET").num_reqs_per_sec))
+
     def test_serialize_through_message(self):
         """
         Serialize a RequestStats instance, then serialize it through a Message,
@@ -597,6 +829,75 @@ class TestCsvStats(LocustTestCase):
         self.assertTrue(saw100, "Never saw 95th percentile increase to 100")
         self.assertTrue(saw10, "Never saw 95th percentile decrease to 10")
 
+    @mock.patch("locust.stats.CSV_STATS_INTERVAL_SEC", new=_TEST_CSV_STATS_INTERVAL_SEC)
+    def test_csv_stats_writer_only_rewrites_changed_stats(self):
+        stats_writer = StatsCSVFileWriter(self.environment, PERCENTILES_TO_REPORT, self.STATS_BASE_NAME)
+        self.runner.stats.log_request("GET", "/", 100, content_length=666)
+        greenlet = gevent.spawn(stats_writer)
+        gevent.sleep(_TEST_CSV_STATS_INTERVAL_WAIT_SEC)
+
+        with mock.patch.object(stats_writer, "_requests_data_rows") as requests_data_rows:
+            gevent.sleep(_TEST_CSV_STATS_INTERVAL_SEC * 2)
+            requests_data_rows.assert_not_called()
+
+        for _ in range(10):
+            self.runner.stats.log_request("GET", "/", 500, content_length=666)
+        gevent.sleep(_TEST_CSV_STATS_INTERVAL_WAIT_SEC)
+        gevent.kill(greenlet)
+        stats_writer.close_files()
+
+        with open(self.STATS_FILENAME) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(2, len(rows))
+        self.assertEqual("11", rows[0]["Request Count"])
+        self.assertEqual("500", rows[0]["Median Response Time"])
+        self.assertEqual("500", rows[0]["95%"])
+        self.assertEqual("500", rows[1]["95%"])
+
+    @mock.patch("locust.stats.CSV_STATS_INTERVAL_SEC", new=_TEST_CSV_STATS_INTERVAL_SEC)
+    def test_csv_stats_writer_summary_at_end(self):
+        stats_writer = StatsCSVFileWriter(
+            self.environment, PERCENTILES_TO_REPORT, self.STATS_BASE_NAME, summary_at_end=True
+        )
+        self.runner.stats.log_request("GET", "/", 100, content_length=666)
+        self.runner.stats.log_error("GET", "/", Exception("Error"))
+        greenlet = gevent.spawn(stats_writer)
+        gevent.sleep(_TEST_CSV_STATS_INTERVAL_WAIT_SEC)
+        gevent.kill(greenlet)
+
+        with open(self.STATS_FILENAME) as f:
+            self.assertEqual(1, len(f.readlines()))
+
+        stats_writer.close_files()
+        with open(self.STATS_HISTORY_FILENAME) as f:
+            self.assertEqual(2, len(list(csv.DictReader(f))))
+        with open(self.STATS_FILENAME) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(["/", "Aggregated"], [row["Name"] for row in rows])
+        with open(self.STATS_FAILURES_FILENAME) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(1, len(rows))
+        self.assertEqual("1", rows[0]["Occurrences"])
+
+    def test_csv_rows_are_only_rendered_for_changed_entries(self):
+        stats_csv = StatsCSV(self.environment, PERCENTILES_TO_REPORT)
+        stats = self.runner.stats
+        stats.log_request("GET", "/a", 100, content_length=1)
+        stats.log_request("GET", "/b", 200, content_length=1)
+        stats_csv.requests_csv(csv.writer(StringIO()))
+
+        stats.log_request("GET", "/b", 300, content_length=1)
+        with mock.patch.object(StatsEntry, "get_response_time_percentiles", autospec=True) as percentiles:
+            percentiles.return_value = [300] * len(PERCENTILES_TO_REPORT)
+            stats_csv.requests_csv(csv.writer(StringIO()))
+        self.assertEqual(["/b", "Aggregated"], sorted(call.args[0].name for call in percentiles.call_args_list))
+
+        # rows of entries that are gone are evicted
+        stats.clear_all()
+        stats.log_request("GET", "/c", 100, content_length=1)
+        stats_csv.requests_csv(csv.writer(StringIO()))
+        self.assertEqual([("", "Aggregated"), ("GET", "/c")], sorted(stats_csv._row_cache))
+
     def test_csv_stats_on_master_from_aggregated_stats(self):
         # Failing test for: https://github.com/locustio/locust/issues/1315
         with mock.patch("locust.rpc.rpc.Server", mocked_rpc()) as server:
@@ -719,6 +1020,133 @@ class TestCsvStats(LocustTestCase):
         self.assertEqual(0, len(hs2))
 
 
+class TestStatsHistory(unittest.TestCase):
+    def test_downsampling(self):
+        history = StatsHistory(tiers=[(0, 12), (10, 6), (60, 100)])
+        start = 1_700_000_000 - 1_700_000_000 % 60
+        for i in range(60):
+            history.append(start + i * 5, {"current_rps": i, "response_time_percentile_0.95": 100 * (i % 3)})
+
+        self.assertEqual(start + 295, history.last_timestamp)
+        # every sample for the last minute, then 10s resolution as far back as it goes, and 60s before that
+        points = history.to_list()
+        self.assertEqual(4 + 1 + 12, len(points))
+        self.assertEqual(len(points), len(history))
+        self.assertEqual([format_utc_timestamp(start), 5.5], points[0]["current_rps"])
+        self.assertEqual(200, points[0]["response_time_percentile_0.95"][1])
+        self.assertEqual(format_utc_timestamp(start + 180), points[3]["time"])
+        self.assertEqual(41.5, points[3]["current_rps"][1])
+        self.assertEqual(format_utc_timestamp(start + 230), points[4]["time"])
+        self.assertEqual(46.5, points[4]["current_rps"][1])
+        self.assertEqual([format_utc_timestamp(start + 295), 59], points[-1]["current_rps"])
+        self.assertEqual(points[-1], history[-1])
+
+        # too many points for the finest resolution
+        points = history.to_list(max_points=10)
+        self.assertEqual(5, len(points))
+        self.assertEqual(format_utc_timestamp(start + 240), points[-1]["time"])
+        self.assertEqual(53.5, points[-1]["current_rps"][1])
+        self.assertEqual(3, len(history.to_list(max_points=3)))
+
+        history.clear()
+        self.assertEqual(0, len(history))
+        self.assertEqual([], history.to_list())
+
+    def test_list_api(self):
+        history = StatsHistory(tiers=[(0, 12), (10, 6), (60, 100)])
+        self.assertEqual([], list(history))
+        with self.assertRaises(IndexError):
+            history[-1]
+        start = 1_700_000_000 - 1_700_000_000 % 60
+        for i in range(60):
+            history.append(start + i * 5, {"current_rps": i})
+        points = history.to_list()
+
+        # points are read directly from the tiers, without building the whole list
+        with mock.patch.object(history, "to_list", side_effect=AssertionError):
+            self.assertEqual(points, list(history))
+            self.assertEqual(points, [history[i] for i in range(len(history))])
+            self.assertEqual(points[-1], history[-1])
+            self.assertEqual(points[-len(points)], history[-len(points)])
+            self.assertEqual(points[2:9:3], history[2:9:3])
+            self.assertEqual(points[-3:], history[-3:])
+            with self.assertRaises(IndexError):
+                history[len(points)]
+
+        # points in the format of to_list can be appended, like to the list the history used to be
+        history.append(
+            {"time": format_utc_timestamp(start + 300), "current_rps": [format_utc_timestamp(start + 300), 7]}
+        )
+        self.assertEqual([format_utc_timestamp(start + 300), 7], history[-1]["current_rps"])
+        self.assertEqual(start + 300, history.last_timestamp)
+
+    def test_update_stats_history(self):
+        env = Environment()
+        runner = env.create_local_runner()
+        runner.stats.log_request("GET", "/", 100, 0)
+        locust.stats.update_stats_history(runner, 1_700_000_000)
+        self.assertEqual(1, len(runner.stats.history))
+        point = runner.stats.history[0]
+        self.assertEqual("2023-11-14T22:13:20Z", point["time"])
+        self.assertEqual(["2023-11-14T22:13:20Z", 100], point["total_avg_response_time"])
+        self.assertIn("response_time_percentile_0.95", point)
+        runner.stats.reset_all()
+        self.assertEqual(0, len(runner.stats.history))
+
+
+class TestEndpointHistory(unittest.TestCase):
+    def test_ring_buffer(self):
+        history = EndpointHistory(max_entries=10, max_points=3)
+        for i in range(5):
+            history.append(1_700_000_000 + i, ("/", "GET"), {"current_rps": i})
+        data = history.get("/", "GET")
+        self.assertEqual("/", data["name"])
+        self.assertEqual([format_utc_timestamp(1_700_000_000 + i) for i in (2, 3, 4)], data["time"])
+        self.assertEqual([2, 3, 4], [v for _, v in data["current_rps"]])
+        self.assertIsNone(history.get("/", "POST"))
+
+    def test_lru(self):
+        history = EndpointHistory(max_entries=2, max_points=10)
+        self.assertTrue(history.append(1, ("/a", "GET"), {"current_rps": 1}))
+        self.assertTrue(history.append(1, ("/b", "GET"), {"current_rps": 1}))
+        # all tracked endpoints are active
+        self.assertFalse(history.append(1, ("/c", "GET"), {"current_rps": 1}))
+        # inactive endpoints are only recorded if they are already tracked
+        self.assertTrue(history.append(2, ("/a", "GET"), {"current_rps": 0}, active=False))
+        self.assertFalse(history.append(2, ("/c", "GET"), {"current_rps": 0}, active=False))
+        self.assertTrue(history.append(2, ("/b", "GET"), {"current_rps": 1}))
+        # /a is the least recently active
+        self.assertTrue(history.append(2, ("/c", "GET"), {"current_rps": 1}))
+        self.assertEqual(["/b", "/c"], [e["name"] for e in history.to_list()])
+
+    def test_update_stats_history(self):
+        env = Environment()
+        runner = env.create_local_runner()
+        stats = runner.stats
+        stats.endpoint_history.max_entries = 2
+        stats.log_request("GET", "/a", 100, 0)
+        stats.log_request("GET", "/b", 200, 0)
+        stats.log_request("GET", "/c", 300, 0)
+        locust.stats.update_stats_history(runner, time.time())
+        self.assertEqual(["/a", "/b"], [e["name"] for e in stats.endpoint_history.to_list()])
+        data = stats.endpoint_history.get("/b", "GET")
+        self.assertEqual(
+            ["time", "current_rps", "current_fail_per_sec"]
+            + [f"response_time_percentile_{p}" for p in locust.stats.PERCENTILES_TO_CHART_PER_ENDPOINT],
+            list(data.keys())[2:],
+        )
+
+        # only /c is active, and it replaces the least recently active endpoint
+        stats.entries[("/c", "GET")].last_request_timestamp = time.time() + 1
+        stats.entries[("/b", "GET")].last_request_timestamp = time.time() - 1
+        locust.stats.update_stats_history(runner, time.time())
+        self.assertEqual(["/b", "/c"], [e["name"] for e in stats.endpoint_history.to_list()])
+        self.assertEqual(2, len(stats.endpoint_history.get("/b", "GET")["time"]))
+
+        stats.reset_all()
+        self.assertEqual([], stats.endpoint_history.to_list())
+
+
 class TestStatsEntryResponseTimesCache(unittest.TestCase):
     def setUp(self, *args, **kwargs):
         super().setUp(*args, **kwargs)
@@ -0,0 +1,44 @@
+from locust import events
+
+import unittest
+from unittest import mock
+
+try:
+    from locust.contrib import vector
+
+    import numpy as np
+except ImportError:
+    vector = None  # type: ignore
+
+
+@unittest.skipIf(vector is None, reason="numpy is not installed")
+class TestBatchRecall(unittest.TestCase):
+    def test_int_ids(self):
+        truth = np.array([[1, 2, 3, 4], [5, 6, 7, 8]])
+        recall = vector.batch_recall([[1, 2, 9, 3], [8, 0, 0, 0]], truth)
+        self.assertEqual([0.75, 0.25], recall.tolist())
+
+    def test_string_ids(self):
+        truth = np.array([["a", "bb"], ["ccc", "d"]])
+        # retrieved ids longer than the ground truth's are not truncated to match them
+        recall = vector.batch_recall([["a", "bbbb"], ["d", "ccc"]], truth)
+        self.assertEqual([0.5, 1.0], recall.tolist())
+
+    def test_short_results_are_padded(self):
+        truth = np.array([[0, 1, 2], [3, 4, 5]])
+        # the padding (zeros) must not match the id 0
+        recall = vector.batch_recall([[], [3]], truth)
+        self.assertEqual([0.0, 1 / 3], recall.tolist())
+
+    def test_k(self):
+        truth = np.array([[1, 2, 3, 4]])
+        self.assertEqual([1.0], vector.batch_recall([[2, 1, 5]], truth, k=2).tolist())
+        with self.assertRaises(ValueError):
+            vector.batch_recall([[1]], truth, k=5)
+
+    def test_fire_recall_event(self):
+        with mock.patch.object(events.request, "fire") as fire:
+            vector.fire_recall_event("Milvus", "recall", 0.875, response_length=10)
+        fire.assert_called_once_with(
+            request_type="Milvus", name="recall", response_time=87, response_length=10, exception=None
+        )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import locust
-from locust import LoadTestShape, constant, stats
+from locust import LoadTestShape, constant, html, stats
 from locust.argument_parser import get_parser
 from locust.env import Environment
 from locust.log import LogReader
@@ -15,8 +15,10 @@ import json
 import logging
 import os
 import traceback
+from functools import partial
 from io import StringIO
 from tempfile import NamedTemporaryFile
+from unittest import mock
 
 import gevent
 import requests
@@ -162,6 +164,129 @@ class TestWebUI(LocustTestCase, _HeaderCheckMixin):
         data = json.loads(requests.get("http://127.0.0.1:%i/stats/requests" % self.web_port).text)
         self.assertEqual(3, len(data["stats"]))  # this should no longer be cached
 
+    def test_request_stats_pagination(self):
+        for i in range(20):
+            for _ in range(i + 1):
+                self.stats.log_request("GET" if i % 2 else "POST", f"/page/{i:02d}", 10 * i, 100)
+        url = "http://127.0.0.1:%i/stats/requests" % self.web_port
+
+        data = requests.get(url, params={"offset": 5, "limit": 3}).json()
+        self.assertEqual(20, data["stats_count"])
+        self.assertEqual(["/page/05", "/page/06", "/page/07", "Aggregated"], [s["name"] for s in data["stats"]])
+
+        data = requests.get(url, params={"sort": "num_requests", "order": "desc", "limit": 2}).json()
+        self.assertEqual(["/page/19", "/page/18", "Aggregated"], [s["name"] for s in data["stats"]])
+
+        data = requests.get(url, params={"sort": "avg_response_time", "offset": 18}).json()
+        self.assertEqual(["/page/18", "/page/19", "Aggregated"], [s["name"] for s in data["stats"]])
+
+        data = requests.get(url, params={"name": "PAGE/1", "method": "GET", "order": "desc"}).json()
+        self.assertEqual(5, data["stats_count"])
+        self.assertEqual(
+            ["/page/19", "/page/17", "/page/15", "/page/13", "/page/11", "Aggregated"],
+            [s["name"] for s in data["stats"]],
+        )
+        self.assertEqual(210, data["stats"][-1]["num_requests"])
+
+        self.assertEqual(400, requests.get(url, params={"sort": "foo"}).status_code)
+        self.assertEqual(400, requests.get(url, params={"limit": "-1"}).status_code)
+        self.assertEqual(400, requests.get(url, params={"offset": "x"}).status_code)
+
+    def test_request_stats_history(self):
+        self.stats.log_request("GET", "/test", 120, 5612)
+        self.stats.log_request("POST", "/test", 120, 5612)
+        stats.update_stats_history(self.runner)
+        url = "http://127.0.0.1:%i/stats/requests/history" % self.web_port
+
+        data = requests.get(url).json()
+        self.assertEqual(["GET", "POST"], [e["method"] for e in data["endpoints"]])
+        self.assertEqual(1, len(data["endpoints"][0]["time"]))
+
+        data = requests.get(url, params={"name": "/test", "method": "POST"}).json()
+        self.assertEqual(1, len(data["endpoints"]))
+        self.assertEqual("POST", data["endpoints"][0]["method"])
+        self.assertEqual(404, requests.get(url, params={"name": "/nope"}).status_code)
+
+    def test_metrics(self):
+        self.stats.log_request("GET", "/test", 7, 100)
+        self.stats.log_request("GET", "/test", 120, 100)
+        self.stats.log_request("GET", "/test", None, 100)
+        self.stats.log_error("GET", "/test", 'some "error"')
+        url = "http://127.0.0.1:%i/metrics" % self.web_port
+
+        response = requests.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.headers["Content-Type"].startswith("application/openmetrics-text"))
+        lines = response.text.splitlines()
+        self.assertEqual("# EOF", lines[-1])
+        self.assertIn('locust_requests_total{method="GET",name="/test"} 3', lines)
+        self.assertIn('locust_failures_total{method="GET",name="/test"} 1', lines)
+        self.assertIn('locust_response_content_bytes_total{method="GET",name="/test"} 300', lines)
+        self.assertIn('locust_request_duration_seconds_bucket{method="GET",name="/test",le="0.005"} 0', lines)
+        self.assertIn('locust_request_duration_seconds_bucket{method="GET",name="/test",le="0.01"} 1', lines)
+        self.assertIn('locust_request_duration_seconds_bucket{method="GET",name="/test",le="0.25"} 2', lines)
+        self.assertIn('locust_request_duration_seconds_bucket{method="GET",name="/test",le="+Inf"} 2', lines)
+        self.assertIn('locust_request_duration_seconds_sum{method="GET",name="/test"} 0.127', lines)
+        self.assertIn('locust_request_duration_seconds_count{method="GET",name="/test"} 2', lines)
+        self.assertIn('locust_errors_total{method="GET",name="/test",error="some \\"error\\""} 1', lines)
+        self.assertIn("locust_users 0", lines)
+
+        # the rendered text is cached
+        self.stats.log_request("GET", "/test", 7, 100)
+        self.assertEqual(response.text, requests.get(url).text)
+
+    def test_stats_stream(self):
+        self.stats.log_request("GET", "/test", 120, 5612)
+        self.stats.log_request("GET", "/test2", 120, 5612)
+
+        def read_event(lines):
+            event = data = None
+            for line in lines:
+                if line.startswith("event: "):
+                    event = line[len("event: ") :]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: ") :])
+                elif not line and event:
+                    return event, data
+
+        with (
+            mock.patch("locust.web.STATS_STREAM_INTERVAL", new=0.1),
+            mock.patch("locust.web.STATS_STREAM_KEEPALIVE", new=0.1),
+        ):
+            response = requests.get("http://127.0.0.1:%i/stats/requests/stream" % self.web_port, stream=True)
+            self.assertEqual(200, response.status_code)
+            self.assertIn("text/event-stream", response.headers["Content-Type"])
+            lines = response.iter_lines(decode_unicode=True)
+
+            event, data = read_event(lines)
+            self.assertEqual("snapshot", event)
+            self.assertEqual(["/test", "/test2", "Aggregated"], [row["name"] for row in data["stats"]])
+            self.assertEqual(1, len(self.web_ui.stats_stream.subscribers))
+
+            self.stats.log_request("GET", "/test2", 200, 5612)
+            event, data = read_event(lines)
+            self.assertEqual("delta", event)
+            # rows of other entries change too, because all the rates depend on the time of the last request
+            self.assertIn("1", data["stats"])
+            self.assertEqual(2, data["stats"]["1"]["num_requests"])
+            self.assertEqual(3, data["stats"]["2"]["num_requests"])
+
+            # new entries can't be expressed as a delta
+            self.stats.log_request("GET", "/test3", 200, 5612)
+            event, data = read_event(lines)
+            self.assertEqual("snapshot", event)
+            self.assertEqual(4, len(data["stats"]))
+
+            # the server notices that the client is gone when writing the next keepalive
+            response.close()
+            for _ in range(20):
+                if not self.web_ui.stats_stream.subscribers:
+                    break
+                gevent.sleep(0.1)
+            gevent.sleep(0.2)
+        self.assertEqual(0, len(self.web_ui.stats_stream.subscribers))
+        self.assertIsNone(self.web_ui.stats_stream.greenlet)
+
     def test_stats_rounding(self):
         self.stats.log_request("GET", "/test", 1.39764125, 2)
         self.stats.log_request("GET", "/test", 999.9764125, 1000)
@@ -1121,6 +1246,32 @@ class TestWebUI(LocustTestCase, _HeaderCheckMixin):
         self.assertIn(log_line, response.json().get("master"))
         self.assertIn(worker_log_line, response.json().get("workers").get(worker_id))
 
+    def test_write_html_report(self):
+        for i in range(25):
+            self.stats.log_request("GET", f"/<path>/{i}", i * 10, 1000)
+        self.stats.log_error("GET", "/<path>/1", "</script>")
+        # the built web UI might not be available, but the report template source renders just the same
+        webui_source = os.path.join(os.path.dirname(locust.__file__), "webui")
+        output = StringIO()
+        with (
+            mock.patch("locust.html.render_template_from", partial(html.render_template_from, build_path=webui_source)),
+            mock.patch("locust.html.HTML_REPORT_CHUNK_SIZE", 10),
+        ):
+            html.write_html_report(self.environment, output, show_download_link=False)
+        report = output.getvalue()
+
+        self.assertNotIn('</script>"', report)
+        args = json.loads(report.split("window.templateArgs = ", 1)[1].split("\n", 1)[0])
+        self.assertFalse(args["show_download_link"])
+        self.assertEqual(26, len(args["requests_statistics"]))
+        self.assertEqual(26, len(args["response_time_statistics"]))
+        self.assertEqual("/<path>/0", args["requests_statistics"][0]["name"])
+        self.assertEqual("Aggregated", args["requests_statistics"][-1]["name"])
+        percentiles = {stat["name"]: stat for stat in args["response_time_statistics"]}
+        self.assertEqual(240, percentiles["/<path>/24"]["1.0"])
+        self.assertEqual(120, percentiles["Aggregated"]["0.5"])
+        self.assertEqual("</script>", args["failures_statistics"][0]["error"])
+
     def test_template_args(self):
         class MyUser(User):
             @task
@@ -2,6 +2,8 @@ from locust.exception import RPCError, RPCSendError
 from locust.rpc import Message, zmqrpc
 from locust.test.testcases import LocustTestCase
 
+import os
+from tempfile import TemporaryDirectory
 from time import sleep
 
 import zmq
@@ -43,6 +45,21 @@ class ZMQRPC_tests(LocustTestCase):
         self.assertEqual(msg.data, "message")
         self.assertEqual(msg.node_id, "identity")
 
+    def test_compression(self):
+        self.client.compression = "zlib"
+        self.client.send(Message("test", "x" * 100_000, "identity"))
+        self.client.send(Message("test", "small", "identity"))
+        addr, msg = self.server.recv_from_client()
+        self.assertEqual(msg.data, "x" * 100_000)
+        addr, msg = self.server.recv_from_client()
+        self.assertEqual(msg.data, "small")
+
+        large = Message("test", "x" * 100_000, "identity")
+        self.assertLess(len(large.serialize("zlib")), len(large.serialize()) / 10)
+        self.assertEqual(
+            Message("test", "small", "identity").serialize("zlib"), Message("test", "small", "identity").serialize()
+        )
+
     def test_client_retry(self):
         server = zmqrpc.Server("*", 0)
         server.socket.close()
@@ -56,3 +73,21 @@ class ZMQRPC_tests(LocustTestCase):
         server.close()
         with self.assertRaises(RPCSendError):
             server.send_to_client(Message("test", "message", "identity"))
+
+    def test_ipc(self):
+        with TemporaryDirectory() as temp_dir:
+            ipc_path = os.path.join(temp_dir, "locust.sock")
+            server = zmqrpc.Server("*", 0, ipc_path=ipc_path)
+            client = zmqrpc.Client("localhost", 0, "ipc-identity", ipc_path=ipc_path)
+            try:
+                self.assertTrue(os.path.exists(ipc_path))
+                self.assertEqual(f"ipc://{ipc_path}", client.endpoint)
+                client.send(Message("test", "message", "ipc-identity"))
+                addr, msg = server.recv_from_client()
+                self.assertEqual(addr, "ipc-identity")
+                self.assertEqual(msg.data, "message")
+                server.send_to_client(Message("test", "reply", "ipc-identity"))
+                self.assertEqual(client.recv().data, "reply")
+            finally:
+                client.close()
+                server.close()
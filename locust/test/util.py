@@ -20,6 +20,13 @@ from cryptography.x509.oid import NameOID
 IS_WINDOWS = os.name == "nt"
 
 
+def wait(seconds):
+    """Busy wait, unlike gevent.sleep it doesn't let other greenlets run (or update gevent's loop time)"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        pass
+
+
 @contextmanager
 def temporary_file(content, suffix="_locustfile.py", dir=None):
     f = NamedTemporaryFile(suffix=suffix, delete=False, dir=dir)
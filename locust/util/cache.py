@@ -2,12 +2,15 @@ import functools
 from time import time
 
 
-def memoize(timeout, dynamic_timeout=False):
+def memoize(timeout, dynamic_timeout=False, key=None):
     """
     Memoization decorator with support for timeout.
 
     If dynamic_timeout is set, the cache timeout is doubled if the cached function
     takes longer time to run than the timeout time
+
+    If key is set, it is called on every invocation and the cached result is only used if it
+    returns the same value as when the result was cached (e.g. the query string of a request)
     """
     cache = {"timeout": timeout}
 
@@ -15,10 +18,12 @@ def memoize(timeout, dynamic_timeout=False):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             start = time()
-            if (not "time" in cache) or (start - cache["time"] > cache["timeout"]):
+            cache_key = key() if key is not None else None
+            if (not "time" in cache) or (start - cache["time"] > cache["timeout"]) or (cache_key != cache.get("key")):
                 # cache miss
                 cache["result"] = func(*args, **kwargs)
                 cache["time"] = time()
+                cache["key"] = cache_key
                 if dynamic_timeout and cache["time"] - start > cache["timeout"]:
                     cache["timeout"] *= 2
             return cache["result"]
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import csv
+import heapq
 import itertools
 import json
 import logging
 import mimetypes
 import os.path
+from collections.abc import Callable
 from functools import wraps
 from io import StringIO
 from json import dumps
@@ -29,12 +31,14 @@ from flask import (
 from flask_cors import CORS
 from flask_login import LoginManager, login_required
 from gevent import pywsgi
+from gevent.queue import Empty, Full, Queue
 
 from . import __version__ as version
 from . import argument_parser, stats
 from .contrib import fasthttp
-from .html import DEFAULT_BUILD_PATH, get_html_report, render_template_from
+from .html import DEFAULT_BUILD_PATH, generate_html_report, render_template_from
 from .log import get_logs, greenlet_exception_logger
+from .metrics import OPENMETRICS_CONTENT_TYPE, render_metrics
 from .runners import STATE_MISSING, STATE_RUNNING, MasterRunner
 from .user.inspectuser import get_ratio
 from .user.users import HttpUser
@@ -52,6 +56,36 @@ greenlet_exception_handler = greenlet_exception_logger(logger)
 DEFAULT_CACHE_TIME = 2.0
 HOST_IS_REQUIRED = False
 
+"""How often (in seconds) a new stats report is pushed to clients connected to /stats/requests/stream"""
+STATS_STREAM_INTERVAL = 2.0
+"""How often (in seconds) a keepalive comment is sent on idle stats streams, so that proxies don't close them"""
+STATS_STREAM_KEEPALIVE = 15.0
+"""Max number of pending events for a stats stream client. Slower clients get a new snapshot instead."""
+STATS_STREAM_QUEUE_SIZE = 10
+"""
+How long (in seconds) the /metrics text is cached. The same as the interval of worker reports (WORKER_REPORT_INTERVAL),
+so the stats are rendered at most once per report, regardless of the number of scrapers.
+"""
+METRICS_CACHE_TIME = 3.0
+"""Default number of stats entries returned by /stats/requests (the Aggregated entry is always included)"""
+STATS_PAGE_SIZE = 500
+"""Columns that /stats/requests can be sorted by"""
+STATS_SORT_FIELDS = (
+    "name",
+    "method",
+    "num_requests",
+    "num_failures",
+    "fail_ratio",
+    "avg_response_time",
+    "median_response_time",
+    "min_response_time",
+    "max_response_time",
+    "avg_content_length",
+    "current_rps",
+    "current_fail_per_sec",
+    "total_rps",
+)
+
 
 class InputField(TypedDict, total=False):
     label: str
@@ -84,6 +118,134 @@ class AuthArgs(TypedDict, total=False):
     info: str
 
 
+def _server_sent_event(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+def _stats_report_delta(previous: dict[str, Any], report: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    Return the parts of a /stats/requests report that differ from the previous report, or None if
+    the reports can't be diffed (when entries have been added or removed). Changed stats rows are
+    keyed by their index in the "stats" list.
+    """
+    if previous.keys() != report.keys() or len(previous["stats"]) != len(report["stats"]):
+        return None
+
+    delta: dict[str, Any] = {}
+    changed_stats = {}
+    for i, (old_row, new_row) in enumerate(zip(previous["stats"], report["stats"])):
+        if (old_row["method"], old_row["name"]) != (new_row["method"], new_row["name"]):
+            return None
+        if old_row != new_row:
+            changed_stats[str(i)] = new_row
+    if changed_stats:
+        delta["stats"] = changed_stats
+
+    delta.update((key, value) for key, value in report.items() if key != "stats" and previous[key] != value)
+    return delta
+
+
+def select_stats_entries(
+    entries: dict[tuple[str, str], stats.StatsEntry],
+    sort: str = "name",
+    descending: bool = False,
+    name: str = "",
+    method: str = "",
+    offset: int = 0,
+    limit: int = STATS_PAGE_SIZE,
+) -> tuple[list[stats.StatsEntry], int]:
+    """
+    Return a page of stats entries, optionally filtered by (a case insensitive substring of) name and method,
+    and the total number of entries that matched the filters.
+
+    Sorting by name uses the sorted index of RequestStats.entries, and other columns only partially sort
+    the entries (enough to return the requested page).
+    """
+    ordered = stats.sort_stats(entries)
+    if name or method:
+        name = name.lower()
+        ordered = [e for e in ordered if name in e.name.lower() and (not method or e.method == method)]
+    count = len(ordered)
+    end = offset + limit
+
+    if sort == "name":
+        if descending:
+            ordered.reverse()
+        return ordered[offset:end], count
+
+    def sort_key(entry: stats.StatsEntry):
+        value = getattr(entry, sort)
+        if value is None:
+            return "" if sort == "method" else 0
+        return value
+
+    if end >= count:
+        page = sorted(ordered, key=sort_key, reverse=descending)
+    elif descending:
+        page = heapq.nlargest(end, ordered, key=sort_key)
+    else:
+        page = heapq.nsmallest(end, ordered, key=sort_key)
+    return page[offset:end], count
+
+
+class StatsStream:
+    """
+    Pushes the stats report of :attr:`WebUI <locust.web.WebUI>` to all connected clients as server-sent events.
+
+    The report is computed once per STATS_STREAM_INTERVAL, no matter how many clients are connected. New clients
+    get a "snapshot" event with the full report, followed by "delta" events only containing what has changed.
+    """
+
+    def __init__(self, get_report: Callable[[], dict[str, Any]]) -> None:
+        self.get_report = get_report
+        self.subscribers: set[Queue] = set()
+        self.greenlet: gevent.Greenlet | None = None
+        self.report: dict[str, Any] | None = None
+        self.snapshot_event: str | None = None
+
+    def subscribe(self) -> Queue:
+        queue: Queue = Queue(maxsize=STATS_STREAM_QUEUE_SIZE)
+        if self.snapshot_event is not None:
+            queue.put_nowait(self.snapshot_event)
+        self.subscribers.add(queue)
+        if self.greenlet is None:
+            self.greenlet = gevent.spawn(self._run)
+            self.greenlet.link_exception(greenlet_exception_handler)
+        return queue
+
+    def unsubscribe(self, queue: Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def _run(self) -> None:
+        try:
+            while self.subscribers:
+                self.tick()
+                gevent.sleep(STATS_STREAM_INTERVAL)
+        finally:
+            # the report will be stale by the time someone subscribes again
+            self.greenlet = None
+            self.report = None
+            self.snapshot_event = None
+
+    def tick(self) -> None:
+        report = self.get_report()
+        delta = _stats_report_delta(self.report, report) if self.report is not None else None
+        self.report = report
+        self.snapshot_event = _server_sent_event("snapshot", report)
+        if delta == {}:
+            return
+        event = self.snapshot_event if delta is None else _server_sent_event("delta", delta)
+
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except Full:
+                # the client has fallen behind, so the deltas it hasn't received yet are useless
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event)
+
+
 class WebUI:
     """
     Sets up and runs a Flask web app that can start and stop load tests using the
@@ -365,13 +527,15 @@ class WebUI:
         @self.auth_required_if_enabled
         def stats_report() -> Response:
             theme = request.args.get("theme", "")
-            res = get_html_report(
-                self.environment,
-                show_download_link=not request.args.get("download"),
-                theme=theme,
+            res = app.response_class(
+                generate_html_report(
+                    self.environment,
+                    show_download_link=not request.args.get("download"),
+                    theme=theme,
+                ),
+                mimetype="text/html",
             )
             if request.args.get("download"):
-                res = app.make_response(res)
                 host = f"_{self.environment.host}" if self.environment.host else ""
                 res.headers["Content-Disposition"] = (
                     f"attachment;filename=Locust_{format_safe_timestamp(self.environment.stats.start_time)}_"
@@ -445,10 +609,14 @@ class WebUI:
             self.stats_csv_writer.failures_csv(writer)
             return _download_csv_response(data.getvalue(), "failures")
 
-        @app_blueprint.route("/stats/requests")
-        @self.auth_required_if_enabled
-        @memoize(timeout=DEFAULT_CACHE_TIME, dynamic_timeout=True)
-        def request_stats() -> Response:
+        def request_stats_report(
+            sort: str = "name",
+            descending: bool = False,
+            name: str = "",
+            method: str = "",
+            offset: int = 0,
+            limit: int = STATS_PAGE_SIZE,
+        ) -> dict[str, Any]:
             _stats: list[dict[str, Any]] = []
             errors: list[stats.StatsErrorDict] = []
 
@@ -468,18 +636,19 @@ class WebUI:
                 if isinstance(environment.runner, MasterRunner):
                     report.update({"workers": []})
 
-                return jsonify(report)
+                return report
 
-            # Truncate the total number of stats and errors displayed since a large number of rows will cause the app
+            # Only return one page of stats (and truncate the errors) since a large number of rows will cause the app
             # to render extremely slowly. Aggregate stats should be preserved.
-            _stats.extend(
-                stat.to_dict() for stat in itertools.islice(stats.sort_stats(environment.runner.stats.entries), 500)
+            entries, stats_count = select_stats_entries(
+                environment.runner.stats.entries, sort, descending, name, method, offset, limit
             )
+            _stats.extend(stat.to_dict() for stat in entries)
             _stats.append(environment.runner.stats.total.to_dict())
 
-            errors = [e.serialize() for e in itertools.islice(environment.runner.errors.values(), 500)]
+            errors = [e.serialize() for e in itertools.islice(environment.runner.errors.values(), STATS_PAGE_SIZE)]
 
-            report = {"stats": _stats, "errors": errors}
+            report = {"stats": _stats, "errors": errors, "stats_count": stats_count}
 
             total_stats = _stats[-1]
 
@@ -514,7 +683,89 @@ class WebUI:
             report["state"] = environment.runner.state
             report["user_count"] = environment.runner.user_count
 
-            return jsonify(report)
+            return report
+
+        self.stats_stream = StatsStream(request_stats_report)
+
+        @app_blueprint.route("/stats/requests")
+        @self.auth_required_if_enabled
+        @memoize(timeout=DEFAULT_CACHE_TIME, dynamic_timeout=True, key=lambda: request.query_string)
+        def request_stats() -> Response | tuple[Response, int]:
+            """
+            Query parameters (all optional):
+
+            - sort: one of STATS_SORT_FIELDS (defaults to name)
+            - order: asc or desc
+            - name: only include entries whose name contains this (case insensitive)
+            - method: only include entries with this method
+            - offset, limit: the page of entries to return (defaults to the first STATS_PAGE_SIZE)
+            """
+            sort = request.args.get("sort", "name")
+            order = request.args.get("order", "asc")
+            if sort not in STATS_SORT_FIELDS or order not in ("asc", "desc"):
+                return jsonify({"success": False, "message": f"Invalid sort/order: {sort} {order}"}), 400
+            try:
+                offset = int(request.args.get("offset", 0))
+                limit = int(request.args.get("limit", STATS_PAGE_SIZE))
+            except ValueError:
+                offset = limit = -1
+            if offset < 0 or limit < 0:
+                return jsonify({"success": False, "message": "offset and limit must be non-negative integers"}), 400
+
+            return jsonify(
+                request_stats_report(
+                    sort=sort,
+                    descending=order == "desc",
+                    name=request.args.get("name", ""),
+                    method=request.args.get("method", ""),
+                    offset=offset,
+                    limit=limit,
+                )
+            )
+
+        @app_blueprint.route("/stats/requests/history")
+        @self.auth_required_if_enabled
+        def request_stats_history() -> Response | tuple[Response, int]:
+            """
+            History of RPS, failures/s and response time percentiles per endpoint (see ENDPOINT_HISTORY_MAX_ENTRIES).
+            Use the name and method query parameters to only get the history of a single endpoint.
+            """
+            endpoint_history = environment.runner.stats.endpoint_history if environment.runner else None
+            if endpoint_history is None:
+                return jsonify({"endpoints": []})
+            if "name" in request.args:
+                history = endpoint_history.get(request.args["name"], request.args.get("method", ""))
+                if history is None:
+                    return jsonify({"success": False, "message": "No history for this endpoint"}), 404
+                return jsonify({"endpoints": [history]})
+            return jsonify({"endpoints": endpoint_history.to_list()})
+
+        @app_blueprint.route("/stats/requests/stream")
+        @self.auth_required_if_enabled
+        def request_stats_stream() -> Response:
+            def events():
+                queue = self.stats_stream.subscribe()
+                try:
+                    while True:
+                        try:
+                            yield queue.get(timeout=STATS_STREAM_KEEPALIVE)
+                        except Empty:
+                            yield ": keepalive\n\n"
+                finally:
+                    self.stats_stream.unsubscribe(queue)
+
+            return Response(
+                events(),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @app_blueprint.route("/metrics")
+        @self.auth_required_if_enabled
+        @memoize(timeout=METRICS_CACHE_TIME, dynamic_timeout=True)
+        def metrics() -> Response:
+            """Stats, users and CPU/memory usage in the OpenMetrics (Prometheus) text format"""
+            return Response(render_metrics(environment), content_type=OPENMETRICS_CONTENT_TYPE)
 
         @app_blueprint.route("/exceptions")
         @self.auth_required_if_enabled
@@ -729,7 +980,9 @@ class WebUI:
             "user_count": self.environment.runner.user_count,
             "version": version,
             "host": host or "",
-            "history": request_stats.history if request_stats.num_requests > 0 else [],
+            "history": request_stats.history.to_list(stats.HISTORY_CHART_MAX_POINTS)
+            if request_stats.num_requests > 0
+            else [],
             "override_host_warning": override_host_warning,
             "missing_host_warning": missing_host_warning,
             "num_users": options and options.num_users,
@@ -0,0 +1,50 @@
+import { Box, Typography } from '@mui/material';
+
+import LineChart from 'components/LineChart/LineChart';
+import { IEndpointHistory } from 'types/ui.types';
+
+const PERCENTILE_KEY_PREFIX = 'responseTimePercentile';
+
+const percentileColors = ['#ff9f00', '#9966CC', '#8A2BE2', '#8E4585', '#E0B0FF', '#C8A2C8'];
+
+export default function EndpointCharts({
+  endpointHistory,
+  isDarkMode,
+}: {
+  endpointHistory: IEndpointHistory[];
+  isDarkMode?: boolean;
+}) {
+  return endpointHistory.map(history => {
+    const percentileLines = Object.keys(history)
+      .filter(key => key.startsWith(PERCENTILE_KEY_PREFIX))
+      .map(key => ({
+        name: `${Number(key.slice(PERCENTILE_KEY_PREFIX.length)) * 100}th percentile`,
+        key: key as keyof IEndpointHistory,
+      }));
+
+    return (
+      <Box key={`${history.method} ${history.name}`} sx={{ mb: 2 }}>
+        <Typography component='h3' noWrap variant='h6'>
+          {history.method} {history.name}
+        </Typography>
+        <LineChart<IEndpointHistory>
+          charts={history}
+          colors={['#00ca5a', '#ff6d6d']}
+          isDarkMode={isDarkMode}
+          lines={[
+            { name: 'RPS', key: 'currentRps' },
+            { name: 'Failures/s', key: 'currentFailPerSec' },
+          ]}
+          title='Requests per Second'
+        />
+        <LineChart<IEndpointHistory>
+          charts={history}
+          colors={percentileColors}
+          isDarkMode={isDarkMode}
+          lines={percentileLines}
+          title='Response Times (ms)'
+        />
+      </Box>
+    );
+  });
+}
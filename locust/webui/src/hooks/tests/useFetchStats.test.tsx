@@ -6,6 +6,7 @@ import { beforeAll, afterEach, afterAll, describe, expect, test, vi } from 'vite
 import { SWARM_STATE } from 'constants/swarm';
 import useFetchStats from 'hooks/useFetchStats';
 import { swarmActions } from 'redux/slice/swarm.slice';
+import { uiActions } from 'redux/slice/ui.slice';
 import { TEST_BASE_API } from 'test/constants';
 import { statsResponseTransformed, statsResponseMock } from 'test/mocks/statsRequest.mock';
 import { swarmStateMock } from 'test/mocks/swarmState.mock';
@@ -45,6 +46,37 @@ describe('useFetchStats', () => {
     expect(store.getState().ui.stats).toEqual(statsResponseTransformed.stats);
   });
 
+  test('should only poll request stats while the stats stream is disconnected', async () => {
+    let numRequests = 0;
+    server.use(
+      http.get(`${TEST_BASE_API}/stats/requests`, () => {
+        numRequests++;
+        return HttpResponse.json(statsResponseMock);
+      }),
+    );
+
+    const { store } = renderWithProvider(<MockHook />, {
+      swarm: { state: SWARM_STATE.RUNNING },
+      ui: { isStatsStreamConnected: true },
+    });
+
+    await act(async () => {
+      await vi.advanceTimersByTimeAsync(4000);
+    });
+
+    expect(numRequests).toEqual(1);
+
+    await act(async () => {
+      store.dispatch(uiActions.setUi({ isStatsStreamConnected: false }));
+    });
+
+    await act(async () => {
+      await vi.advanceTimersByTimeAsync(2000);
+    });
+
+    expect(numRequests).toEqual(2);
+  });
+
   test('should add markers to charts between tests', async () => {
     const testStopTime = new Date().toISOString();
 
@@ -16,13 +16,15 @@ export default function useFetchStats() {
   const updateCharts = useAction(uiActions.updateCharts);
   const updateChartMarkers = useAction(uiActions.updateChartMarkers);
   const swarm = useSelector(({ swarm }) => swarm);
+  const isStatsStreamConnected = useSelector(({ ui }) => ui.isStatsStreamConnected);
   const previousSwarmState = useRef(swarm.state);
   const [shouldAddMarker, setShouldAddMarker] = useState(false);
 
   const { data: statsData, refetch: refetchStats } = useGetStatsQuery();
 
   const shouldRunRefetchInterval =
-    swarm.state === SWARM_STATE.SPAWNING || swarm.state == SWARM_STATE.RUNNING;
+    (swarm.state === SWARM_STATE.SPAWNING || swarm.state == SWARM_STATE.RUNNING) &&
+    !isStatsStreamConnected;
 
   useEffect(() => {
     if (!statsData) {
@@ -3,6 +3,7 @@ import { Box, Typography, Container, Link } from '@mui/material';
 import CssBaseline from '@mui/material/CssBaseline';
 import { ThemeProvider } from '@mui/material/styles';
 
+import EndpointCharts from 'components/EndpointCharts/EndpointCharts';
 import ExceptionsTable from 'components/ExceptionsTable/ExceptionsTable';
 import FailuresTable from 'components/FailuresTable/FailuresTable';
 import ResponseTimeTable from 'components/ResponseTimeTable/ResponseTimeTable';
@@ -43,6 +44,7 @@ export default function HtmlReport({
   failuresStatistics,
   responseTimeStatistics,
   tasks,
+  endpointHistory,
 }: IReport) {
   useEffect(() => {
     document.title = window.templateArgs.profile
@@ -131,6 +133,14 @@ export default function HtmlReport({
             </Typography>
             <SwarmCharts charts={charts} isDarkMode={isDarkMode} />
           </Box>
+          {!!endpointHistory?.length && (
+            <Box>
+              <Typography component='h2' noWrap sx={{ mb: 1 }} variant='h4'>
+                Charts per Endpoint
+              </Typography>
+              <EndpointCharts endpointHistory={endpointHistory} isDarkMode={isDarkMode} />
+            </Box>
+          )}
           <Box>
             <Typography component='h2' noWrap sx={{ mb: 1 }} variant='h4'>
               Final ratio
@@ -1,8 +1,10 @@
 import { createApi, fetchBaseQuery } from '@reduxjs/toolkit/query/react';
 
+import { uiActions } from 'redux/slice/ui.slice';
 import { IStartSwarmResponse, ISwarmFormInput } from 'types/swarm.types';
 import {
   IStatsResponse,
+  IStatsStreamDelta,
   ISwarmExceptionsResponse,
   ISwarmRatios,
   ILogsResponse,
@@ -21,6 +23,8 @@ const baseQuery = (args: any, api: any, extraOptions: any) =>
       : undefined,
   )(args, api, extraOptions);
 
+const STATS_STREAM_PATH = 'stats/requests/stream';
+
 export const api = createApi({
   baseQuery: baseQuery,
   tagTypes: ['stats'],
@@ -29,6 +33,52 @@ export const api = createApi({
       query: () => 'stats/requests',
       transformResponse: camelCaseKeys<IStatsResponse>,
       providesTags: ['stats'],
+      async onCacheEntryAdded(_, { updateCachedData, cacheDataLoaded, cacheEntryRemoved, dispatch }) {
+        if (typeof EventSource === 'undefined') {
+          return;
+        }
+
+        try {
+          await cacheDataLoaded;
+        } catch {
+          return;
+        }
+
+        const eventSource = new EventSource(
+          window.baseUrl
+            ? `${window.baseUrl.replace(/\/$/, '')}/${STATS_STREAM_PATH}`
+            : STATS_STREAM_PATH,
+          { withCredentials: !!window.baseUrl },
+        );
+
+        // Stats are pushed by the server while the stream is connected, so they don't need to be polled
+        const setIsStatsStreamConnected = (isStatsStreamConnected: boolean) =>
+          dispatch(uiActions.setUi({ isStatsStreamConnected }));
+
+        eventSource.addEventListener('open', () => setIsStatsStreamConnected(true));
+        eventSource.addEventListener('error', () => setIsStatsStreamConnected(false));
+        eventSource.addEventListener('snapshot', event => {
+          const snapshot = camelCaseKeys<IStatsResponse>(JSON.parse((event as MessageEvent).data));
+          updateCachedData(() => snapshot);
+        });
+        eventSource.addEventListener('delta', event => {
+          const { stats, ...changes } = camelCaseKeys<IStatsStreamDelta>(
+            JSON.parse((event as MessageEvent).data),
+          );
+          updateCachedData(draft => {
+            Object.assign(draft, changes);
+            if (stats) {
+              Object.entries(stats).forEach(([index, stat]) => {
+                draft.stats[Number(index)] = stat;
+              });
+            }
+          });
+        });
+
+        await cacheEntryRemoved;
+        setIsStatsStreamConnected(false);
+        eventSource.close();
+      },
     }),
     getTasks: builder.query<ISwarmRatios, void>({
       query: () => 'tasks',
@@ -27,6 +27,7 @@ const initialState = {
   },
   ratios: {} as ISwarmRatios,
   userCount: 0,
+  isStatsStreamConnected: false,
 };
 
 describe('uiSlice', () => {
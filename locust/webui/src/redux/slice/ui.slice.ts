@@ -25,6 +25,7 @@ export interface IUiState {
   ratios: ISwarmRatios;
   charts: ICharts;
   userCount: number;
+  isStatsStreamConnected: boolean;
 }
 
 export type UiAction = PayloadAction<Partial<IUiState>>;
@@ -39,6 +40,7 @@ const initialState = {
   charts: (swarmTemplateArgs.history || []).reduce(updateArraysAtProps, {}) as ICharts,
   ratios: {} as ISwarmRatios,
   userCount: 0,
+  isStatsStreamConnected: false,
 };
 
 const percentileNullValues = swarmTemplateArgs.percentilesToChart?.reduce(
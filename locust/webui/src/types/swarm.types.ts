@@ -3,6 +3,7 @@ import { ITab } from 'types/tab.types';
 import { ITableStructure } from 'types/table.types';
 import {
   ICharts,
+  IEndpointHistory,
   ISwarmError,
   ISwarmStat,
   IResponseTime,
@@ -83,6 +84,7 @@ export interface IReport {
   responseTimeStatistics: IResponseTime[];
   exceptionsStatistics: ISwarmException[];
   tasks: ISwarmRatios;
+  endpointHistory?: IEndpointHistory[];
 }
 
 export interface IReportTemplateArgs extends Omit<IReport, 'charts'> {
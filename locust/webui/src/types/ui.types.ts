@@ -64,6 +64,16 @@ export interface ICharts extends ILineChartMarkers {
   time: string[];
 }
 
+export interface IEndpointHistory {
+  method: string;
+  name: string;
+  time: string[];
+  currentRps: [string, number][];
+  currentFailPerSec: [string, number][];
+  // response time percentiles, e.g. responseTimePercentile0.95
+  [key: string]: any;
+}
+
 export interface IClassRatio {
   [key: string]: {
     ratio: number;
@@ -105,6 +115,11 @@ export interface IStatsResponse {
   userCount: number;
 }
 
+export type IStatsStreamDelta = Partial<Omit<IStatsResponse, 'stats'>> & {
+  // changed rows, keyed by their index in IStatsResponse.stats
+  stats?: { [index: string]: ISwarmStat };
+};
+
 export interface ILogsResponse {
   master: string[];
   workers: {